@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+from ._batch import batch
 from ._version import __version__
 from .widget import AnyWidget
 
-__all__ = ["AnyWidget", "__version__"]
+__all__ = ["AnyWidget", "__version__", "batch"]
 
 
 def _jupyter_labextension_paths() -> list[dict]:
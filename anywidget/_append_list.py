@@ -0,0 +1,186 @@
+"""A list that syncs appends to the front end incrementally.
+
+Re-assigning a growing list (e.g. `widget.messages = [*widget.messages, msg]`)
+re-sends every item on each change, so a long-lived transcript gets quadratically
+more expensive to sync. An `AppendList` instead sends just the appended items (as
+an `extend` patch operation, see `_patch.py`), plus a `truncate` operation when
+items are dropped from the end. Any other in-place mutation (insert, sort, item
+assignment, ...) falls back to replacing the whole value.
+
+Note that in-place mutations don't fire Python-side change notifications
+(traitlets observers or psygnal events); only the front end is updated.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING, Any, Iterable, SupportsIndex
+
+import traitlets
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing_extensions import Protocol, Self
+
+    class _PatchSink(Protocol):
+        def _send_patch(
+            self,
+            key: str,
+            ops: list[dict],
+            source: object | None = None,
+        ) -> bool: ...
+
+
+__all__ = ["AppendList", "AppendListTrait", "bind_append_lists"]
+
+
+class AppendList(list):
+    """A `list` whose appends are synced to the front end without re-sending it.
+
+    Use it as the value of an `AppendListTrait` on an `AnyWidget`, or as the value
+    of a field on an object using `MimeBundleDescriptor` (e.g. an
+    `anywidget.experimental.dataclass`).
+
+    Examples
+    --------
+    >>> @anywidget.experimental.dataclass(esm="index.js")
+    ... class Chat:
+    ...     messages: AppendList = dataclasses.field(default_factory=AppendList)
+    ...
+    >>> chat = Chat()
+    >>> chat.messages.append({"role": "user", "content": "hi"})  # sends one item
+    """
+
+    # `list` doesn't support weak references (or instance attributes) itself,
+    # so they need to be declared for the subclass.
+    __slots__ = ("__weakref__", "_subscribers")
+
+    def __init__(self, iterable: Iterable[Any] = ()) -> None:
+        super().__init__(iterable)
+        # (owner, key) pairs to notify of changes, holding the owner weakly
+        self._subscribers: list[tuple[weakref.ref[_PatchSink], str]] = []
+
+    def _subscribe(self, owner: _PatchSink, key: str) -> None:
+        """Send patches for this list to `owner` (as the value of `key`)."""
+        for ref, k in self._subscribers:
+            if ref() is owner and k == key:
+                return
+        self._subscribers.append((weakref.ref(owner), key))
+
+    def _notify(self, ops: list[dict]) -> None:
+        alive = []
+        for ref, key in self._subscribers:
+            owner = ref()
+            # owners return False once this list is no longer their value for `key`
+            if owner is not None and owner._send_patch(key, ops, self):  # noqa: SLF001
+                alive.append((ref, key))
+        self._subscribers = alive
+
+    def _notify_replace(self) -> None:
+        self._notify([{"op": "replace", "path": [], "value": list(self)}])
+
+    def append(self, item: Any) -> None:  # noqa: ANN401
+        """Append an item, sending only that item to the front end."""
+        super().append(item)
+        self._notify([{"op": "extend", "path": [], "value": [item]}])
+
+    def extend(self, items: Iterable[Any]) -> None:
+        """Extend the list, sending only the new items to the front end."""
+        items = list(items)
+        super().extend(items)
+        if items:
+            self._notify([{"op": "extend", "path": [], "value": items}])
+
+    def __iadd__(self, items: Iterable[Any]) -> Self:  # type: ignore[misc]
+        self.extend(items)
+        return self
+
+    def clear(self) -> None:
+        """Remove all items from the list."""
+        super().clear()
+        self._notify([{"op": "truncate", "path": [], "value": 0}])
+
+    def pop(self, index: SupportsIndex = -1) -> Any:  # noqa: ANN401
+        """Remove and return the item at `index` (default: the last one)."""
+        item = super().pop(index)
+        if int(index) in {-1, len(self)}:
+            self._notify([{"op": "truncate", "path": [], "value": len(self)}])
+        else:
+            self._notify_replace()
+        return item
+
+    def __delitem__(self, index: SupportsIndex | slice) -> None:
+        length = len(self)
+        super().__delitem__(index)
+        if isinstance(index, slice):
+            _, stop, step = index.indices(length)
+            if stop == length and step == 1:
+                self._notify([{"op": "truncate", "path": [], "value": len(self)}])
+                return
+        elif int(index) in {-1, length - 1}:
+            self._notify([{"op": "truncate", "path": [], "value": len(self)}])
+            return
+        self._notify_replace()
+
+    def __setitem__(self, index: Any, value: Any) -> None:  # noqa: ANN401
+        super().__setitem__(index, value)
+        self._notify_replace()
+
+    def __imul__(self, n: SupportsIndex) -> Self:
+        super().__imul__(n)
+        self._notify_replace()
+        return self
+
+    def insert(self, index: SupportsIndex, item: Any) -> None:  # noqa: ANN401
+        """Insert an item (re-sends the whole list)."""
+        super().insert(index, item)
+        self._notify_replace()
+
+    def remove(self, item: Any) -> None:  # noqa: ANN401
+        """Remove the first occurrence of an item (re-sends the whole list)."""
+        super().remove(item)
+        self._notify_replace()
+
+    def reverse(self) -> None:
+        """Reverse the list in place (re-sends the whole list)."""
+        super().reverse()
+        self._notify_replace()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Sort the list in place (re-sends the whole list)."""
+        super().sort(*args, **kwargs)
+        self._notify_replace()
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> tuple:
+        # don't copy/pickle the subscribers along with the items
+        return (type(self), (list(self),))
+
+
+class AppendListTrait(traitlets.List):
+    """A synced `List` trait whose appends are sent to the front end incrementally.
+
+    Assigned values are converted to an `AppendList`, so `widget.messages.append(x)`
+    sends only `x` rather than the entire list.
+
+    Examples
+    --------
+    >>> class Chat(anywidget.AnyWidget):
+    ...     messages = AppendListTrait().tag(sync=True)
+    """
+
+    klass = AppendList
+
+    def validate(self, obj: Any, value: Any) -> Any:  # noqa: ANN401
+        if isinstance(value, (list, tuple, set)) and not isinstance(value, AppendList):
+            value = AppendList(value)
+        value = super().validate(obj, value)
+        if isinstance(value, AppendList) and self.name and hasattr(obj, "_send_patch"):
+            value._subscribe(obj, self.name)  # noqa: SLF001
+        return value
+
+
+def bind_append_lists(owner: _PatchSink, obj: object, keys: Iterable[str]) -> None:
+    """Subscribe `owner` to every `AppendList` held by `obj` under `keys`."""
+    for key in keys:
+        value = getattr(obj, key, None)
+        if isinstance(value, AppendList):
+            value._subscribe(owner, key)  # noqa: SLF001
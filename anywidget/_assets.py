@@ -0,0 +1,104 @@
+"""Content-addressed deduplication of `_esm` and `_css` assets.
+
+Every widget sends its `_esm` and `_css` in the state it opens its comm with, so
+displaying many instances of one class sends (and stores) the same source over
+and over. Instead, large assets are sent along with their content hash:
+
+    {"kind": "anywidget-asset", "hash": "...", "source": "..."}
+
+the first time, and only by hash once the front end has been sent them:
+
+    {"kind": "anywidget-asset", "hash": "..."}
+
+The front end caches sources by hash (see `resolve_assets` in
+`packages/anywidget/src/widget.js`). A front end that doesn't have a source
+(e.g. a second browser tab) asks for it with an `anywidget-asset-request`
+message, which is answered with an update including the source.
+
+Assets are only referenced by hash in the state a comm is opened with (updates,
+and the state sent to front ends that request it, always include the source),
+and only inside a Jupyter kernel, whose front ends run the anywidget front end.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from typing import Mapping
+
+from ._util import _CSS_KEY, _ESM_KEY
+
+__all__ = ["ASSET_REQUEST_KIND", "asset_markers", "reference_assets"]
+
+ASSET_REQUEST_KIND = "anywidget-asset-request"
+
+_ASSET_KIND = "anywidget-asset"
+_ASSET_KEYS = (_ESM_KEY, _CSS_KEY)
+
+# Smaller assets are cheaper to send than to look up.
+_MIN_ASSET_SIZE = 1024
+
+# Hashes of the assets sent to the front end by this kernel.
+_SENT_ASSETS: set[str] = set()
+
+
+def _asset_hash(source: str) -> str:
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def _in_kernel() -> bool:
+    """Whether we're running inside a Jupyter (IPython) kernel."""
+    ipython = sys.modules.get("IPython")
+    shell = ipython.get_ipython() if ipython is not None else None
+    return getattr(shell, "kernel", None) is not None
+
+
+def reference_assets(state: dict) -> set[str]:
+    """Replace large assets in the state a comm is opened with by markers, in place.
+
+    Assets the front end has already been sent are referenced by hash only.
+
+    Returns
+    -------
+    set[str]
+        The keys replaced by markers.
+    """
+    referenced: set[str] = set()
+    if not _in_kernel():
+        return referenced
+    for key in _ASSET_KEYS:
+        source = state.get(key)
+        if not isinstance(source, str) or len(source) < _MIN_ASSET_SIZE:
+            continue
+        digest = _asset_hash(source)
+        if digest in _SENT_ASSETS:
+            state[key] = {"kind": _ASSET_KIND, "hash": digest}
+        else:
+            _SENT_ASSETS.add(digest)
+            state[key] = {"kind": _ASSET_KIND, "hash": digest, "source": source}
+        referenced.add(key)
+    return referenced
+
+
+def asset_markers(values: Mapping[str, object]) -> dict:
+    """Get markers (with their source) for the assets in `values`.
+
+    Parameters
+    ----------
+    values : Mapping[str, object]
+        The current values of the keys requested by the front end (keys that
+        aren't assets are ignored).
+
+    Returns
+    -------
+    dict
+        The state to send, which the front end caches the sources from.
+    """
+    state = {}
+    for key in _ASSET_KEYS:
+        source = values.get(key)
+        if isinstance(source, str):
+            digest = _asset_hash(source)
+            _SENT_ASSETS.add(digest)
+            state[key] = {"kind": _ASSET_KIND, "hash": digest, "source": source}
+    return state
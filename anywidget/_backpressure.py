@@ -0,0 +1,116 @@
+"""Latest-value-wins backpressure for high-frequency updates.
+
+When Python updates a key faster than the front end can apply (and render) the
+updates, sending every intermediate value makes the browser fall further and
+further behind. Instead, updates of opted-in keys ask the front end to
+acknowledge them once applied:
+
+    {"method": "update", "state": ..., "buffer_paths": [...], "ack": 3}
+
+    {"kind": "anywidget-ack", "seq": 3}  (custom message from the front end)
+
+Until the acknowledgement arrives, further changes of these keys are held back,
+and only the keys that changed are remembered. When it arrives, the *current*
+values of those keys are sent in a single update, so intermediate values are
+dropped, and the front end is never more than one update behind.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+__all__ = ["ACK_KIND", "LatestValueQueue", "make_latest_value_queue"]
+
+ACK_KIND = "anywidget-ack"
+
+
+class LatestValueQueue:
+    """Holds back updates of some keys while the front end applies the last one.
+
+    Parameters
+    ----------
+    keys : frozenset[str] | None, optional
+        The keys to apply backpressure to. `None` (the default) for all keys.
+    """
+
+    def __init__(self, keys: frozenset[str] | None = None) -> None:
+        self._keys = keys
+        self._seq = 0
+        # the sequence number of the update waiting to be acknowledged
+        self._waiting: int | None = None
+        # keys changed while waiting, to send once acknowledged
+        self._pending: set[str] = set()
+
+    def _applies_to(self, key: str) -> bool:
+        return self._keys is None or key in self._keys
+
+    def hold(self, state: dict, *, full: bool = False) -> dict:
+        """Remove the keys that must wait for an acknowledgement from `state`.
+
+        Parameters
+        ----------
+        state : dict
+            The state about to be sent (modified in place).
+        full : bool, optional
+            Whether `state` is the full state (e.g. requested by a new front end),
+            which is always sent, and forgets about any update waiting to be
+            acknowledged.
+
+        Returns
+        -------
+        dict
+            The state to send now.
+        """
+        if full:
+            self._waiting = None
+            self._pending.clear()
+            return state
+        if self._waiting is not None:
+            for key in [key for key in state if self._applies_to(key)]:
+                del state[key]
+                self._pending.add(key)
+        return state
+
+    def track(self, msg: dict, keys: Iterable[str]) -> None:
+        """Ask the front end to acknowledge `msg` if it updates any of the keys."""
+        if any(self._applies_to(key) for key in keys):
+            self._seq += 1
+            self._waiting = msg["ack"] = self._seq
+
+    def ack(self, content: dict) -> set[str]:
+        """Handle an `anywidget-ack` message from the front end.
+
+        Returns
+        -------
+        set[str]
+            The keys that changed while waiting, whose current values should be
+            sent now.
+        """
+        if content.get("seq") != self._waiting:
+            return set()
+        self._waiting = None
+        pending, self._pending = self._pending, set()
+        return pending
+
+
+def make_latest_value_queue(
+    backpressure: bool | Iterable[str],
+) -> LatestValueQueue | None:
+    """Create a `LatestValueQueue` from a `backpressure` option.
+
+    Parameters
+    ----------
+    backpressure : bool | Iterable[str]
+        `True` to apply backpressure to all keys, or the names of the keys to apply
+        it to. `False` for none.
+
+    Returns
+    -------
+    queue : LatestValueQueue | None
+        The queue, or `None` if backpressure is disabled.
+    """
+    if backpressure is False:
+        return None
+    if backpressure is True:
+        return LatestValueQueue()
+    return LatestValueQueue(frozenset(backpressure))
@@ -0,0 +1,56 @@
+"""Batching Python-side state changes into a single update."""
+
+from __future__ import annotations
+
+import contextlib
+import inspect
+from typing import Iterator
+
+from ._descriptor import _REPR_ATTR, MimeBundleDescriptor, ReprMimeBundle
+from .widget import AnyWidget
+
+__all__ = ["batch"]
+
+
+@contextlib.contextmanager
+def batch(widget: object) -> Iterator[None]:
+    """Send the state changes made inside the block as a single update.
+
+    The front end then applies them together, firing a single `change` event per
+    key, rather than rendering every intermediate state.
+
+    Parameters
+    ----------
+    widget : object
+        An `AnyWidget`, or an object with a `MimeBundleDescriptor`.
+
+    Raises
+    ------
+    TypeError
+        If `widget` is neither.
+
+    Examples
+    --------
+    >>> with anywidget.batch(chart):
+    ...     chart.data = data
+    ...     chart.x_domain = [0, 10]
+    ...     chart.selection = []
+    """
+    if isinstance(widget, AnyWidget):
+        with widget.hold_sync():
+            yield
+        return
+    # (without calling the descriptor, which would open a comm)
+    repr_obj = inspect.getattr_static(widget, _REPR_ATTR, None)
+    if isinstance(repr_obj, MimeBundleDescriptor):
+        # not displayed yet, so there's no front end to send changes to
+        yield
+        return
+    if not isinstance(repr_obj, ReprMimeBundle):
+        msg = (
+            f"Cannot batch changes of {widget!r}, which is neither an AnyWidget nor "
+            "an object with a MimeBundleDescriptor."
+        )
+        raise TypeError(msg)
+    with repr_obj.hold_sync():
+        yield
@@ -0,0 +1,147 @@
+"""Chunked transfer of very large binary buffers, with flow control.
+
+A single `update` message carrying a huge buffer blocks the kernel's IOPub
+channel, and can exceed websocket (or proxy) message size limits. Instead, buffers
+larger than a chunk are left out of the `update` message, which records how many
+chunks each of them was split into:
+
+    {"method": "update", "state": ..., "buffer_paths": [...],
+     "transfer": {"id": "...", "chunks": [null, 3]}}
+
+(`null` for buffers sent along with the message as usual). The chunks follow as
+custom messages, each carrying one (bounded) buffer:
+
+    {"kind": "anywidget-chunk", "id": "...", "seq": 0}
+
+The front end acknowledges each chunk it receives with an `anywidget-chunk-ack`
+message, and at most `window` chunks are in flight at a time, so other messages
+can interleave with a large transfer. The front end reassembles the buffers
+before applying the update, in order with other updates.
+
+A front end that goes away (e.g. the page is reloaded) never acknowledges the
+chunks it was sent. So the window is given back when a front end requests the
+full state, and when no chunk has been acknowledged for `ack_timeout` seconds.
+The chunks still queued are sent regardless, since other front ends are waiting
+for them to apply the update (a front end that connected after the update was
+sent ignores them).
+"""
+
+from __future__ import annotations
+
+import collections
+import time
+import uuid
+from typing import Callable
+
+__all__ = ["CHUNK_ACK_KIND", "ChunkedSender"]
+
+# The maximum size (in bytes) of a single chunk.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# The maximum number of chunks sent but not yet acknowledged by the front end.
+DEFAULT_WINDOW = 8
+
+# How long (in seconds) to wait for acknowledgements before giving up on them.
+DEFAULT_ACK_TIMEOUT = 10.0
+
+_CHUNK_KIND = "anywidget-chunk"
+CHUNK_ACK_KIND = "anywidget-chunk-ack"
+
+
+class ChunkedSender:
+    """Sends `update` messages, splitting buffers larger than a chunk.
+
+    Note that chunks are zero-copy views of the original buffers, which must not
+    be mutated until the transfer completes.
+
+    Parameters
+    ----------
+    send : Callable[[dict, list], None]
+        Sends a message (and its buffers) over the comm.
+    chunk_size : int, optional
+        The maximum size (in bytes) of a chunk.
+    window : int, optional
+        The maximum number of chunks waiting to be acknowledged.
+    ack_timeout : float, optional
+        How long (in seconds) to wait for an acknowledgement before assuming the
+        chunks in flight were lost.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict, list], None],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        window: int = DEFAULT_WINDOW,
+        ack_timeout: float = DEFAULT_ACK_TIMEOUT,
+    ) -> None:
+        self._send = send
+        self._chunk_size = chunk_size
+        self._window = window
+        self._ack_timeout = ack_timeout
+        self._in_flight = 0
+        # when the last chunk was acknowledged (or the window was last empty)
+        self._last_ack = time.monotonic()
+        # (transfer id, seq, chunk) waiting to be sent
+        self._queue: collections.deque[tuple[str, int, memoryview]] = (
+            collections.deque()
+        )
+
+    def send(self, msg: dict, buffers: list) -> None:
+        """Send `msg`, following it with chunks of its largest buffers."""
+        sizes = [memoryview(b).nbytes for b in buffers]
+        if msg.get("method") != "update" or max(sizes, default=0) <= self._chunk_size:
+            self._send(msg, buffers)
+            return
+
+        transfer_id = uuid.uuid4().hex
+        inline: list = []
+        counts: list[int | None] = []
+        seq = 0
+        for buffer, size in zip(buffers, sizes):
+            if size <= self._chunk_size:
+                inline.append(buffer)
+                counts.append(None)
+                continue
+            view = memoryview(buffer).cast("B")
+            starts = range(0, size, self._chunk_size)
+            counts.append(len(starts))
+            for start in starts:
+                self._queue.append(
+                    (transfer_id, seq, view[start : start + self._chunk_size])
+                )
+                seq += 1
+
+        self._send({**msg, "transfer": {"id": transfer_id, "chunks": counts}}, inline)
+        if time.monotonic() - self._last_ack > self._ack_timeout:
+            # the front end stopped acknowledging, so the chunks were lost
+            self._in_flight = 0
+        self._pump()
+
+    def ack(self) -> None:
+        """Handle an `anywidget-chunk-ack` message from the front end."""
+        self._in_flight = max(0, self._in_flight - 1)
+        self._last_ack = time.monotonic()
+        self._pump()
+
+    def reset(self) -> None:
+        """Give back the window.
+
+        Called when the full state is sent (e.g. requested by a reloaded front
+        end, which will never acknowledge the chunks sent to its predecessor).
+        Transfers in progress carry on, as their updates were already sent.
+        """
+        self._in_flight = 0
+        self._pump()
+
+    def _pump(self) -> None:
+        """Send queued chunks while there is room in the window."""
+        if not self._in_flight:
+            self._last_ack = time.monotonic()
+        while self._queue and self._in_flight < self._window:
+            transfer_id, seq, chunk = self._queue.popleft()
+            self._in_flight += 1
+            msg = {
+                "method": "custom",
+                "content": {"kind": _CHUNK_KIND, "id": transfer_id, "seq": seq},
+            }
+            self._send(msg, [chunk])
@@ -0,0 +1,115 @@
+"""Optional compression of large binary buffers sent to the front end.
+
+When a kernel is remote behind a slow link, multi-MB image and array buffers
+dominate latency. Buffers of opted-in keys that are larger than a threshold are
+compressed (with `deflate`, which browsers decompress natively with
+`DecompressionStream`), and sent in place of the raw data.
+
+The codec used is recorded in the state, at the buffer's path:
+
+    {"kind": "anywidget-compressed", "codec": "deflate"}
+
+with the compressed data as the marker's `buffer` (so the buffer path gets a
+trailing `"buffer"`). The front end decompresses these before applying the state
+(see `unpack_buffers` in `packages/anywidget/src/widget.js`).
+
+The standard library's `zlib` is used by default, and the faster, compatible
+`zlib_ng` or `isal` implementations are used instead if they are installed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import importlib
+import zlib
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+if TYPE_CHECKING:  # pragma: no cover
+    from types import ModuleType
+
+__all__ = ["DEFAULT_COMPRESS_THRESHOLD", "BufferCompressor", "make_compressor"]
+
+# Buffers smaller than this (in bytes) aren't worth compressing by default.
+DEFAULT_COMPRESS_THRESHOLD = 64 * 1024
+
+# Keep the raw buffer unless compressing saves at least this fraction of it.
+_MIN_SAVINGS = 0.1
+
+# Favor speed over ratio; the point is to cut latency.
+_COMPRESSION_LEVEL = 1
+
+_COMPRESSED_KIND = "anywidget-compressed"
+_CODEC = "deflate"
+
+
+def _zlib() -> ModuleType:
+    """Return the fastest available zlib-compatible module."""
+    for name in ("zlib_ng.zlib_ng", "isal.isal_zlib"):
+        with contextlib.suppress(ImportError):
+            return importlib.import_module(name)
+    return zlib
+
+
+class BufferCompressor:
+    """Compresses the large binary buffers of some keys before they are sent.
+
+    Parameters
+    ----------
+    thresholds : int | Mapping[str, int]
+        The size (in bytes) above which buffers are compressed, either for every
+        key, or per key (buffers of other keys are never compressed).
+    """
+
+    def __init__(self, thresholds: int | Mapping[str, int]) -> None:
+        self._thresholds = thresholds
+        self._compress = _zlib().compress
+
+    def _threshold(self, key: object) -> int | None:
+        if isinstance(self._thresholds, int):
+            return self._thresholds
+        return self._thresholds.get(key)  # type: ignore[call-overload, no-any-return]
+
+    def compress(self, state: dict, buffer_paths: list[list], buffers: list) -> None:
+        """Compress buffers in the output of `remove_buffers`, in place.
+
+        The containers holding the buffers are expected to be copies (as made by
+        `remove_buffers`), since compressed buffers are marked in `state`.
+        """
+        for i, (path, buffer) in enumerate(zip(buffer_paths, buffers)):
+            threshold = self._threshold(path[0])
+            size = memoryview(buffer).nbytes
+            if threshold is None or size < threshold:
+                continue
+            compressed = self._compress(buffer, _COMPRESSION_LEVEL)
+            if len(compressed) > size * (1 - _MIN_SAVINGS):
+                continue
+            parent: Any = state
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = {"kind": _COMPRESSED_KIND, "codec": _CODEC}
+            buffer_paths[i] = [*path, "buffer"]
+            buffers[i] = compressed
+
+
+def make_compressor(compress: bool | int | Iterable[str]) -> BufferCompressor | None:
+    """Create a `BufferCompressor` from a `compress` option.
+
+    Parameters
+    ----------
+    compress : bool | int | Iterable[str]
+        `True` to compress buffers of any key larger than the default threshold,
+        an `int` to use a different threshold (in bytes), or the names of the keys
+        to compress buffers of. `False` to never compress.
+
+    Returns
+    -------
+    compressor : BufferCompressor | None
+        The compressor, or `None` if compression is disabled.
+    """
+    if compress is False:
+        return None
+    if compress is True:
+        return BufferCompressor(DEFAULT_COMPRESS_THRESHOLD)
+    if isinstance(compress, int):
+        return BufferCompressor(compress)
+    return BufferCompressor(dict.fromkeys(compress, DEFAULT_COMPRESS_THRESHOLD))
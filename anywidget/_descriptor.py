@@ -18,22 +18,31 @@
 from __future__ import annotations
 
 import contextlib
-import json
 import sys
+import time
 import warnings
 import weakref
-from dataclasses import asdict, is_dataclass
+from dataclasses import asdict, fields, is_dataclass
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Iterable,
+    Iterator,
     Sequence,
-    cast,
     overload,
 )
 
+from ._append_list import bind_append_lists
+from ._assets import ASSET_REQUEST_KIND, asset_markers, reference_assets
+from ._backpressure import ACK_KIND, make_latest_value_queue
+from ._chunking import CHUNK_ACK_KIND, ChunkedSender
+from ._compression import BufferCompressor, make_compressor
 from ._file_contents import FileContents, VirtualFileContents
+from ._hot_reload import subscribe
+from ._patch import DeltaEncoder
+from ._rate_limit import make_rate_limiter
+from ._scheduling import _get_running_loop, call_later
 from ._util import (
     _ANYWIDGET_ID_KEY,
     _DEFAULT_ESM,
@@ -51,6 +60,7 @@ if TYPE_CHECKING:  # pragma: no cover
     import msgspec
     import psygnal
     import pydantic
+    import pydantic.v1
     import traitlets
     from typing_extensions import Protocol, TypeAlias, TypeGuard
 
@@ -72,10 +82,13 @@ _STATE_SETTER_NAME = "_set_anywidget_state"
 def open_comm(
     initial_state: dict,
     version: str = _PROTOCOL_VERSION,
+    compressor: BufferCompressor | None = None,
 ) -> comm.base_comm.BaseComm:
     import comm
 
     state, buffer_paths, buffers = remove_buffers(initial_state)
+    if compressor is not None:
+        compressor.compress(state, buffer_paths, buffers)
 
     return comm.create_comm(
         target_name="jupyter.widget",
@@ -104,7 +117,9 @@ _COMMS: dict[int, comm.base_comm.BaseComm] = {}
 
 
 def _get_or_create_comm(
-    obj: object, get_state: Callable[[], dict]
+    obj: object,
+    get_state: Callable[[], dict],
+    compressor: BufferCompressor | None = None,
 ) -> comm.base_comm.BaseComm:
     """Get or create a communication channel for a given object.
 
@@ -117,7 +132,7 @@ def _get_or_create_comm(
     # after object deletion, so the "risk" seems rather minimal.
     obj_id = id(obj)
     if obj_id not in _COMMS:
-        _COMMS[obj_id] = open_comm(initial_state=get_state())
+        _COMMS[obj_id] = open_comm(initial_state=get_state(), compressor=compressor)
         # when the object is garbage collected, remove the comm from the cache
         with contextlib.suppress(TypeError):
             # if the object is not weakrefable, we can't do anything
@@ -152,6 +167,29 @@ class MimeBundleDescriptor:
         useful for cases where you want to use the comm channel to send state updates
         to the front end, but don't want to display anything in the notebook
         (i.e., A DOM-less widget).  Defaults to `False`.
+    coalesce : bool | float, optional
+        If `True`, changes detected by the observer are collected and sent as a single
+        `update` message at the end of the current event-loop iteration, rather than
+        one message per changed field. A `float` is a window (in seconds): changes are
+        sent at most once per window, those made within it collected until it ends.
+        Defaults to `False` (send every change immediately), as does `0`, or there
+        being no running event loop.
+    delta : bool | Iterable[str], optional
+        If `True`, updates to list and dict values are sent as a compact patch against
+        the last value synced with the front end (falling back to the full value when
+        the patch wouldn't be smaller). An iterable of names limits this to those
+        keys. Defaults to `False`.
+    compress : bool | int | Iterable[str], optional
+        If `True`, binary buffers larger than 64 KiB are sent compressed (with
+        `deflate`), and decompressed by the front end. An `int` sets a different
+        threshold (in bytes), and an iterable of names limits compression to those
+        keys. Defaults to `False`.
+    backpressure : bool | Iterable[str], optional
+        If `True`, while the front end hasn't yet applied the last update, further
+        changes are held back, and only the latest values are sent once it has
+        (dropping intermediate values). An iterable of names limits this to those
+        keys. Useful for values updated faster than the front end can keep up
+        with. Defaults to `False`.
     **extra_state : Any, optional
         Any extra state that should be sent to the javascript view (for example,
         for the `_esm` anywidget field.)  By default, `{'_esm': _DEFAULT_ESM}` is added
@@ -174,12 +212,16 @@ class MimeBundleDescriptor:
     >>> foo
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         follow_changes: bool = True,
         autodetect_observer: bool = True,
         no_view: bool = False,
+        coalesce: bool | float = False,
+        delta: bool | Iterable[str] = False,
+        compress: bool | int | Iterable[str] = False,
+        backpressure: bool | Iterable[str] = False,
         **extra_state: object,
     ) -> None:
         extra_state.setdefault(_ESM_KEY, _DEFAULT_ESM)
@@ -188,6 +230,10 @@ class MimeBundleDescriptor:
         self._follow_changes = follow_changes
         self._autodetect_observer = autodetect_observer
         self._no_view = no_view
+        self._coalesce = coalesce
+        self._delta = delta
+        self._compress = compress
+        self._backpressure = backpressure
 
         for k, v in self._extra_state.items():
             # TODO(manzt): use := when we drop python 3.7
@@ -239,6 +285,10 @@ class MimeBundleDescriptor:
                 autodetect_observer=self._autodetect_observer,
                 extra_state=self._extra_state,
                 no_view=self._no_view,
+                coalesce=self._coalesce,
+                delta=self._delta,
+                compress=self._compress,
+                backpressure=self._backpressure,
             )
             if self._follow_changes:
                 # set up two way data binding
@@ -289,24 +339,84 @@ class ReprMimeBundle:
         useful for cases where you want to use the comm channel to send state updates
         to the front end, but don't want to display anything in the notebook
         (i.e., A DOM-less widget).  Defaults to `False`.
+    coalesce : bool | float, optional
+        If `True`, changes detected by the observer are collected and sent as a single
+        `update` message at the end of the current event-loop iteration. A `float` is
+        a window (in seconds): changes are sent at most once per window. Defaults to
+        `False`, as does `0`, or there being no running event loop.
+    delta : bool | Iterable[str], optional
+        If `True`, updates to list and dict values are sent as a compact patch against
+        the last value synced with the front end. An iterable of names limits this to
+        those keys. Defaults to `False`.
+    compress : bool | int | Iterable[str], optional
+        If `True`, binary buffers larger than 64 KiB are sent compressed. An `int`
+        sets a different threshold (in bytes), and an iterable of names limits
+        compression to those keys. Defaults to `False`.
+    backpressure : bool | Iterable[str], optional
+        If `True`, changes made while the front end is still applying the last
+        update are held back, and only their latest values sent once it has. An
+        iterable of names limits this to those keys. Defaults to `False`.
     extra_state : dict, optional
         Any extra state that should be sent to the javascript view (for example,
         for the `_esm` anywidget field.)  By default, `{'_esm': DEFAULT_ESM}` is added
         to the state.
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         obj: object,
         autodetect_observer: bool = True,
         extra_state: dict[str, object] | None = None,
         no_view: bool = False,
+        *,
+        coalesce: bool | float = False,
+        delta: bool | Iterable[str] = False,
+        compress: bool | int | Iterable[str] = False,
+        backpressure: bool | Iterable[str] = False,
     ) -> None:
         self._autodetect_observer = autodetect_observer
         self._extra_state = (extra_state or {}).copy()
         self._extra_state.setdefault(_ANYWIDGET_ID_KEY, _anywidget_id(obj))
         self._no_view = no_view
 
+        # window (in seconds) to collect changed keys for before sending them as a
+        # single update. `None` means every change is sent immediately.
+        self._coalesce_window: float | None = None
+        if coalesce is True:
+            self._coalesce_window = 0.0
+        elif coalesce:
+            self._coalesce_window = float(coalesce)
+        self._pending_keys: set[str] = set()
+        # when the pending keys were last sent (the comm opens with the full state)
+        self._last_flush = time.monotonic()
+        # keys changed inside `hold_sync`, sent when it exits
+        self._holding_sync = False
+        self._held_keys: set[str] = set()
+        self._cancel_flush: Callable[[], None] | None = None
+        # patches made inside `hold_sync` (or while coalescing), merged into the
+        # update that sends the held keys
+        self._held_patches: dict[str, list[dict]] = {}
+
+        self._delta_encoder: DeltaEncoder | None = None
+        if delta is True:
+            self._delta_encoder = DeltaEncoder()
+        elif delta is not False:
+            self._delta_encoder = DeltaEncoder(frozenset(delta))
+
+        # values last received from the front end (and not sent since), which
+        # needn't be echoed back to it
+        self._received: dict[str, object] = {}
+
+        self._compressor = make_compressor(compress)
+        self._backpressure = make_latest_value_queue(backpressure)
+        # assets the comm was opened with markers for, which the update sent
+        # right after opening it leaves out
+        self._referenced_assets: set[str] = set()
+        # sends updates with very large buffers in chunks
+        self._chunked_sender = ChunkedSender(
+            lambda msg, buffers: self._comm.send(data=msg, buffers=buffers)
+        )
+
         try:
             self._obj: Callable[[], object] = weakref.ref(obj, self._on_obj_deleted)
         except TypeError:
@@ -330,24 +440,33 @@ class ReprMimeBundle:
         for key, value in self._extra_state.items():
             if isinstance(value, (VirtualFileContents, FileContents)):
                 self._extra_state[key] = str(value)
-
-                @value.changed.connect
-                def _on_change(new_contents: str, key: str = key) -> None:
-                    self._extra_state[key] = new_contents
-                    self.send_state(key)
+                subscribe(value, key, self)
 
             self._comm = _get_or_create_comm(
                 obj=obj,
                 # When creating the comm, we need to send the current state
                 # immediately to prevent race conditions.
-                get_state=lambda: {
-                    **self._get_state(obj, include=None),
-                    **self._extra_state,
-                },
+                get_state=lambda: self._get_initial_state(obj),
+                compressor=self._compressor,
             )
 
+    def _get_initial_state(self, obj: object) -> dict:
+        """Get the full state of `obj` to open the comm with."""
+        state = {**self._get_state(obj, include=None), **self._extra_state}
+        bind_append_lists(self, obj, state)
+        if self._delta_encoder is not None:
+            # the front end starts from this state, so the first update of a key
+            # can be a patch
+            self._delta_encoder.record(state)
+        self._referenced_assets = reference_assets(state)
+        return state
+
     def _on_obj_deleted(self, ref: weakref.ReferenceType | None = None) -> None:  # noqa: ARG002
         """Called when the python object is deleted."""
+        self._pending_keys.clear()
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
         self.unsync_object_with_view()
         self._comm.close()
         # could swap out esm here for a "deleted" message, or any number of things.
@@ -361,26 +480,193 @@ class ReprMimeBundle:
             If provided, only send the state for the keys in this set.  Otherwise,
             send all state.
         """
+        self._send_state(include)
+
+    def _send_state(
+        self, include: str | Iterable[str] | None, exclude: Iterable[str] = ()
+    ) -> None:
+        """Send the state of `include` (or all state), except for `exclude`."""
         obj = self._obj()
         if obj is None:
             return  # pragma: no cover  ... the python object has been deleted
 
         if include is not None:
             include = {include} if isinstance(include, str) else set(include)
+        else:
+            # e.g. requested by a reloaded front end, which won't ack earlier chunks
+            self._chunked_sender.reset()
+        held_patches = self._take_held_patches(include)
 
         state = {**self._get_state(obj, include=include), **self._extra_state}
         if include is not None:
             # ensure that we only send the keys that were requested
             # in case the state getter returned extra keys
             state = {k: v for k, v in state.items() if k in include}
-
-        if not state:
-            return  # pragma: no cover
-
+        for key in exclude:
+            state.pop(key, None)
+        state = self._drop_echoes(state, full=include is None)
+
+        if self._backpressure is not None:
+            state = self._backpressure.hold(state, full=include is None)
+
+        if not state and not held_patches:
+            return
+
+        bind_append_lists(self, obj, state)
+        patches: dict = {}
+        if self._delta_encoder is not None:
+            state, patches = self._delta_encoder.encode(state, full=include is None)
+        patches.update(held_patches)
+        if not state and not patches:
+            return
+        self._send_update(state, patches)
+
+    def _take_held_patches(self, include: set[str] | None) -> dict:
+        """Take the held patches to send along with the state of `include`."""
+        if include is None:
+            # the full state already includes them
+            self._held_patches.clear()
+            return {}
+        if self._holding_sync or self._cancel_flush is not None:
+            return {}  # still holding them
+        patches, self._held_patches = self._held_patches, {}
+        # (the values of the keys being sent already include their patches)
+        return {key: ops for key, ops in patches.items() if key not in include}
+
+    def _drop_echoes(self, state: dict, *, full: bool) -> dict:
+        """Drop the values in `state` that the front end just sent us.
+
+        Like ipywidgets' `_property_lock`, this avoids echoing changes made in the
+        front end back to it (which doubles traffic, and makes e.g. a dragged slider
+        jitter), whenever setting them on the python object triggers a send.
+        """
+        if full:
+            self._received.clear()
+            return state
+        if not self._received:
+            return state
+        for key in list(state):
+            if key in self._received and _same_value(
+                self._received.pop(key), state[key]
+            ):
+                del state[key]
+        return state
+
+    def _send_update(self, state: dict, patches: dict) -> None:
+        """Send an `update` message with `state` and `patches` to the front end."""
+        if not getattr(self._comm, "kernel", None):
+            return
+        keys = [*state, *patches]
         state, buffer_paths, buffers = remove_buffers(state)
-        if getattr(self._comm, "kernel", None):
-            msg = {"method": "update", "state": state, "buffer_paths": buffer_paths}
-            self._comm.send(data=msg, buffers=buffers)  # type: ignore[arg-type]
+        if self._compressor is not None:
+            self._compressor.compress(state, buffer_paths, buffers)
+        msg = {"method": "update", "state": state, "buffer_paths": buffer_paths}
+        if patches:
+            msg["patches"] = patches
+        if self._backpressure is not None:
+            self._backpressure.track(msg, keys)
+        self._chunked_sender.send(msg, buffers)
+
+    def _hot_reload(self, key: str, contents: str, msg: dict) -> bool:
+        """Update `key` to the new contents of its file, sending the shared `msg`.
+
+        Returns `False` once the python object has been deleted.
+        """
+        if self._obj() is None:
+            return False
+        self._extra_state[key] = contents
+        if self._backpressure is not None:
+            # (acknowledgements are tracked per update, so `msg` can't be shared)
+            self.send_state(key)
+        elif getattr(self._comm, "kernel", None):
+            self._chunked_sender.send(msg, [])
+        return True
+
+    def _schedule_send(self, include: set[str]) -> None:
+        """Send (or queue, when coalescing) the state for keys changed in the model.
+
+        This is what the observer connections call whenever a field changes.
+        """
+        if self._holding_sync:
+            self._held_keys.update(include)
+            return
+
+        if self._coalesce_window is None or _get_running_loop() is None:
+            # (without an event loop there is nothing to coalesce with, and a timer
+            # would flush from another thread)
+            self.send_state(include)
+            return
+
+        self._pending_keys.update(include)
+        elapsed = time.monotonic() - self._last_flush
+        if self._coalesce_window and elapsed >= self._coalesce_window:
+            # flush inline, as a synchronous loop (e.g. in a notebook cell) never
+            # yields to the event loop to run the timer
+            self.flush()
+        elif self._cancel_flush is None:
+            delay = max(0.0, self._coalesce_window - elapsed)
+            self._cancel_flush = call_later(delay, self.flush)
+
+    @contextlib.contextmanager
+    def hold_sync(self) -> Iterator[None]:
+        """Hold syncing changes until the block exits, then send them as one update.
+
+        Like `ipywidgets.Widget.hold_sync`, so the front end applies all the changes
+        at once. Nested blocks send their changes when the outermost one exits.
+        """
+        if self._holding_sync:
+            yield
+            return
+        self._holding_sync = True
+        try:
+            yield
+        finally:
+            self._holding_sync = False
+            if self._held_keys or self._held_patches:
+                include, self._held_keys = self._held_keys, set()
+                self.send_state(include)
+
+    def flush(self) -> None:
+        """Immediately send any changes that are waiting to be coalesced."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        self._last_flush = time.monotonic()
+        if self._pending_keys or self._held_patches:
+            include, self._pending_keys = self._pending_keys, set()
+            self.send_state(include)
+
+    def _send_patch(
+        self,
+        key: str,
+        ops: list[dict],
+        source: object | None = None,
+    ) -> bool:
+        """Send patch operations for a single key to the front-end view.
+
+        Returns
+        -------
+        bool
+            `False` if `source` is given and is no longer the value of `key` on the
+            python object (so the caller should stop sending patches for it).
+        """
+        obj = self._obj()
+        if obj is None:
+            return False  # pragma: no cover
+        if source is not None and getattr(obj, key, None) is not source:
+            return False
+        if self._holding_sync or self._cancel_flush is not None:
+            # merged into the update that sends the held (or coalesced) changes
+            self._held_patches.setdefault(key, []).extend(ops)
+        elif getattr(self._comm, "kernel", None):
+            msg = {
+                "method": "update",
+                "state": {},
+                "buffer_paths": [],
+                "patches": {key: ops},
+            }
+            self._comm.send(data=msg, buffers=[])
+        return True
 
     def _handle_msg(self, msg: CommMessage) -> None:
         """Called when a msg is received from the front-end.
@@ -402,26 +688,44 @@ class ReprMimeBundle:
                 state = data["state"]
                 if "buffer_paths" in data:
                     put_buffers(state, data["buffer_paths"], msg["buffers"])
+                if self._delta_encoder is not None:
+                    self._delta_encoder.record(state)
+                self._received.update(state)
                 self._set_state(obj, state)
+                bind_append_lists(self, obj, state)
 
         elif data["method"] == "request_state":
             self.send_state()
 
-        # elif method == "custom":  # noqa: ERA001
-        # Handle a custom msg from the front-end.
-        # if "content" in data:
-        #     self._handle_custom_msg(data["content"], msg["buffers"])  # noqa: ERA001
+        elif data["method"] == "custom":
+            # Handle a custom msg from the front-end.
+            if "content" in data:
+                self._handle_custom_msg(data["content"], msg["buffers"])
         else:  # pragma: no cover
-            err_msg = (
+            err_msg = (  # type: ignore[unreachable]
                 f"Unrecognized method: {data['method']}.  Please report this at "
                 "https://github.com/manzt/anywidget/issues"
             )
             raise ValueError(err_msg)
 
-    # def _handle_custom_msg(self, content: object, buffers: list[memoryview]):
-    #     # TODO(manzt): handle custom callbacks  # noqa: TD003
-    #     # https://github.com/jupyter-widgets/ipywidgets/blob/6547f840edc1884c75e60386ec7fb873ba13f21c/python/ipywidgets/ipywidgets/widgets/widget.py#L662
-    #     ...
+    def _handle_custom_msg(self, content: object, buffers: list[memoryview]) -> None:  # noqa: ARG002
+        """Handle a custom msg from the front-end."""
+        if not isinstance(content, dict):
+            return
+        if content.get("kind") == CHUNK_ACK_KIND:
+            self._chunked_sender.ack()
+        elif content.get("kind") == ASSET_REQUEST_KIND:
+            keys = content.get("keys", [])
+            state = asset_markers({k: self._extra_state.get(k) for k in keys})
+            if state and getattr(self._comm, "kernel", None):
+                msg = {"method": "update", "state": state, "buffer_paths": []}
+                self._comm.send(data=msg, buffers=[])
+        elif content.get("kind") == ACK_KIND and self._backpressure is not None:
+            pending = self._backpressure.ack(content)
+            if pending:
+                self.send_state(pending)
+        # TODO(manzt): handle custom callbacks
+        # https://github.com/jupyter-widgets/ipywidgets/blob/6547f840edc1884c75e60386ec7fb873ba13f21c/python/ipywidgets/ipywidgets/widgets/widget.py#L662
 
     def __call__(self, **kwargs: Sequence[str]) -> tuple[dict, dict] | None:  # noqa: ARG002
         """Called when _repr_mimebundle_ is called on the python object."""
@@ -455,7 +759,8 @@ class ReprMimeBundle:
         if js_to_py:
             # connect changes in the view to the instance
             self._comm.on_msg(self._handle_msg)  # type: ignore[arg-type]
-            self.send_state()
+            # the assets the comm was opened with a marker for needn't be sent again
+            self._send_state(None, exclude=self._referenced_assets)
 
         if py_to_js and self._autodetect_observer:
             # connect changes in the instance to the view
@@ -468,14 +773,15 @@ class ReprMimeBundle:
                 warnings.warn("Refusing to re-sync a synced object.", stacklevel=2)
                 return
 
-            # each of these _connect_* functions receives the python object, and the
-            # send_state method.  They are responsible connect an event that calls
-            # send_state({'attr_name'}) whenever attr_name changes. If successful, they
-            # return a callable that undoes the connection when called, otherwise None.
+            # each of these _connect_* functions receives the python object, and a
+            # send_state-like callable.  They are responsible connect an event that
+            # calls send_state({'attr_name'}) whenever attr_name changes. If
+            # successful, they return a callable that undoes the connection when
+            # called, otherwise None.
 
             # check for psygnal
             for connector in (_connect_psygnal, _connect_traitlets):
-                disconnect = connector(obj, self.send_state)
+                disconnect = connector(obj, self._schedule_send)
                 if disconnect:
                     self._disconnectors.add(disconnect)
                     break
@@ -533,7 +839,7 @@ def determine_state_getter(obj: object) -> _GetState:
     if is_dataclass(obj):
         # caveat: if the dict is not JSON serializeable... you still need to
         # provide an API for the user to customize serialization
-        return lambda obj, include: asdict(obj)  # noqa: ARG005
+        return _get_dataclass_state
 
     if _is_traitlets_object(obj):
         return _get_traitlets_state
@@ -558,10 +864,48 @@ def determine_state_getter(obj: object) -> _GetState:
     raise TypeError(msg)
 
 
+def _same_value(a: object, b: object) -> bool:
+    """Whether `a` and `b` are (safely) known to be equal."""
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):  # e.g. comparing arrays
+        return False
+
+
 def _default_set_state(obj: object, state: dict) -> None:
-    """A default state setter that just sets attributes on the object."""
-    for key, val in state.items():
-        setattr(obj, key, val)
+    """A default state setter that just sets attributes on the object.
+
+    Observers are notified once all the attributes are set, so an update of many
+    keys doesn't trigger them on intermediate, inconsistent states.
+    """
+    with _hold_notifications(obj, list(state)):
+        for key, val in state.items():
+            setattr(obj, key, val)
+
+
+@contextlib.contextmanager
+def _hold_notifications(obj: object, keys: list[str]) -> Iterator[None]:
+    """Defer change notifications of `keys` on `obj` until the block exits.
+
+    Uses `hold_trait_notifications` for traitlets objects, and pauses the signals of
+    psygnal objects (which then emit, in order, on exit).
+    """
+    if len(keys) <= 1:
+        yield
+        return
+    if _is_traitlets_object(obj):
+        with obj.hold_trait_notifications():
+            yield
+        return
+    events = _get_psygnal_signal_group(obj)
+    with contextlib.ExitStack() as stack:
+        if events is not None:
+            # signals resume in reverse order of pausing
+            for key in reversed(keys):
+                paused = getattr(getattr(events, key, None), "paused", None)
+                if paused is not None:
+                    stack.enter_context(paused())
+        yield
 
 
 def determine_state_setter(obj: object) -> Callable[[object, dict], None]:
@@ -581,6 +925,45 @@ def determine_state_setter(obj: object) -> Callable[[object, dict], None]:
     return _default_set_state
 
 
+# ------------- Dataclass support --------------
+
+
+def _get_dataclass_state(obj: object, include: set[str] | None) -> Serializable:
+    """Get the state of a dataclass instance.
+
+    Unlike `dataclasses.asdict`, only the fields in `include` are read, and field
+    values are not deep-copied. Nested dataclasses are still converted to dicts.
+
+    Returns
+    -------
+    state : dict
+        A dictionary of the (requested) fields of the dataclass instance.
+    """
+    return {
+        f.name: _dataclass_field_value(getattr(obj, f.name))
+        for f in fields(obj)  # type: ignore[arg-type]
+        if include is None or f.name in include
+    }
+
+
+def _dataclass_field_value(value: object) -> object:
+    """Convert nested dataclasses in `value` to dicts, without copying otherwise.
+
+    Containers are only rebuilt if one of their items had to be converted.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        items = [_dataclass_field_value(v) for v in value]
+        if any(new is not old for new, old in zip(items, value)):
+            return items if isinstance(value, list) else tuple(items)
+    elif isinstance(value, dict):
+        converted = {k: _dataclass_field_value(v) for k, v in value.items()}
+        if any(converted[k] is not v for k, v in value.items()):
+            return converted
+    return value
+
+
 # ------------- Psygnal support --------------
 
 
@@ -614,6 +997,9 @@ def _get_psygnal_signal_group(obj: object) -> psygnal.SignalGroup | None:
 def _connect_psygnal(obj: object, send_state: Callable) -> Callable | None:
     """Check if an object has a psygnal.SignalGroup, and connect it to send_state.
 
+    Dataclass fields with `throttle_ms` or `debounce_ms` metadata (e.g.
+    `field(default=0, metadata={"throttle_ms": 50})`) are rate limited.
+
     Returns
     -------
     disconnect : Callable | None
@@ -623,13 +1009,20 @@ def _connect_psygnal(obj: object, send_state: Callable) -> Callable | None:
     events = _get_psygnal_signal_group(obj)
 
     if events is not None:
+        metadata = (
+            {f.name: f.metadata for f in fields(obj)} if is_dataclass(obj) else {}
+        )
+        limiter = make_rate_limiter(send_state, metadata)
+        send = send_state if limiter is None else limiter
 
         @events.connect
         def _on_psygnal_event(event: psygnal.EmissionInfo) -> None:
-            send_state({event.signal.name})
+            send({event.signal.name})
 
         def _disconnect() -> None:
             events.disconnect(_on_psygnal_event)
+            if limiter is not None:
+                limiter.cancel()
 
         return _disconnect
     return None
@@ -654,25 +1047,50 @@ _TRAITLETS_SYNC_FLAG = "sync"
 # state isn't being synced without opting in.
 
 
+# names of the synced traits of each traitlets.HasTraits class
+_TRAITLETS_SYNC_NAMES: weakref.WeakKeyDictionary[type, frozenset[str]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _traitlets_sync_names(obj: traitlets.HasTraits) -> frozenset[str]:
+    """Return the names of the traits of `obj` tagged with `sync=True`.
+
+    The names are cached per class. (`HasTraits.add_traits` creates a new class,
+    so traits added to an instance are picked up too.)
+    """
+    cls = type(obj)
+    names = _TRAITLETS_SYNC_NAMES.get(cls)
+    if names is None:
+        kwargs = {_TRAITLETS_SYNC_FLAG: True}
+        names = _TRAITLETS_SYNC_NAMES[cls] = frozenset(obj.trait_names(**kwargs))
+    return names
+
+
 def _get_traitlets_state(
     obj: traitlets.HasTraits,
-    include: set[str] | None,  # noqa: ARG001
+    include: set[str] | None,
 ) -> Serializable:
     """Get the state of a traitlets.HasTraits instance.
 
+    Only the synced traits in `include` are read (or all of them if `None`).
+
     Returns
     -------
     state : dict
         A dictionary of the state of the traitlets.HasTraits instance.
     """
-    kwargs = {_TRAITLETS_SYNC_FLAG: True}
-    return obj.trait_values(**kwargs)
+    names = _traitlets_sync_names(obj)
+    if include is not None:
+        names = names.intersection(include)
+    return {name: getattr(obj, name) for name in names}
 
 
 def _connect_traitlets(obj: object, send_state: Callable) -> Callable | None:
     """Check if an object is a traitlets.HasTraits, and connect it to send_state.
 
-    Only traits with tagged with `sync=True` will be synced.
+    Only traits with tagged with `sync=True` will be synced. Traits tagged with
+    `throttle_ms` or `debounce_ms` are rate limited.
 
     Returns
     -------
@@ -683,10 +1101,16 @@ def _connect_traitlets(obj: object, send_state: Callable) -> Callable | None:
     if not _is_traitlets_object(obj):
         return None
 
+    limiter = make_rate_limiter(
+        send_state,
+        {name: trait.metadata for name, trait in obj.traits(sync=True).items()},
+    )
+    send = send_state if limiter is None else limiter
+
     def _on_trait_change(change: dict) -> None:
-        send_state({change["name"]})
+        send({change["name"]})
 
-    obj.observe(_on_trait_change, names=list(obj.traits(sync=True)))
+    obj.observe(_on_trait_change, names=list(_traitlets_sync_names(obj)))
 
     obj_ref = weakref.ref(obj)
 
@@ -694,6 +1118,8 @@ def _connect_traitlets(obj: object, send_state: Callable) -> Callable | None:
         obj = obj_ref()
         if obj is not None:
             obj.unobserve(_on_trait_change)
+        if limiter is not None:
+            limiter.cancel()
 
     return _disconnect
 
@@ -708,26 +1134,48 @@ def _is_pydantic_model(obj: object) -> TypeGuard[pydantic.BaseModel]:
     -------
         `True` if the object is an instance of pydantic.BaseModel, `False` otherwise.
     """
-    pydantic = sys.modules.get("pydantic")
-    return isinstance(obj, pydantic.BaseModel) if pydantic is not None else False
+    # legacy models may also come from the `pydantic.v1` namespace of pydantic 2
+    for name in ("pydantic", "pydantic.v1"):
+        pydantic = sys.modules.get(name)
+        if pydantic is not None and isinstance(obj, pydantic.BaseModel):
+            return True
+    return False
 
 
 def _get_pydantic_state_v1(
-    obj: pydantic.BaseModel,
+    obj: pydantic.v1.BaseModel,
     include: set[str] | None,
 ) -> Serializable:
-    """Get the state of a pydantic BaseModel instance.
+    """Get the state of a pydantic (v1) BaseModel instance.
 
     To take advantage of pydantic's support for custom encoders (with json_encoders)
-    we call obj.json() here, and then cast back to a dict (which is what
-    the comm expects).
+    the values of `obj.dict()` are converted with the model's JSON encoder, as
+    `obj.json()` does, but without encoding to (and decoding from) a JSON string.
 
     Returns
     -------
     state : dict
         A dictionary copy of state from the pydantic BaseModel
     """
-    return json.loads(obj.json(include=include))
+    return _to_json_builtins(obj.dict(include=include), obj.__json_encoder__)
+
+
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _to_json_builtins(value: object, default: Callable[..., Any]) -> Serializable:
+    """Convert `value` to JSON-compatible builtins, like `json.dumps(default=...)`.
+
+    Values that aren't JSON-compatible are passed to `default`, and the result is
+    converted in turn.
+    """
+    if isinstance(value, _JSON_SCALAR_TYPES):
+        return value
+    if isinstance(value, dict):
+        return {k: _to_json_builtins(v, default) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json_builtins(v, default) for v in value]
+    return _to_json_builtins(default(value), default)
 
 
 def _get_pydantic_state_v2(
@@ -747,10 +1195,43 @@ def _is_msgspec_struct(obj: object) -> TypeGuard[msgspec.Struct]:
     return isinstance(obj, msgspec.Struct) if msgspec is not None else False
 
 
-def _get_msgspec_state(obj: msgspec.Struct, include: set[str] | None) -> Serializable:  # noqa: ARG001
-    """Get the state of a msgspec.Struct instance."""
+# binary types msgspec should leave alone, so they can be sent as binary buffers
+_MSGSPEC_BINARY_TYPES = (bytes, bytearray, memoryview)
+
+
+def _get_msgspec_state(obj: msgspec.Struct, include: set[str] | None) -> Serializable:
+    """Get the state of a msgspec.Struct instance.
+
+    Same as `msgspec.to_builtins(obj)` (fields are keyed by their encoded names,
+    and `omit_defaults` is honoured), but only the fields in `include` are
+    converted (or all of them if `None`), and binary values are kept as is (rather
+    than base64-encoded) so they are sent as binary buffers.
+    """
     import msgspec
 
-    # TODO(manzt): comm expects a dict. ideally we could serialize with msgspec
+    # The comm expects a dict (it does the JSON encoding itself), so we can't hand
+    # it bytes encoded by msgspec, but we can skip the fields that weren't requested.
     # https://github.com/manzt/anywidget/pull/64#discussion_r1128986939
-    return cast(dict, msgspec.to_builtins(obj))
+    omit_defaults = obj.__struct_config__.omit_defaults
+    state = {}
+    for field in msgspec.structs.fields(obj):
+        if include is not None and field.name not in include:
+            continue
+        value = getattr(obj, field.name)
+        if omit_defaults and _is_msgspec_default(field, value):
+            continue
+        state[field.encode_name] = msgspec.to_builtins(
+            value, builtin_types=_MSGSPEC_BINARY_TYPES
+        )
+    return state
+
+
+def _is_msgspec_default(field: msgspec.structs.FieldInfo, value: object) -> bool:
+    """Whether `value` is the default of `field` (and omitted by `omit_defaults`)."""
+    import msgspec
+
+    if field.default is not msgspec.NODEFAULT:
+        return bool(value == field.default)
+    if field.default_factory is not msgspec.NODEFAULT:
+        return bool(value == field.default_factory())
+    return False
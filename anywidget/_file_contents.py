@@ -1,19 +1,42 @@
 from __future__ import annotations
 
+import atexit
+import hashlib
 import pathlib
 import threading
 import weakref
-from collections import deque
-from typing import Iterator
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 from psygnal import Signal
 
-__all__ = ["_VIRTUAL_FILES", "FileContents", "VirtualFileContents"]
+from ._scheduling import _get_running_loop
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+__all__ = [
+    "_FILE_CONTENTS",
+    "_FILE_WATCHER",
+    "_VIRTUAL_FILES",
+    "FileContents",
+    "VirtualFileContents",
+]
+
+# How long (in seconds) a watched file must go unchanged before it's reloaded.
+# Editors (and bundlers) often write a file in several steps, which would
+# otherwise emit `changed` (and reload the front end) for each of them.
+_RELOAD_DELAY = 0.1
 
 _VIRTUAL_FILES: weakref.WeakValueDictionary[str, VirtualFileContents] = (
     weakref.WeakValueDictionary()
 )
 
+# The contents of the files referenced by widgets, by resolved path, so that all
+# the widgets (and descriptors) using a file share one cached read (and watcher).
+_FILE_CONTENTS: weakref.WeakValueDictionary[pathlib.Path, FileContents] = (
+    weakref.WeakValueDictionary()
+)
+
 
 class VirtualFileContents:
     """Stores text file contents in memory and emits a signal when it changes.
@@ -48,7 +71,8 @@ class FileContents:
     """Object that watches for file changes and emits a signal when it changes.
 
     Calling `str(obj)` on this object will always return the current contents of the
-    file (as long as the thread is running).
+    file (as long as it is being watched). Changes are debounced, and `changed` is
+    only emitted when the contents actually differ from the last version.
 
     Parameters
     ----------
@@ -66,33 +90,41 @@ class FileContents:
         if not self._path.is_file():
             msg = f"File does not exist: {self._path}"
             raise ValueError(msg)
-        self._contents: str | None = None  # cached contents, cleared on change
+        self._contents: str | None = None  # cached contents
+        self._digest: bytes | None = None  # hash of the cached contents
+        self._stat: tuple[int, int] | None = None  # (mtime, size) when cached
         self._stop_event = threading.Event()
-        self._background_thread: threading.Thread | None = None
         if start_thread:
             self.watch_in_thread()
 
+    @property
+    def path(self) -> pathlib.Path:
+        """The (absolute) path of the file."""
+        return self._path
+
     def watch_in_thread(self) -> None:
-        """Watch for file changes (and emitting signals) from a separate thread."""
-        if self._background_thread is not None:
-            return
+        """Watch for file changes (and emit signals) from a separate thread.
+
+        All files share a single thread (and a single native watcher), see
+        `_FileWatcher`.
+        """
         self._stop_event.clear()
-        self._background_thread = threading.Thread(
-            # self.watch() returns a generator, so the thread would exit
-            # immediately if we passed `target=self.watch`. The `deque`
-            # forces the thread to run until it exhausts our generator.
-            target=lambda: deque(self.watch(), maxlen=0),
-            daemon=True,
-        )
-        self._background_thread.start()
+        _FILE_WATCHER.add(self)
 
     def stop_thread(self) -> None:
-        """Stops an actively running thread if it exists."""
-        if self._background_thread is None:
-            return
+        """Stops watching for file changes from a separate thread.
+
+        Note that the `FileContents` of a widget's `_esm` or `_css` file is shared by
+        every widget (and descriptor) using that file (see `try_file_contents`), so
+        this stops hot reloading it for all of them. It also stops `watch`.
+        """
         self._stop_event.set()
-        self._background_thread.join()
-        self._background_thread = None
+        _FILE_WATCHER.remove(self)
+
+    @property
+    def _background_thread(self) -> threading.Thread | None:
+        """The (shared) thread watching for changes, if this file is watched."""
+        return _FILE_WATCHER.thread if _FILE_WATCHER.watches(self) else None
 
     def watch(self) -> Iterator[tuple[int, str]]:
         """Watch for file changes and emit changed/deleted signal events.
@@ -120,14 +152,242 @@ class FileContents:
                 if change == Change.deleted and not self._path.exists():
                     self.deleted.emit()
                     return
-                # Only getting Change.added events on macOS so we listen for either
-                if change in (Change.modified, Change.added):
-                    self._contents = None
-                    self.changed.emit(str(self))
+                if self._handle_change(change):
                     yield (change, path)
                     break
 
+    def _handle_change(self, change: int) -> bool:
+        """Reload the file (and emit `changed`) if `change` modified it.
+
+        Returns whether the file was reloaded.
+        """
+        from watchfiles import Change
+
+        # Only getting Change.added events on macOS so we listen for either
+        if change in (Change.modified, Change.added):
+            self._reload()
+            return True
+        return False
+
+    def _reload(self) -> None:
+        """Re-read the file, and emit `changed` if its contents changed."""
+        try:
+            data = self._path.read_bytes()
+        except FileNotFoundError:
+            return  # deleted in the meantime
+        digest = _digest(data)
+        if digest == self._digest:
+            return  # e.g. saved without changes, or rewritten by a formatter
+        self._contents, self._digest = _decode(data), digest
+        self._stat = None
+        self.changed.emit(self._contents)
+
+    def _is_stale(self) -> bool:
+        """Whether the file changed since it was cached, without being watched."""
+        if _FILE_WATCHER.watches(self):
+            return False  # the watcher reloads it
+        stat = _file_stat(self._path)
+        return stat is not None and stat != self._stat
+
     def __str__(self) -> str:
-        if self._contents is None:
-            self._contents = self._path.read_text(encoding="utf-8")
+        if self._contents is None or self._is_stale():
+            stat = _file_stat(self._path)
+            data = self._path.read_bytes()
+            self._contents, self._digest = _decode(data), _digest(data)
+            self._stat = stat
         return self._contents
+
+
+def _file_stat(path: pathlib.Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _decode(data: bytes) -> str:
+    """Decode the contents of a file, translating newlines (as `read_text` does)."""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+class _FileWatcher:
+    """Watches many files from a single thread, with a single native watcher.
+
+    Files are watched through their (non-recursively watched) directories, and
+    changes are dispatched to the `FileContents` of each changed file, which emit
+    their own signals. The watcher is restarted (on the same thread) when the set
+    of directories changes, and the thread exits once there's nothing to watch.
+    watchfiles itself waits for changes to settle (see `_RELOAD_DELAY`) before
+    yielding them, so files are reloaded (and emit `changed`) on that thread.
+
+    If an asyncio event loop is running when watching starts (e.g., inside a
+    Jupyter kernel), files are watched from a task on that loop instead (with
+    `watchfiles.awatch`), so the signals are emitted on the loop, in between the
+    kernel's other work, rather than from another thread.
+    """
+
+    def __init__(self) -> None:
+        # held weakly, so that contents nobody uses anymore stop being watched
+        self._files: dict[pathlib.Path, weakref.WeakSet[FileContents]] = {}
+        self._lock = threading.Lock()
+        # set to stop the current native watcher, and start another one
+        self._rewatch = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def _is_running(self) -> bool:
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        # the task dies with its loop (e.g., at the end of `asyncio.run`)
+        return (
+            self._task is not None
+            and not self._task.done()
+            and not self._task.get_loop().is_closed()
+        )
+
+    def _start(self) -> None:
+        loop = _get_running_loop()
+        if loop is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            self._task = loop.create_task(self._arun())
+
+    def add(self, contents: FileContents) -> None:
+        """Start dispatching changes of the file to `contents`."""
+        with self._lock:
+            files = self._files.setdefault(contents.path, weakref.WeakSet())
+            added = contents not in files
+            files.add(contents)
+            if not self._is_running():
+                self._start()
+            elif (
+                added and len(files) == 1 and not self._is_watched(contents.path.parent)
+            ):
+                self._rewatch.set()
+
+    def remove(self, contents: FileContents) -> None:
+        """Stop dispatching changes of the file to `contents`."""
+        with self._lock:
+            files = self._files.get(contents.path)
+            if files is None or contents not in files:
+                return
+            files.discard(contents)
+            if not files:
+                del self._files[contents.path]
+                # stops the thread if that was the last file
+                self._rewatch.set()
+
+    @property
+    def thread(self) -> threading.Thread | None:
+        """The thread watching for changes, if any."""
+        return self._thread
+
+    def close(self) -> None:
+        """Stop watching all files, and wait for the thread to exit."""
+        with self._lock:
+            self._files.clear()
+            self._rewatch.set()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=1)
+
+    def watches(self, contents: FileContents) -> bool:
+        """Whether changes of the file are dispatched to `contents`."""
+        with self._lock:
+            return contents in self._files.get(contents.path, ())
+
+    def _is_watched(self, directory: pathlib.Path) -> bool:
+        return sum(path.parent == directory for path in self._files) > 1
+
+    def _directories(self) -> list[pathlib.Path]:
+        for path in [path for path, files in self._files.items() if not files]:
+            del self._files[path]
+        return sorted({path.parent for path in self._files if path.parent.is_dir()})
+
+    def _filter(self, _: object, path: str) -> bool:
+        return pathlib.Path(path) in self._files
+
+    def _next_directories(self) -> list[pathlib.Path]:
+        """Get the directories to watch next (none to stop watching)."""
+        with self._lock:
+            directories = self._directories()
+            if not directories:
+                self._thread = self._task = None
+            self._rewatch.clear()
+            return directories
+
+    def _stopped(self) -> None:
+        """Forget the thread (or task) that is stopping, however it stopped."""
+        # (it counts as running until it returns, so no other one was started)
+        with self._lock:
+            self._thread = self._task = None
+
+    def _run(self) -> None:
+        import watchfiles
+
+        try:
+            while directories := self._next_directories():
+                for changes in watchfiles.watch(
+                    *directories,
+                    watch_filter=self._filter,
+                    stop_event=self._rewatch,
+                    recursive=False,
+                    # only yield once there have been no changes for this long,
+                    # which debounces reloads on this thread
+                    step=int(_RELOAD_DELAY * 1000),
+                ):
+                    self._dispatch(changes)
+                    if self._rewatch.is_set():
+                        break
+        finally:
+            # even if watching fails (or a `changed` handler raises), so that the
+            # next file added starts watching again
+            self._stopped()
+
+    async def _arun(self) -> None:
+        import watchfiles
+
+        try:
+            # awatch only checks `stop_event.is_set()` (from a worker thread), so
+            # the same (thread-safe) event stops it
+            while directories := self._next_directories():
+                async for changes in watchfiles.awatch(
+                    *directories,
+                    watch_filter=self._filter,
+                    stop_event=self._rewatch,
+                    recursive=False,
+                    step=int(_RELOAD_DELAY * 1000),
+                ):
+                    self._dispatch(changes)
+                    if self._rewatch.is_set():
+                        break
+        finally:
+            self._stopped()
+
+    def _dispatch(self, changes: Iterable[tuple[int, str]]) -> None:
+        from watchfiles import Change
+
+        by_path: dict[pathlib.Path, list[int]] = {}
+        for change, name in changes:
+            by_path.setdefault(pathlib.Path(name), []).append(change)
+        for path, path_changes in by_path.items():
+            with self._lock:
+                targets = list(self._files.get(path, ()))
+            for contents in targets:
+                if Change.deleted in path_changes and not path.exists():
+                    self.remove(contents)
+                    contents.deleted.emit()
+                elif Change.modified in path_changes or Change.added in path_changes:
+                    # Only getting Change.added events on macOS so we listen for either
+                    contents._reload()  # noqa: SLF001
+
+
+_FILE_WATCHER = _FileWatcher()
+# the native watcher mustn't outlive the interpreter
+atexit.register(_FILE_WATCHER.close)
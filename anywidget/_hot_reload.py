@@ -0,0 +1,78 @@
+"""Broadcasting hot-reloaded `_esm` and `_css` files to the widgets using them.
+
+Rather than every widget connecting its own callback to the `changed` signal of
+the file it uses (which keeps the widget alive, and runs one callback per widget
+on every save), each file connects a single callback, which loops over the live
+widgets using it. Widgets are held weakly, so they drop out once they are garbage
+collected, and those whose comm is closed are dropped on the next change.
+
+The `update` message for a change is built once and shared by all the widgets.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import weakref
+from typing import TYPE_CHECKING, Union
+
+from typing_extensions import Protocol
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._file_contents import FileContents, VirtualFileContents
+
+    Contents = Union[FileContents, VirtualFileContents]
+
+__all__ = ["HotReloadable", "subscribe"]
+
+
+class HotReloadable(Protocol):
+    def _hot_reload(self, key: str, contents: str, msg: dict) -> bool:
+        """Update `key` to `contents`, and send `msg` to the front end.
+
+        Returns `False` if the widget is closed (and should be dropped).
+        """
+
+
+# The live widgets using each file, by the key they use it for.
+_SUBSCRIBERS: weakref.WeakKeyDictionary[
+    Contents, dict[str, weakref.WeakSet[HotReloadable]]
+] = weakref.WeakKeyDictionary()
+# files may change on another thread than the one widgets are created on
+_LOCK = threading.Lock()
+
+
+def subscribe(contents: Contents, key: str, widget: HotReloadable) -> None:
+    """Hot-reload `key` of `widget` whenever `contents` changes.
+
+    Parameters
+    ----------
+    contents : FileContents | VirtualFileContents
+        The file used for `key`.
+    key : str
+        The key of the widget's state holding the file's contents.
+    widget : HotReloadable
+        The widget (held weakly).
+    """
+    with _LOCK:
+        subscribers = _SUBSCRIBERS.get(contents)
+        if subscribers is None:
+            subscribers = _SUBSCRIBERS[contents] = {}
+            # (the callback only holds a weak reference to `contents`)
+            contents.changed.connect(
+                functools.partial(_broadcast, weakref.ref(contents))
+            )
+        subscribers.setdefault(key, weakref.WeakSet()).add(widget)
+
+
+def _broadcast(ref: weakref.ReferenceType[Contents], new_contents: str) -> None:
+    contents = ref()
+    with _LOCK:
+        subscribers = _SUBSCRIBERS.get(contents) if contents is not None else None
+        targets = {key: list(widgets) for key, widgets in (subscribers or {}).items()}
+    for key, widgets in targets.items():
+        msg = {"method": "update", "state": {key: new_contents}, "buffer_paths": []}
+        for widget in widgets:
+            if not widget._hot_reload(key, new_contents, msg) and subscribers:  # noqa: SLF001
+                with _LOCK:
+                    subscribers[key].discard(widget)
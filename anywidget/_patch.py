@@ -0,0 +1,278 @@
+"""Delta encoding of state updates.
+
+Rather than re-sending the entire value of a large list or dict whenever it
+changes, the value is diffed against the last snapshot that was synced with the
+front end, and only a compact list of patch operations is sent.
+
+Each operation is a dict with an `op`, a `path` (a list of dict keys and list
+indices, relative to the value of the key being patched), and usually a `value`:
+
+- `{"op": "replace", "path": [...], "value": v}`: set the value at `path`.
+- `{"op": "add", "path": [..., k], "value": v}`: add a new key `k` to a dict.
+- `{"op": "remove", "path": [..., k]}`: delete key `k` from a dict.
+- `{"op": "extend", "path": [...], "value": [...]}`: append items to a list.
+- `{"op": "truncate", "path": [...], "value": n}`: shorten a list to `n` items.
+- `{"op": "concat", "path": [...], "value": s}`: append text to a string.
+
+The front end applies these in order (see `apply_patch` in
+`packages/anywidget/src/widget.js`).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import itertools
+import json
+from typing import Any, Container, Iterator, cast
+
+from ._append_list import AppendList
+
+__all__ = ["DeltaEncoder", "diff"]
+
+# Give up on diffing (and send the full value) past this many operations.
+_MAX_PATCH_OPS = 1024
+
+_SEQUENCE_TYPES = (list, tuple)
+
+
+class _PatchTooLargeError(Exception):
+    """Raised internally to abort a diff that exceeds the op budget."""
+
+
+def diff(old: object, new: object, max_ops: int = _MAX_PATCH_OPS) -> list[dict] | None:
+    """Compute the patch operations that turn `old` into `new`.
+
+    Parameters
+    ----------
+    old : object
+        The previous (JSON-compatible) value.
+    new : object
+        The new (JSON-compatible) value.
+    max_ops : int, optional
+        The maximum number of operations to emit before giving up.
+
+    Returns
+    -------
+    ops : list[dict] | None
+        The list of patch operations (empty if the values are equal), or `None` if
+        more than `max_ops` operations would be needed.
+    """
+    ops: list[dict] = []
+    try:
+        _diff(old, new, [], ops, max_ops)
+    except _PatchTooLargeError:
+        return None
+    return ops
+
+
+def _emit(ops: list[dict], op: dict, max_ops: int) -> None:
+    ops.append(op)
+    if len(ops) > max_ops:
+        raise _PatchTooLargeError
+
+
+def _diff(old: Any, new: Any, path: list, ops: list[dict], max_ops: int) -> None:  # noqa: ANN401
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                _emit(ops, {"op": "remove", "path": [*path, key]}, max_ops)
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, [*path, key], ops, max_ops)
+            else:
+                _emit(ops, {"op": "add", "path": [*path, key], "value": value}, max_ops)
+    elif isinstance(old, _SEQUENCE_TYPES) and isinstance(new, _SEQUENCE_TYPES):
+        _diff_sequence(old, new, path, ops, max_ops)
+    elif _is_appended_text(old, new):
+        _emit(ops, {"op": "concat", "path": path, "value": new[len(old) :]}, max_ops)
+    elif type(old) is not type(new) or old != new:
+        _emit(ops, {"op": "replace", "path": path, "value": new}, max_ops)
+
+
+def _diff_sequence(
+    old: list | tuple,
+    new: list | tuple,
+    path: list,
+    ops: list[dict],
+    max_ops: int,
+) -> None:
+    common = min(len(old), len(new))
+    for i in range(common):
+        _diff(old[i], new[i], [*path, i], ops, max_ops)
+    if len(new) > common:
+        _emit(
+            ops,
+            {"op": "extend", "path": path, "value": list(new[common:])},
+            max_ops,
+        )
+    elif len(old) > common:
+        _emit(ops, {"op": "truncate", "path": path, "value": common}, max_ops)
+
+
+def _is_appended_text(old: object, new: object) -> bool:
+    """Whether `new` is the string `old` with some text appended."""
+    return (
+        isinstance(old, str)
+        and isinstance(new, str)
+        and len(new) > len(old)
+        and new.startswith(old)
+    )
+
+
+def _encoded_size(value: object) -> int | None:
+    """Return the size of `value` as JSON, or `None` if it is not JSON-serializable."""
+    try:
+        return len(json.dumps(value, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _exceeds(value: object, size: int) -> bool:
+    """Whether `value` takes (roughly) more than `size` characters as JSON.
+
+    Rather than serializing `value`, its size is estimated while walking it, and
+    the walk stops as soon as `size` is exceeded, so the cost is bounded by `size`
+    rather than by the size of `value`.
+    """
+    total = 0
+    stack: list[Iterator] = [iter((value,))]
+    while stack:
+        item = next(stack[-1], _DONE)
+        if item is _DONE:
+            stack.pop()
+            continue
+        if isinstance(item, dict):
+            # braces, and a colon and comma per entry
+            total += 2 * len(item) + 1
+            stack.append(itertools.chain.from_iterable(item.items()))
+        elif isinstance(item, _SEQUENCE_TYPES):
+            total += len(item) + 1
+            stack.append(iter(item))
+        elif isinstance(item, str):
+            total += len(item) + 2
+        else:
+            # (`repr` is as long as the JSON of numbers, booleans and `None`)
+            total += len(repr(item))
+        if total > size:
+            return True
+    return False
+
+
+_DONE = object()
+
+
+def _appended_items(old: object, new: object) -> list | None:
+    """Return the items appended to the list `old` to make `new`.
+
+    Returns `None` unless that's all that changed. The common prefix is compared
+    with `==` (at C speed), which is much cheaper than a full `diff`.
+    """
+    if not isinstance(old, list) or type(new) is not list or len(new) < len(old):
+        return None
+    try:
+        same = new[: len(old)] == old
+    except (TypeError, ValueError):
+        return None  # e.g. NumPy arrays, which can't be compared with `==`
+    return new[len(old) :] if same else None
+
+
+class DeltaEncoder:
+    """Remembers the last synced value of some keys and encodes updates as patches.
+
+    Parameters
+    ----------
+    keys : Container[str] | None
+        The keys to delta-encode. If `None`, every key holding a list or dict is
+        delta-encoded.
+    """
+
+    def __init__(self, keys: Container[str] | None = None) -> None:
+        self._keys = keys
+        self._snapshots: dict[str, object] = {}
+
+    def _tracks(self, key: str, value: object) -> bool:
+        if self._keys is not None and key not in self._keys:
+            return False
+        # AppendLists sync their own changes, so a snapshot would go stale
+        return isinstance(value, (dict, list, tuple)) and not isinstance(
+            value, AppendList
+        )
+
+    def record(self, state: dict) -> None:
+        """Remember `state` as the value currently held by the front end."""
+        for key, value in state.items():
+            self._record(key, value)
+
+    def _record(self, key: str, value: object) -> None:
+        self._snapshots.pop(key, None)
+        if self._tracks(key, value):
+            with contextlib.suppress(TypeError):
+                # (values holding e.g. memoryviews can't be copied)
+                self._snapshots[key] = copy.deepcopy(value)
+
+    def encode(self, state: dict, full: bool = False) -> tuple[dict, dict]:
+        """Split `state` into keys sent in full and keys sent as patches.
+
+        Parameters
+        ----------
+        state : dict
+            The state about to be sent to the front end.
+        full : bool, optional
+            If `True`, send every key in full (e.g. when the front end requested
+            the entire state), only updating the snapshots.
+
+        Returns
+        -------
+        state, patches : tuple[dict, dict]
+            The state to send as usual, and a mapping of key to patch operations.
+            Keys whose value did not change since the last snapshot are dropped.
+        """
+        patches: dict[str, list[dict]] = {}
+        for key, value in state.items():
+            ops = None
+            if not full and key in self._snapshots and self._tracks(key, value):
+                ops = self._patch(key, value)
+            if ops is None:
+                self._record(key, value)
+            else:
+                patches[key] = ops
+        if patches:
+            state = {k: v for k, v in state.items() if k not in patches}
+            patches = {k: ops for k, ops in patches.items() if ops}
+        return state, patches
+
+    def _patch(self, key: str, value: object) -> list[dict] | None:
+        """Diff `value` against the snapshot of `key`, and update the snapshot.
+
+        Returns `None` if `value` should be sent in full instead.
+        """
+        old = self._snapshots[key]
+        ops: list[dict] | None
+        appended = _appended_items(old, value)
+        if appended is not None:
+            # only copy the new items into the snapshot, rather than all of them
+            ops = [{"op": "extend", "path": [], "value": appended}] if appended else []
+            if ops and not _is_smaller(ops, value):
+                return None
+            try:
+                cast("list", old).extend(copy.deepcopy(appended))
+            except TypeError:
+                return None
+            return ops
+        try:
+            ops = diff(old, value)
+        except (TypeError, ValueError):
+            # e.g. NumPy arrays, which can't be compared with `!=`
+            return None
+        if ops is None or (ops and not _is_smaller(ops, value)):
+            return None
+        self._record(key, value)
+        return ops
+
+
+def _is_smaller(ops: list[dict], value: object) -> bool:
+    """Whether sending `ops` is a win over sending `value` in full."""
+    patch_size = _encoded_size(ops)
+    # (binary data isn't supported in patches)
+    return patch_size is not None and _exceeds(value, patch_size)
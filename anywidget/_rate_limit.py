@@ -0,0 +1,151 @@
+"""Per-key rate limiting of outbound syncs.
+
+Keys can be rate limited with metadata on the trait or field that holds them:
+
+- `throttle_ms`: send at most once per interval. The first change is sent
+  immediately, and changes during the interval are sent (with the latest value)
+  when it ends.
+- `debounce_ms`: send once changes have stopped for the interval.
+
+Either way, the latest value is always eventually sent (trailing edge), since
+the callback re-reads the current value when it's finally called.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable, Mapping
+
+from ._scheduling import call_later
+
+__all__ = ["RateLimiter", "make_rate_limiter"]
+
+THROTTLE_KEY = "throttle_ms"
+DEBOUNCE_KEY = "debounce_ms"
+
+
+class RateLimiter:
+    """Rate-limits calls of `send` for some keys.
+
+    Parameters
+    ----------
+    send : Callable[[set[str]], None]
+        Sends the state of the given keys.
+    throttle : Mapping[str, float]
+        The minimum interval (in seconds) between sends, per key.
+    debounce : Mapping[str, float]
+        The interval (in seconds) without changes to wait for before sending, per
+        key.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[set[str]], None],
+        throttle: Mapping[str, float],
+        debounce: Mapping[str, float],
+    ) -> None:
+        self._send = send
+        self._throttle = throttle
+        self._debounce = debounce
+        self._last_sent: dict[str, float] = {}
+        # the pending (trailing) send of each key: (token, cancel)
+        self._timers: dict[str, tuple[object, Callable[[], None]]] = {}
+        # timers may fire on another thread
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._throttle or key in self._debounce
+
+    def __call__(self, keys: Iterable[str]) -> None:
+        """Send `keys` now, or later if they are rate limited."""
+        send_now = set()
+        with self._lock:
+            for key in keys:
+                if key in self._debounce:
+                    if not self._schedule(key, self._debounce[key]):
+                        send_now.add(key)
+                elif key in self._throttle:
+                    last = self._last_sent.get(key)
+                    now = time.monotonic()
+                    wait = 0.0 if last is None else last + self._throttle[key] - now
+                    if wait > 0:
+                        if key in self._timers:
+                            continue  # the trailing send will pick up this change
+                        if self._schedule(key, wait):
+                            continue
+                    else:
+                        # the interval is up, even if the trailing send hasn't
+                        # run yet (e.g. a loop that doesn't yield to the event
+                        # loop), so send inline
+                        self._unschedule(key)
+                    self._last_sent[key] = now
+                    send_now.add(key)
+                else:
+                    send_now.add(key)
+        if send_now:
+            self._send(send_now)
+
+    def _schedule(self, key: str, delay: float) -> bool:
+        """Schedule the trailing send of `key`.
+
+        Returns `False` if it could not be deferred, and should be sent now.
+        """
+        self._unschedule(key)
+        token = object()
+        cancel = call_later(delay, lambda: self._fire(key, token))
+        if cancel is None:
+            return False
+        self._timers[key] = (token, cancel)
+        return True
+
+    def _unschedule(self, key: str) -> None:
+        pending = self._timers.pop(key, None)
+        if pending is not None:
+            pending[1]()
+
+    def _fire(self, key: str, token: object) -> None:
+        with self._lock:
+            if self._timers.get(key, (None,))[0] is not token:
+                return  # cancelled, or rescheduled
+            del self._timers[key]
+            self._last_sent[key] = time.monotonic()
+        self._send({key})
+
+    def cancel(self) -> None:
+        """Cancel all pending sends."""
+        with self._lock:
+            timers, self._timers = self._timers, {}
+        for _, cancel in timers.values():
+            cancel()
+
+
+def make_rate_limiter(
+    send: Callable[[set[str]], None],
+    metadata: Mapping[str, Mapping[str, object]],
+) -> RateLimiter | None:
+    """Create a `RateLimiter` from the metadata of each key.
+
+    Parameters
+    ----------
+    send : Callable[[set[str]], None]
+        Sends the state of the given keys.
+    metadata : Mapping[str, Mapping[str, object]]
+        The metadata of each key (e.g. of a trait, or dataclass field), which may
+        include `throttle_ms` or `debounce_ms`.
+
+    Returns
+    -------
+    limiter : RateLimiter | None
+        The rate limiter, or `None` if no key is rate limited.
+    """
+    throttle: dict[str, float] = {}
+    debounce: dict[str, float] = {}
+    for key, meta in metadata.items():
+        for option, limits in ((THROTTLE_KEY, throttle), (DEBOUNCE_KEY, debounce)):
+            interval = meta.get(option)
+            if interval is not None:
+                limits[key] = float(interval) / 1000  # type: ignore[arg-type]
+    if not throttle and not debounce:
+        return None
+    return RateLimiter(send, throttle, debounce)
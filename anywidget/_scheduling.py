@@ -0,0 +1,57 @@
+"""Helpers for deferring work until later in the kernel's event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Callable
+
+__all__ = ["call_later"]
+
+
+def _get_running_loop() -> asyncio.AbstractEventLoop | None:
+    """Return the running asyncio event loop, or `None` if there isn't one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def call_later(
+    delay: float,
+    callback: Callable[[], None],
+) -> Callable[[], None] | None:
+    """Schedule `callback` to run after `delay` seconds.
+
+    Inside a Jupyter kernel (or any other running asyncio loop) the callback is
+    scheduled on the loop, so a `delay` of `0` means "at the end of the current
+    event-loop iteration". Without a running loop, a positive `delay` falls back
+    to a daemon timer thread.
+
+    Parameters
+    ----------
+    delay : float
+        Number of seconds to wait before calling `callback`.
+    callback : Callable[[], None]
+        The function to call.
+
+    Returns
+    -------
+    cancel : Callable[[], None] | None
+        A callable that cancels the scheduled call, or `None` if the call could
+        not be deferred (no running loop and `delay <= 0`). In that case the
+        caller is responsible for running `callback` itself.
+    """
+    loop = _get_running_loop()
+    if loop is not None:
+        if delay <= 0:
+            return loop.call_soon(callback).cancel
+        return loop.call_later(delay, callback).cancel
+
+    if delay <= 0:
+        return None
+
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+    return timer.cancel
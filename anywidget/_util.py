@@ -5,11 +5,22 @@ import pathlib
 import re
 import sys
 from functools import lru_cache
-from typing import Any
+from typing import Any, Iterator
 
-from ._file_contents import _VIRTUAL_FILES, FileContents, VirtualFileContents
+from ._file_contents import (
+    _FILE_CONTENTS,
+    _VIRTUAL_FILES,
+    FileContents,
+    VirtualFileContents,
+)
 
 _BINARY_TYPES = (memoryview, bytearray, bytes)
+# types that are never checked for the buffer protocol
+_JSON_TYPES = (str, int, float, bool, type(None))
+_SCALAR_TYPES = frozenset(_JSON_TYPES)
+_CONTAINER_TYPES = (dict, list, tuple)
+# marks an object sent along with the dtype/shape of its (binary) `buffer`
+_NDARRAY_KIND = "anywidget-ndarray"
 _WIDGET_MIME_TYPE = "application/vnd.jupyter.widget-view+json"
 _PROTOCOL_VERSION_MAJOR = 2
 _PROTOCOL_VERSION_MINOR = 1
@@ -31,72 +42,201 @@ function render(view) {
 export default { render };
 """
 
+
+def _buffer_dtype(view: memoryview) -> str | None:
+    """Return the typed-array friendly name of the element type of `view`.
+
+    Returns `None` for formats that don't map onto a JS typed array (e.g.
+    big-endian or structured data).
+    """
+    fmt = view.format
+    if fmt[:1] in {"@", "=", "<"}:
+        fmt = fmt[1:]
+    bits = view.itemsize * 8
+    if len(fmt) != 1:
+        return None
+    if fmt in "bhilq":
+        return f"int{bits}"
+    if fmt in "BHILQ":
+        return f"uint{bits}"
+    if fmt in "efd":
+        return f"float{bits}"
+    if fmt == "?":
+        return "bool"
+    return None
+
+
+def _pack_buffer(obj: object) -> tuple[dict | None, memoryview] | None:
+    """Get the binary data of a buffer-protocol object, like a NumPy array.
+
+    Returns
+    -------
+    packed : tuple[dict | None, memoryview] | None
+        An `anywidget-ndarray` marker holding the dtype and shape of the data (or
+        `None` if the element type isn't supported by typed arrays), and a flat byte
+        view of the data. The view is zero-copy unless the data isn't contiguous.
+        `None` if `obj` doesn't support the buffer protocol, or can't export its
+        element type (e.g. NumPy datetime and object arrays).
+    """
+    try:
+        view = memoryview(obj)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+    if "O" in view.format:
+        # (object pointers, not data)
+        return None
+    dtype = _buffer_dtype(view)
+    marker = (
+        {"kind": _NDARRAY_KIND, "dtype": dtype, "shape": list(view.shape or ())}
+        if dtype is not None
+        else None
+    )
+    if view.nbytes == 0:
+        return marker, memoryview(b"")
+    if not view.c_contiguous:
+        # e.g. a transposed or strided array, which needs copying into C order
+        return marker, memoryview(view.tobytes())
+    return marker, view.cast("B")
+
+
+def _find_buffer(value: object) -> tuple[dict | None, object] | None:
+    """Return the (marker, buffer) to send for `value`, or `None` if it isn't binary.
+
+    Binary types are sent as is (without a marker), and other objects supporting the
+    buffer protocol as described by `_pack_buffer`. Scalars (e.g. `np.int64(5)`),
+    which also support the buffer protocol, are left to be sent as JSON.
+    """
+    if isinstance(value, _BINARY_TYPES):
+        return None, value
+    if isinstance(value, _JSON_TYPES):
+        return None
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(value, numpy.generic):
+        return None
+    packed = _pack_buffer(value)
+    if packed is None or memoryview(value).ndim == 0:  # type: ignore[arg-type]
+        return None
+    return packed
+
+
+def buffer_to_json(value: object) -> object:
+    """Prepare a buffer-protocol object (e.g. a NumPy array) to be sent as binary.
+
+    Returns the `anywidget-ndarray` marker for `value`, with its flat byte view as the
+    `buffer`, which `remove_buffers` (or ipywidgets) then sends as a binary buffer.
+    Buffers nested in dicts, lists and tuples are prepared too (copying just the
+    containers holding them), and other values are returned unchanged.
+    """
+    if isinstance(value, (dict, list, tuple)):
+        items = [(key, item, buffer_to_json(item)) for key, item in _iter_items(value)]
+        if all(new is item for _, item, new in items):
+            return value
+        if isinstance(value, dict):
+            return {key: new for key, _, new in items}
+        return [new for _, _, new in items]
+    found = _find_buffer(value)
+    if found is None:
+        return value
+    marker, buffer = found
+    return buffer if marker is None else {**marker, "buffer": buffer}
+
+
 # next 3 functions vendored with modifications from ipywidgets
 # BSD-3-Clause
 # Copyright (c) 2015 Project Jupyter Contributors
 # https://github.com/jupyter-widgets/ipywidgets/blob/7325e5952efb71bd69692b2d7ed815646c0ac521/python/ipywidgets/ipywidgets/widgets/widget.py
 
 
-def _separate_buffers(  # noqa: C901, PLR0912
-    substate: object,
-    path: list,
-    buffer_paths: list,
-    buffers: list,
-) -> object:
-    """For internal, see _remove_buffers.
+def _iter_items(container: dict | list | tuple) -> Iterator[tuple[Any, Any]]:
+    if isinstance(container, dict):
+        return iter(container.items())
+    return enumerate(container)
+
+
+def _separate_buffers(state: object, buffer_paths: list, buffers: list) -> object:
+    """For internal, see remove_buffers.
+
+    Removes binary types from dicts and lists, but keeps track of their paths. Any
+    part of the dict/list that needs modification is cloned, so the original stays
+    untouched. E.g., `{'x': {'ar': ar}, 'y': [ar2, ar3]}`, where ar/ar2/ar3 are
+    binary types, results in `{'x': {}, 'y': [None, None]}`, `[ar, ar2, ar3]`, and
+    `[['x', 'ar'], ['y', 0], ['y', 1]]`. Instead of removing elements from lists,
+    they are replaced with `None`, making it easier to put the buffers back on the
+    JS side.
 
-    remove binary types from dicts and lists, but keep track of their paths any part of
-    the dict/list that needs modification will be cloned, so the original stays
-    untouched e.g. {'x': {'ar': ar}, 'y': [ar2, ar3]}, where ar/ar2/ar3 are binary types
-    will result in {'x': {}, 'y': [None, None]}, [ar, ar2, ar3], [['x', 'ar'], ['y', 0],
-    ['y', 1]] instead of removing elements from the list, this will make replacing the
-    buffers on the js side much easier
+    The state is walked iteratively, so deeply nested data can't exhaust the
+    recursion limit, and paths are only built for the binary values found.
 
     Raises
     ------
     TypeError
-        If substate is not a list or dict.
+        If state is not a list or dict.
     """
-    _t = type(substate)
-    _sub: list | dict | None = None
-    if isinstance(substate, (list, tuple)):
-        for i, v in enumerate(substate):
-            if isinstance(v, _BINARY_TYPES):
-                if _sub is None:
-                    _sub = list(substate)  # shallow clone list/tuple
-                _sub[i] = None
-                buffers.append(v)
-                buffer_paths.append([*path, i])
-            elif isinstance(v, (dict, list, tuple)):
-                _v = _separate_buffers(v, [*path, i], buffer_paths, buffers)
-                if v is not _v:  # only assign when value changed
-                    if _sub is None:
-                        _sub = list(substate)  # shallow clone list/tuple
-                    _sub[i] = _v
-    elif isinstance(substate, dict):
-        for k, v in substate.items():
-            if isinstance(v, _BINARY_TYPES):
-                if _sub is None:
-                    _sub = dict(substate)  # shallow clone dict
-                del _sub[k]
-                buffers.append(v)
-                buffer_paths.append([*path, k])
-            elif isinstance(v, (dict, list, tuple)):
-                _v = _separate_buffers(v, [*path, k], buffer_paths, buffers)
-                if v is not _v:  # only assign when value changed
-                    if _sub is None:
-                        _sub = dict(substate)  # shallow clone dict
-                    _sub[k] = _v
-    else:  # pragma: no cover
-        msg = f"expected state to be a list or dict, not {substate!r}"
+    if not isinstance(state, _CONTAINER_TYPES):  # pragma: no cover
+        msg = f"expected state to be a list or dict, not {state!r}"
         raise TypeError(msg)
-    return _sub if _sub is not None else substate
+
+    # The containers from the root to the one being visited, as
+    # [container, key in parent, items iterator, clone (or None)] entries.
+    stack: list[list] = [[state, None, _iter_items(state), None]]
+    while stack:
+        entry = stack[-1]
+        for key, value in entry[2]:
+            cls = type(value)
+            if cls in _SCALAR_TYPES:
+                continue
+            if cls is dict or cls is list or isinstance(value, _CONTAINER_TYPES):
+                # visit the child, then resume with the rest of this container
+                stack.append([value, key, _iter_items(value), None])
+                break
+            found = _find_buffer(value)
+            if found is None:
+                continue
+            marker, buffer = found
+            clone = _clone_ancestors(stack)
+            path = [e[1] for e in stack[1:]]
+            path.append(key)
+            if marker is not None:
+                clone[key] = marker
+                path.append("buffer")
+            elif isinstance(clone, dict):
+                del clone[key]
+            else:
+                clone[key] = None
+            buffers.append(buffer)
+            buffer_paths.append(path)
+        else:
+            stack.pop()
+            if not stack:
+                return state if entry[3] is None else entry[3]
+    return state  # pragma: no cover
+
+
+def _clone_ancestors(stack: list[list]) -> Any:  # noqa: ANN401
+    """Shallow clone the containers on `stack`, returning the innermost clone.
+
+    Each clone replaces the original in its parent's clone. Since all ancestors are
+    cloned along with a container, only the uncloned tail of the stack needs work.
+    """
+    start = len(stack)
+    while start > 0 and stack[start - 1][3] is None:
+        start -= 1
+    for i in range(start, len(stack)):
+        container = stack[i][0]
+        clone = dict(container) if isinstance(container, dict) else list(container)
+        stack[i][3] = clone
+        if i > 0:
+            stack[i - 1][3][stack[i][1]] = clone
+    return stack[-1][3]
 
 
 def remove_buffers(state: object) -> tuple[Any, list[list], list[memoryview]]:
     """Return (state_without_buffers, buffer_paths, buffers) for binary message parts.
 
     A binary message part is a memoryview, bytearray, or python 3 bytes object.
+    Other objects supporting the buffer protocol (e.g. NumPy arrays) are sent
+    without copying as well, replaced by an `anywidget-ndarray` marker holding
+    their dtype and shape (so the front end can rebuild a typed array).
 
     Examples
     --------
@@ -120,7 +260,7 @@ def remove_buffers(state: object) -> tuple[Any, list[list], list[memoryview]]:
     """
     buffer_paths: list = []
     buffers: list[memoryview] = []
-    state = _separate_buffers(state, [], buffer_paths, buffers)
+    state = _separate_buffers(state, buffer_paths, buffers)
     return state, buffer_paths, buffers
 
 
@@ -274,14 +414,19 @@ def try_file_contents(x: object) -> FileContents | VirtualFileContents | None:
     if maybe_path is None:
         return None
 
-    path = maybe_path
+    path = maybe_path.resolve()
     if not path.is_file():
         msg = f"File not found: {path}"
         raise FileNotFoundError(msg)
-    return FileContents(
-        path=path,
-        start_thread=_should_start_thread(path),
-    )
+
+    # Share one (cached, and watched) FileContents between all users of a file.
+    # (so stopping its watcher stops it for all of them)
+    contents = _FILE_CONTENTS.get(path)
+    if contents is None:
+        contents = _FILE_CONTENTS[path] = FileContents(path=path, start_thread=False)
+    if _should_start_thread(path):
+        contents.watch_in_thread()
+    return contents
 
 
 def repr_mimebundle(
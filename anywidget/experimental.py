@@ -7,6 +7,7 @@ import typing
 
 import psygnal
 
+from ._append_list import AppendList, AppendListTrait
 from ._descriptor import MimeBundleDescriptor
 
 if typing.TYPE_CHECKING:  # pragma: no cover
@@ -14,7 +15,13 @@ if typing.TYPE_CHECKING:  # pragma: no cover
 
     from ._protocols import WidgetBase
 
-__all__ = ["MimeBundleDescriptor", "dataclass", "widget"]
+__all__ = [
+    "AppendList",
+    "AppendListTrait",
+    "MimeBundleDescriptor",
+    "dataclass",
+    "widget",
+]
 
 T = typing.TypeVar("T")
 
@@ -85,6 +92,10 @@ def dataclass(
     dataclass_kwargs : object
         Additional keyword arguments to pass to the dataclass decorator.
 
+    Fields with `throttle_ms` or `debounce_ms` metadata are rate limited when synced
+    to the front end, e.g. `value: float = field(default=0, metadata={"throttle_ms":
+    50})` is sent at most every 50ms (always ending with the latest value).
+
     Returns
     -------
     type
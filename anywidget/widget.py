@@ -2,17 +2,30 @@
 
 from __future__ import annotations
 
+import time
+from typing import Callable, Iterable, cast
+
 import ipywidgets
 import traitlets.traitlets as t
 
+from ._assets import ASSET_REQUEST_KIND, asset_markers, reference_assets
+from ._backpressure import ACK_KIND, LatestValueQueue
+from ._chunking import CHUNK_ACK_KIND, ChunkedSender
+from ._compression import DEFAULT_COMPRESS_THRESHOLD, BufferCompressor
 from ._file_contents import FileContents, VirtualFileContents
+from ._hot_reload import subscribe
+from ._patch import DeltaEncoder
+from ._rate_limit import RateLimiter, make_rate_limiter
+from ._scheduling import call_later
 from ._util import (
     _ANYWIDGET_ID_KEY,
     _CSS_KEY,
     _DEFAULT_ESM,
     _ESM_KEY,
+    buffer_to_json,
     enable_custom_widget_manager_once,
     in_colab,
+    remove_buffers,
     repr_mimebundle,
     try_file_contents,
 )
@@ -21,9 +34,35 @@ from .experimental import _collect_anywidget_commands, _register_anywidget_comma
 
 _PLAIN_TEXT_MAX_LEN = 110
 
+# Streamed text chunks are batched and sent (at most) once per animation frame.
+_STREAM_FLUSH_INTERVAL = 1 / 60
+
 
 class AnyWidget(ipywidgets.DOMWidget):  # type: ignore [misc]
-    """Main AnyWidget base class."""
+    """Main AnyWidget base class.
+
+    Synced list and dict traits tagged with `delta=True` (e.g.
+    `t.List().tag(sync=True, delta=True)`) are sent as compact patches against the
+    value last synced with the front end, rather than in full on every change.
+
+    Traits holding NumPy arrays (or other objects supporting the buffer protocol) are
+    sent as binary buffers without copying, along with their dtype and shape.
+
+    Binary buffers of traits tagged with `compress=True` (or `compress=<threshold in
+    bytes>`) are sent compressed when they are larger than 64 KiB (or the threshold)
+    in updates. The initial state is always sent uncompressed.
+
+    Changes of traits tagged with `backpressure=True` are held back while the front
+    end is still applying the last update of them, and only their latest values are
+    sent once it has, so fast-changing values never make the front end lag behind.
+
+    Syncs of traits tagged with `throttle_ms=<interval>` are sent at most once per
+    interval, and those of traits tagged with `debounce_ms=<interval>` once changes
+    have stopped for the interval. Either way, the latest value is always sent.
+
+    Updates carrying very large buffers are sent in bounded chunks, which the front
+    end acknowledges (so only a few are in flight at a time) and reassembles.
+    """
 
     _model_name = t.Unicode("AnyModel").tag(sync=True)
     _model_module = t.Unicode("anywidget").tag(sync=True)
@@ -33,19 +72,60 @@ class AnyWidget(ipywidgets.DOMWidget):  # type: ignore [misc]
     _view_module = t.Unicode("anywidget").tag(sync=True)
     _view_module_version = t.Unicode(_ANYWIDGET_SEMVER_VERSION).tag(sync=True)
 
+    _delta_encoder: DeltaEncoder | None = None
+    _compressor: BufferCompressor | None = None
+    _chunked_sender: ChunkedSender | None = None
+    _backpressure: LatestValueQueue | None = None
+    _rate_limiter: RateLimiter | None = None
+    # whether the comm is being opened (see `open`)
+    _opening = False
+
     def __init__(self, *args: object, **kwargs: object) -> None:
         if in_colab():
             enable_custom_widget_manager_once()
 
+        self._chunked_sender = ChunkedSender(
+            lambda msg, buffers: super(AnyWidget, self)._send(msg, buffers=buffers)
+        )
+
+        # text chunks streamed with `stream_text`, waiting to be sent
+        self._text_chunks: dict[str, list[str]] = {}
+        self._cancel_text_flush: Callable[[], None] | None = None
+        self._last_text_flush = float("-inf")
+        # patches made inside `hold_sync`, merged into the update it sends on exit
+        self._held_patches: dict[str, list[dict]] = {}
+
+        delta_keys = self.trait_names(sync=True, delta=True)
+        self._delta_encoder = (
+            DeltaEncoder(frozenset(delta_keys)) if delta_keys else None
+        )
+        compress = self.traits(sync=True, compress=lambda v: v not in (None, False))
+        if compress:
+            self._compressor = BufferCompressor(
+                {
+                    name: DEFAULT_COMPRESS_THRESHOLD
+                    if trait.metadata["compress"] is True
+                    else int(trait.metadata["compress"])
+                    for name, trait in compress.items()
+                }
+            )
+
+        backpressure_keys = self.trait_names(sync=True, backpressure=True)
+        if backpressure_keys:
+            self._backpressure = LatestValueQueue(frozenset(backpressure_keys))
+
+        self._rate_limiter = make_rate_limiter(
+            self.send_state,
+            {name: trait.metadata for name, trait in self.traits(sync=True).items()},
+        )
+
         anywidget_traits = {}
         for key in (_ESM_KEY, _CSS_KEY):
             if hasattr(self, key) and not self.has_trait(key):
                 value = getattr(self, key)
                 anywidget_traits[key] = t.Unicode(str(value)).tag(sync=True)
                 if isinstance(value, (VirtualFileContents, FileContents)):
-                    value.changed.connect(
-                        lambda new_contents, key=key: setattr(self, key, new_contents),
-                    )
+                    subscribe(value, key, self)
 
         # show default _esm if not defined
         if not hasattr(self, _ESM_KEY):
@@ -73,6 +153,264 @@ class AnyWidget(ipywidgets.DOMWidget):  # type: ignore [misc]
                 setattr(cls, key, file_contents)
         _collect_anywidget_commands(cls)
 
+    def open(self) -> None:
+        """Open a comm to the front end, referencing assets it already has by hash."""
+        self._opening = True
+        try:
+            super().open()
+        finally:
+            self._opening = False
+
+    def get_state(
+        self, key: str | Iterable[str] | None = None, drop_defaults: bool = False
+    ) -> dict:
+        """Get the widget state, or a piece of it (see `ipywidgets.Widget`)."""
+        state: dict = super().get_state(key=key, drop_defaults=drop_defaults)
+        if self._opening:
+            if self._delta_encoder is not None:
+                # the front end starts from this state, so the first update of a
+                # key can be a patch
+                self._delta_encoder.record(state)
+            reference_assets(state)
+        return state
+
+    def send_state(self, key: str | Iterable[str] | None = None) -> None:
+        """Send the widget state, or a piece of it, to the front end.
+
+        Same as `ipywidgets.Widget.send_state`, but delta-encodes `delta=True` traits,
+        compresses the buffers of `compress=True` traits, and holds back changes of
+        `backpressure=True` traits until the front end has applied the last ones.
+        """
+        if self._text_chunks:
+            # the full value already includes any streamed chunks
+            self._drop_text_chunks(key)
+        if key is None and self._chunked_sender is not None:
+            # e.g. requested by a reloaded front end, which won't ack earlier chunks
+            self._chunked_sender.reset()
+        held_patches = self._take_held_patches(key)
+
+        if (
+            self._delta_encoder is None
+            and self._compressor is None
+            and self._backpressure is None
+            and not held_patches
+        ):
+            super().send_state(key=key)
+            return
+
+        state = self.get_state(key=key)
+        if self._backpressure is not None and getattr(self.comm, "kernel", None):
+            state = self._backpressure.hold(state, full=key is None)
+        if self._property_lock:
+            # keep the lock up to date with the front-end values (as ipywidgets does)
+            for name, value in state.items():
+                if name in self._property_lock:
+                    self._property_lock[name] = value
+
+        patches: dict = {}
+        if self._delta_encoder is not None:
+            state, patches = self._delta_encoder.encode(state, full=key is None)
+        patches.update(held_patches)
+        if not state and not patches:
+            return
+        self._send_update(state, patches)
+
+    def _take_held_patches(self, key: str | Iterable[str] | None) -> dict:
+        """Take the patches held by `hold_sync`, to send with the state of `key`."""
+        if key is None:
+            # the full state already includes them
+            self._held_patches.clear()
+            return {}
+        if self._holding_sync or not self._held_patches:
+            return {}
+        patches, self._held_patches = self._held_patches, {}
+        # (the values of the keys being sent already include their patches)
+        keys = {key} if isinstance(key, str) else set(key)
+        return {name: ops for name, ops in patches.items() if name not in keys}
+
+    def _send_update(self, state: dict, patches: dict) -> None:
+        """Send an `update` message with `state` and `patches` to the front end."""
+        keys = [*state, *patches]
+        state, buffer_paths, buffers = remove_buffers(state)
+        if self._compressor is not None:
+            self._compressor.compress(state, buffer_paths, buffers)
+        msg = {"method": "update", "state": state, "buffer_paths": buffer_paths}
+        if patches:
+            msg["patches"] = patches
+        if self._backpressure is not None and getattr(self.comm, "kernel", None):
+            self._backpressure.track(msg, keys)
+        self._send(msg, buffers=buffers)
+
+    def _hot_reload(self, key: str, contents: str, msg: dict) -> bool:
+        """Update `key` to the new contents of its file, sending the shared `msg`.
+
+        Returns `False` once the widget is closed.
+        """
+        if self.comm is None:
+            return False
+        # the change is sent as `msg`, which is shared by all the widgets using
+        # the file, rather than serialized for each of them
+        with self._lock_property(**{key: contents}):
+            setattr(self, key, contents)
+        self._send(msg, buffers=[])
+        return True
+
+    def _send_patch(
+        self,
+        key: str,
+        ops: list[dict],
+        source: object | None = None,
+    ) -> bool:
+        """Send patch operations for a single trait to the front end.
+
+        Returns
+        -------
+        bool
+            `False` if `source` is given and is no longer the value of the trait
+            (so the caller should stop sending patches for it).
+        """
+        if source is not None and getattr(self, key, None) is not source:
+            return False
+        if self._holding_sync:
+            # merged into the update `hold_sync` sends on exit
+            self._held_patches.setdefault(key, []).extend(ops)
+            return True
+        msg = {
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {key: ops},
+        }
+        self._send(msg, buffers=[])
+        return True
+
+    def stream_text(self, name: str, chunk: str) -> None:
+        """Append `chunk` to the string trait `name`, sending only the new text.
+
+        Re-assigning a growing string (e.g. `widget.text += token`) re-sends the
+        entire value on every change. Instead, the chunks passed to `stream_text`
+        are batched and sent to the front end (at most) once per animation frame
+        as a single `concat` patch, whether or not the loop streaming them yields
+        to the event loop. The Python-side value is updated immediately, and
+        observers of the trait are notified as usual.
+
+        Parameters
+        ----------
+        name : str
+            The name of a synced `Unicode` trait.
+        chunk : str
+            The text to append.
+
+        Examples
+        --------
+        >>> for token in llm.stream(prompt):
+        ...     widget.stream_text("response", token)
+        """
+        value = getattr(self, name)
+        if not isinstance(value, str):
+            msg = f"Cannot stream text to {name!r}, which holds {type(value)!r}."
+            raise TypeError(msg)
+        if not chunk:
+            return
+        if not self.trait_metadata(name, "sync"):
+            setattr(self, name, value + chunk)
+            return
+
+        new = value + chunk
+        # lock the property (as when syncing a front-end update) so the full
+        # value isn't sent, keeping any locks that are already held
+        lock: dict[str, object] = self._property_lock  # type: ignore[has-type]
+        self._property_lock = {**lock, name: new}
+        try:
+            setattr(self, name, new)
+        finally:
+            self._property_lock = lock
+
+        self._text_chunks.setdefault(name, []).append(chunk)
+        elapsed = time.monotonic() - self._last_text_flush
+        if elapsed >= _STREAM_FLUSH_INTERVAL:
+            # flush inline, so a synchronous loop (which never yields to the
+            # event loop) still streams
+            self._flush_text_chunks()
+        elif self._cancel_text_flush is None:
+            # send the trailing chunks once the interval is up
+            self._cancel_text_flush = call_later(
+                _STREAM_FLUSH_INTERVAL - elapsed, self._flush_text_chunks
+            )
+            if self._cancel_text_flush is None:
+                self._flush_text_chunks()
+
+    def _drop_text_chunks(self, key: str | Iterable[str] | None) -> None:
+        """Forget the streamed text chunks of `key` (or all keys) waiting to be sent."""
+        keys = [key] if isinstance(key, str) else key
+        for name in list(self._text_chunks) if keys is None else keys:
+            self._text_chunks.pop(name, None)
+
+    def _flush_text_chunks(self) -> None:
+        """Send the text chunks streamed since the last flush."""
+        if self._cancel_text_flush is not None:
+            self._cancel_text_flush()
+            self._cancel_text_flush = None
+        self._last_text_flush = time.monotonic()
+        chunks, self._text_chunks = self._text_chunks, {}
+        if self.comm is None:
+            return
+        for name, pending in chunks.items():
+            self._send_patch(
+                name, [{"op": "concat", "path": [], "value": "".join(pending)}]
+            )
+
+    def _send(self, msg: dict, buffers: list | None = None) -> None:
+        """Send a message to the front end, chunking very large buffers."""
+        comm = self.comm
+        if self._chunked_sender is None or getattr(comm, "kernel", None) is None:
+            # (ipywidgets drops the message if there's no front end to send it to)
+            super()._send(msg, buffers=buffers)
+            return
+        self._chunked_sender.send(msg, buffers or [])
+
+    def _handle_custom_msg(self, content: object, buffers: list[memoryview]) -> None:
+        """Handle a custom message from the front end."""
+        kind = content.get("kind") if isinstance(content, dict) else None
+        if kind == CHUNK_ACK_KIND:
+            if self._chunked_sender is not None:
+                self._chunked_sender.ack()
+        elif kind == ASSET_REQUEST_KIND:
+            keys = cast("dict", content).get("keys", [])
+            state = asset_markers({k: getattr(self, k, None) for k in keys})
+            if state:
+                self._send(
+                    {"method": "update", "state": state, "buffer_paths": []},
+                    buffers=[],
+                )
+        elif kind == ACK_KIND:
+            if self._backpressure is not None:
+                pending = self._backpressure.ack(cast("dict", content))
+                if pending:
+                    self.send_state(pending)
+        else:
+            super()._handle_custom_msg(content, buffers)
+
+    def _should_send_property(self, key: str, value: object) -> bool:
+        """Check the property lock (as ipywidgets does), then rate-limit `key`."""
+        if not super()._should_send_property(key, value):
+            return False
+        if self._rate_limiter is not None and key in self._rate_limiter:
+            self._rate_limiter({key})
+            return False
+        return True
+
+    def set_state(self, sync_data: dict) -> None:
+        """Called when a state is received from the front end."""
+        if self._delta_encoder is not None:
+            self._delta_encoder.record(sync_data)
+        super().set_state(sync_data)
+
+    @staticmethod
+    def _trait_to_json(x: object, self: AnyWidget) -> object:  # noqa: ARG004
+        """Convert a trait value to JSON, sending buffer-protocol objects as binary."""
+        return buffer_to_json(x)
+
     def __repr__(self) -> str:
         """Return a simple repr to avoid expensive ipywidgets trait serialization."""
         return object.__repr__(self)
@@ -0,0 +1,58 @@
+"""Compare the update throughput of pydantic v1 and v2 models.
+
+Measures how long it takes `MimeBundleDescriptor` to collect the state of a
+model, both for a single-field update (the common case) and for the full state.
+The previous v1 implementation (a round-trip through `obj.json()`) is included
+for reference.
+
+Usage: python benchmarks/pydantic_state.py (with anywidget installed)
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import timeit
+
+import pydantic
+import pydantic.v1
+from anywidget._descriptor import determine_state_getter
+
+N_FIELDS = 20
+N_ROWS = 1_000
+NUMBER = 1_000
+
+
+def _fields() -> dict:
+    fields: dict = {f"field_{i}": (int, i) for i in range(N_FIELDS)}
+    fields["created"] = (dt.datetime, dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc))
+    fields["rows"] = (list, [{"x": i, "y": float(i)} for i in range(N_ROWS)])
+    return fields
+
+
+V1Model = pydantic.v1.create_model("V1Model", **_fields())
+V2Model = pydantic.create_model("V2Model", **_fields())
+
+
+def _json_round_trip(obj: pydantic.v1.BaseModel, include: set[str] | None) -> dict:
+    return json.loads(obj.json(include=include))  # type: ignore[no-any-return]
+
+
+def main() -> None:
+    """Run the benchmark and print updates per second."""
+    v1, v2 = V1Model(), V2Model()
+    cases = {
+        "v1 (json round-trip)": (_json_round_trip, v1),
+        "v1": (determine_state_getter(v1), v1),
+        "v2": (determine_state_getter(v2), v2),
+    }
+    for include in ({"field_0"}, None):
+        label = "single field" if include else "full state"
+        print(f"{label}:")
+        for name, (get_state, obj) in cases.items():
+            seconds = timeit.timeit(lambda: get_state(obj, include), number=NUMBER)  # noqa: B023
+            print(f"  {name:<22} {NUMBER / seconds:>12,.0f} updates/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark `remove_buffers` on large, nested states.
+
+Compares anywidget's `remove_buffers` with the recursive implementation from
+ipywidgets (which anywidget's was originally vendored from), for a pure-JSON state
+with 100k nested elements, and the same state with a few binary buffers mixed in.
+
+Usage: python benchmarks/remove_buffers.py (with anywidget installed)
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from anywidget._util import remove_buffers
+from ipywidgets.widgets.widget import _remove_buffers as ipywidgets_remove_buffers
+
+N_ROWS = 100_000
+NUMBER = 10
+
+
+def _json_state() -> dict:
+    return {
+        "rows": [
+            {"id": i, "label": f"row {i}", "point": [i, i * 0.5], "tags": {"a": True}}
+            for i in range(N_ROWS)
+        ],
+    }
+
+
+def _binary_state() -> dict:
+    state = _json_state()
+    for i in range(0, N_ROWS, N_ROWS // 10):
+        state["rows"][i]["data"] = memoryview(bytes(1024))
+    return state
+
+
+def main() -> None:
+    """Run the benchmark and print the time per call."""
+    implementations = {
+        "ipywidgets": ipywidgets_remove_buffers,
+        "anywidget": remove_buffers,
+    }
+    for label, state in (("pure JSON", _json_state()), ("binary", _binary_state())):
+        print(f"{label} ({N_ROWS:,} rows):")
+        for name, fn in implementations.items():
+            seconds = timeit.timeit(lambda: fn(state), number=NUMBER) / NUMBER  # noqa: B023
+            print(f"  {name:<12} {seconds * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import * as baseManager from "@jupyter-widgets/base-manager";
 import { page, userEvent } from "@vitest/browser/context";
 import { afterEach, expect, it } from "vitest";
 
-import create_anywidget from "../src/widget.js";
+import create_anywidget, { unpack_buffers } from "../src/widget.js";
 
 let anywidget = create_anywidget(widgets);
 let num_comms = 0;
@@ -269,3 +269,227 @@ export default { render };
 		globalThis.getComputedStyle(view.el).getPropertyValue("background-color"),
 	).toMatchInlineSnapshot(`"rgb(255, 0, 0)"`);
 });
+
+it("applies delta-encoded patches from the kernel", async () => {
+	let widget_manager = new Manager();
+	let rows = [{ id: 0 }, { id: 1 }];
+	let model = await createWidget({
+		widget_manager,
+		esm: _esm,
+		state: { rows, meta: { count: 2 }, text: "Hello" },
+	});
+	// @ts-expect-error - Partial comm message
+	await model._handle_comm_msg({
+		content: {
+			data: {
+				method: "update",
+				state: {},
+				buffer_paths: [],
+				patches: {
+					rows: [{ op: "extend", path: [], value: [{ id: 2 }] }],
+					meta: [{ op: "replace", path: ["count"], value: 3 }],
+					text: [{ op: "concat", path: [], value: ", world" }],
+				},
+			},
+		},
+		buffers: [],
+	});
+	expect(model.get("rows")).toEqual([{ id: 0 }, { id: 1 }, { id: 2 }]);
+	expect(model.get("rows")[0]).toBe(rows[0]);
+	expect(rows).toHaveLength(2);
+	expect(model.get("meta")).toEqual({ count: 3 });
+	expect(model.get("text")).toBe("Hello, world");
+});
+
+it("rebuilds typed arrays from ndarray buffers sent by the kernel", async () => {
+	let widget_manager = new Manager();
+	let model = await createWidget({ widget_manager, esm: _esm, state: {} });
+	let data = new Float64Array([1, 2, 3, 4, 5, 6]);
+	// @ts-expect-error - Partial comm message
+	await model._handle_comm_msg({
+		content: {
+			data: {
+				method: "update",
+				state: {
+					values: { kind: "anywidget-ndarray", dtype: "float64", shape: [2, 3] },
+				},
+				buffer_paths: [["values", "buffer"]],
+			},
+		},
+		buffers: [new DataView(data.buffer)],
+	});
+	let values = model.get("values");
+	expect(values.dtype).toBe("float64");
+	expect(values.shape).toEqual([2, 3]);
+	expect(values.data).toBeInstanceOf(Float64Array);
+	expect(Array.from(values.data)).toEqual([1, 2, 3, 4, 5, 6]);
+});
+
+it("doesn't walk into class instances when unpacking buffers", async () => {
+	class Node {
+		kind = "anywidget-ndarray";
+		self: Node = this;
+	}
+	let node = new Node();
+	let state = await unpack_buffers({ node, list: [node], plain: { node } });
+	expect(state.node).toBe(node);
+	expect(state.list).toEqual([node]);
+	expect((state.plain as { node: Node }).node).toBe(node);
+});
+
+it("decompresses buffers compressed by the kernel", async () => {
+	let widget_manager = new Manager();
+	let model = await createWidget({ widget_manager, esm: _esm, state: {} });
+	let data = new Float64Array([1, 2, 3]);
+	let stream = new Blob([data]).stream().pipeThrough(
+		new CompressionStream("deflate"),
+	);
+	let compressed = await new Response(stream).arrayBuffer();
+	// @ts-expect-error - Partial comm message
+	await model._handle_comm_msg({
+		content: {
+			data: {
+				method: "update",
+				state: {
+					image: { kind: "anywidget-compressed", codec: "deflate" },
+					values: {
+						kind: "anywidget-ndarray",
+						dtype: "float64",
+						shape: [3],
+						buffer: { kind: "anywidget-compressed", codec: "deflate" },
+					},
+				},
+				buffer_paths: [
+					["image", "buffer"],
+					["values", "buffer", "buffer"],
+				],
+			},
+		},
+		buffers: [new DataView(compressed), new DataView(compressed)],
+	});
+	expect(new Uint8Array(model.get("image").buffer)).toEqual(
+		new Uint8Array(data.buffer),
+	);
+	expect(Array.from(model.get("values").data)).toEqual([1, 2, 3]);
+});
+
+it("reassembles buffers sent in chunks by the kernel", async () => {
+	let widget_manager = new Manager();
+	let model = await createWidget({ widget_manager, esm: _esm, state: {} });
+	let sent: Array<unknown> = [];
+	model.send = (content: unknown) => void sent.push(content);
+	let update = model._handle_comm_msg({
+		content: {
+			data: {
+				method: "update",
+				state: { small: null },
+				buffer_paths: [["small"], ["large"]],
+				transfer: { id: "t0", chunks: [null, 2] },
+			},
+		},
+		buffers: [new DataView(new Uint8Array([1]).buffer)],
+		// @ts-expect-error - Partial comm message
+	});
+	for (let [seq, chunk] of [[0, [2, 3]], [1, [4]]] as const) {
+		// @ts-expect-error - Partial comm message
+		await model._handle_comm_msg({
+			content: {
+				data: {
+					method: "custom",
+					content: { kind: "anywidget-chunk", id: "t0", seq },
+				},
+			},
+			buffers: [new DataView(new Uint8Array(chunk).buffer)],
+		});
+	}
+	await update;
+	await model.state_change;
+	expect(sent).toEqual([
+		{ kind: "anywidget-chunk-ack", id: "t0", seq: 0 },
+		{ kind: "anywidget-chunk-ack", id: "t0", seq: 1 },
+	]);
+	expect(new Uint8Array(model.get("small").buffer)).toEqual(new Uint8Array([1]));
+	expect(new Uint8Array(model.get("large").buffer)).toEqual(
+		new Uint8Array([2, 3, 4]),
+	);
+});
+
+it("acknowledges updates once applied when asked to", async () => {
+	let widget_manager = new Manager();
+	let model = await createWidget({ widget_manager, esm: _esm, state: {} });
+	let sent: Array<unknown> = [];
+	model.send = (content: unknown) => void sent.push(content);
+	// @ts-expect-error - Partial comm message
+	await model._handle_comm_msg({
+		content: {
+			data: { method: "update", state: { value: 1 }, buffer_paths: [], ack: 3 },
+		},
+		buffers: [],
+	});
+	await Promise.resolve();
+	expect(model.get("value")).toBe(1);
+	expect(sent).toEqual([{ kind: "anywidget-ack", seq: 3 }]);
+});
+
+it("shares assets sent by hash across models", async () => {
+	let widget_manager = new Manager();
+	let asset = { kind: "anywidget-asset", hash: "esm-test-hash" };
+	let first = await createWidget({
+		widget_manager,
+		esm: _esm,
+		state: { _esm: { ...asset, source: _esm } },
+	});
+	let second = await createWidget({
+		widget_manager,
+		esm: _esm,
+		state: { _esm: asset },
+	});
+	expect(first.get("_esm")).toBe(_esm);
+	expect(second.get("_esm")).toBe(_esm);
+});
+
+it("imports identical ESM sources once", async () => {
+	let widget_manager = new Manager();
+	let esm = `\
+globalThis.__anywidget_imports = (globalThis.__anywidget_imports ?? 0) + 1;
+function render({ model, el }) {
+	el.innerText = "shared " + model.get("value");
+}
+export default { render };
+`;
+	for (let value of [1, 2]) {
+		let model = await createWidget({ widget_manager, esm, state: { value } });
+		let view = await widget_manager.create_view(model);
+		document.body.appendChild(view.el);
+	}
+	await expect.element(page.getByText("shared 1")).toBeInTheDocument();
+	await expect.element(page.getByText("shared 2")).toBeInTheDocument();
+	// @ts-expect-error - Set by the widget module
+	expect(globalThis.__anywidget_imports).toBe(1);
+});
+
+it("shares styles between models, and removes them with the last one", async () => {
+	let widget_manager = new Manager();
+	let esm = `\
+function render({ model, el }) {
+	el.classList.add("shared-style-test");
+	el.innerText = "styled " + model.get("value");
+}
+export default { render };
+`;
+	let css = ".shared-style-test { background-color: lightgreen }";
+	let before = document.adoptedStyleSheets.length;
+	let models = [];
+	for (let value of [1, 2]) {
+		let model = await createWidget({ widget_manager, esm, css, state: { value } });
+		let view = await widget_manager.create_view(model);
+		document.body.appendChild(view.el);
+		models.push(model);
+	}
+	await expect.element(page.getByText("styled 2")).toBeInTheDocument();
+	expect(document.adoptedStyleSheets.length).toBe(before + 1);
+	await models[0].close();
+	expect(document.adoptedStyleSheets.length).toBe(before + 1);
+	await models[1].close();
+	expect(document.adoptedStyleSheets.length).toBe(before);
+});
@@ -40,79 +40,164 @@ function is_href(str) {
 
 /**
  * @param {string} href
- * @param {string} anywidget_id
- * @returns {Promise<void>}
- */
-async function load_css_href(href, anywidget_id) {
-	/** @type {HTMLLinkElement | null} */
-	let prev = document.querySelector(`link[id='${anywidget_id}']`);
-
-	// Adapted from https://github.com/vitejs/vite/blob/d59e1acc2efc0307488364e9f2fad528ec57f204/packages/vite/src/client/client.ts#L185-L201
-	// Swaps out old styles with new, but avoids flash of unstyled content.
-	// No need to await the load since we already have styles applied.
-	if (prev) {
-		let newLink = /** @type {HTMLLinkElement} */ (prev.cloneNode());
-		newLink.href = href;
-		newLink.addEventListener("load", () => prev?.remove());
-		newLink.addEventListener("error", () => prev?.remove());
-		prev.after(newLink);
-		return;
-	}
-
-	return new Promise((resolve) => {
-		let link = Object.assign(document.createElement("link"), {
-			rel: "stylesheet",
-			href,
-			onload: resolve,
-		});
-		document.head.appendChild(link);
+ * @returns {{ node: HTMLLinkElement, loaded: Promise<void> }}
+ */
+function create_css_link(href) {
+	let node = Object.assign(document.createElement("link"), {
+		rel: "stylesheet",
+		href,
 	});
+	/** @type {Promise<void>} */
+	let loaded = new Promise((resolve) => {
+		node.addEventListener("load", () => resolve());
+		node.addEventListener("error", () => resolve());
+	});
+	document.head.appendChild(node);
+	return { node, loaded };
 }
 
+/**
+ * Whether stylesheets can be constructed and adopted by the document, which
+ * avoids parsing the CSS into (and recalculating styles for) a DOM node.
+ */
+let CONSTRUCTABLE_STYLESHEETS =
+	typeof CSSStyleSheet !== "undefined" &&
+	"replaceSync" in CSSStyleSheet.prototype &&
+	"adoptedStyleSheets" in Document.prototype;
+
 /**
  * @param {string} css_text
- * @param {string} anywidget_id
- * @returns {void}
- */
-function load_css_text(css_text, anywidget_id) {
-	/** @type {HTMLStyleElement | null} */
-	let prev = document.querySelector(`style[id='${anywidget_id}']`);
-	if (prev) {
-		// replace instead of creating a new DOM node
-		prev.textContent = css_text;
-		return;
+ * @returns {{ sheet?: CSSStyleSheet, node?: HTMLStyleElement }}
+ */
+function create_css_sheet(css_text) {
+	// `@import` rules are not allowed in constructed stylesheets
+	if (CONSTRUCTABLE_STYLESHEETS && !css_text.includes("@import")) {
+		let sheet = new CSSStyleSheet();
+		sheet.replaceSync(css_text);
+		document.adoptedStyleSheets = [...document.adoptedStyleSheets, sheet];
+		return { sheet };
 	}
-	let style = Object.assign(document.createElement("style"), {
-		id: anywidget_id,
+	let node = Object.assign(document.createElement("style"), {
 		type: "text/css",
 	});
-	style.appendChild(document.createTextNode(css_text));
-	document.head.appendChild(style);
+	node.appendChild(document.createTextNode(css_text));
+	document.head.appendChild(node);
+	return { node };
 }
 
 /**
+ * @typedef StyleEntry
+ * @property {number} refs
+ * @property {Promise<void>} loaded
+ * @property {CSSStyleSheet} [sheet]
+ * @property {HTMLStyleElement | HTMLLinkElement} [node]
+ */
+
+/**
+ * The styles added to the document, shared by all the models using them.
+ *
+ * Keyed by the CSS text (or URL) itself, which the `Map` hashes, and counting
+ * the models using each one, so styles are removed with the last of them.
+ *
+ * @type {Map<string, StyleEntry>}
+ */
+let STYLES = new Map();
+
+/**
+ * Adds CSS (text, or a stylesheet URL) to the document, unless another model
+ * already did.
+ *
  * @param {string | undefined} css
- * @param {string} anywidget_id
- * @returns {Promise<void>}
+ * @returns {{ loaded: Promise<void>, release: () => void }}
  */
-async function load_css(css, anywidget_id) {
-	if (!css || !anywidget_id) return;
-	if (is_href(css)) return load_css_href(css, anywidget_id);
-	return load_css_text(css, anywidget_id);
+function load_css(css) {
+	if (typeof css !== "string" || !css) {
+		return { loaded: Promise.resolve(), release: () => {} };
+	}
+	let entry = STYLES.get(css);
+	if (!entry) {
+		entry = is_href(css)
+			? { refs: 0, ...create_css_link(css) }
+			: { refs: 0, loaded: Promise.resolve(), ...create_css_sheet(css) };
+		STYLES.set(css, entry);
+	}
+	entry.refs += 1;
+	let released = false;
+	return {
+		loaded: entry.loaded,
+		release() {
+			if (released) return;
+			released = true;
+			release_css(css);
+		},
+	};
+}
+
+/** @param {string} css */
+function release_css(css) {
+	let entry = STYLES.get(css);
+	if (!entry || --entry.refs > 0) return;
+	STYLES.delete(css);
+	let { sheet, node } = entry;
+	if (sheet) {
+		document.adoptedStyleSheets = document.adoptedStyleSheets.filter(
+			(s) => s !== sheet,
+		);
+	}
+	node?.remove();
 }
 
 /**
  * @param {string} esm
  * @returns {Promise<AnyWidgetModule>}
  */
-async function load_esm(esm) {
+async function import_esm(esm) {
 	if (is_href(esm)) {
 		return await import(/* webpackIgnore: true */ /* @vite-ignore */ esm);
 	}
 	let url = URL.createObjectURL(new Blob([esm], { type: "text/javascript" }));
-	let mod = await import(/* webpackIgnore: true */ /* @vite-ignore */ url);
-	URL.revokeObjectURL(url);
-	return mod;
+	try {
+		return await import(/* webpackIgnore: true */ /* @vite-ignore */ url);
+	} finally {
+		URL.revokeObjectURL(url);
+	}
+}
+
+/**
+ * Modules imported from ESM sources, shared by all the models using them.
+ *
+ * Keyed by the source itself (which the `Map` hashes), so distinct sources can
+ * never collide. Entries count the models using them, and are dropped once
+ * unused, so modules replaced by HMR updates (or only used by closed models) can
+ * be garbage collected, and failed imports retried.
+ *
+ * @type {Map<string, { module: Promise<AnyWidgetModule>, refs: number }>}
+ */
+let MODULES = new Map();
+
+/**
+ * Imports an ESM source once, sharing the module with other models using the
+ * same source. Call `release_esm` once the module is no longer used.
+ *
+ * @param {string} esm
+ * @returns {Promise<AnyWidgetModule>}
+ */
+function load_esm(esm) {
+	let entry = MODULES.get(esm);
+	if (!entry) {
+		entry = { module: import_esm(esm), refs: 0 };
+		MODULES.set(esm, entry);
+	}
+	entry.refs += 1;
+	return entry.module;
+}
+
+/** @param {string} esm */
+function release_esm(esm) {
+	let entry = MODULES.get(esm);
+	if (entry && --entry.refs <= 0) {
+		MODULES.delete(esm);
+	}
 }
 
 /** @param {string} anywidget_id */
@@ -342,6 +427,289 @@ function observe(model, name, { signal }) {
 	return get;
 }
 
+/**
+ * @typedef PatchOp
+ * @property {"replace" | "add" | "remove" | "extend" | "truncate" | "concat"} op
+ * @property {Array<string | number>} path
+ * @property {any} [value]
+ */
+
+/**
+ * Applies delta-encoded patch operations (see `anywidget/_patch.py`) to a value.
+ *
+ * The input is never mutated. Containers along each op's path are shallow-copied
+ * once per patch, so unchanged branches keep their identity and the result is a
+ * new reference (which is what Backbone needs to detect the change).
+ *
+ * @param {unknown} value
+ * @param {Array<PatchOp>} ops
+ * @returns {unknown}
+ */
+export function apply_patch(value, ops) {
+	/** @type {WeakSet<object>} */
+	let copies = new WeakSet();
+	/** @param {any} obj */
+	let own = (obj) => {
+		if (copies.has(obj)) return obj;
+		let copy = Array.isArray(obj) ? obj.slice() : { ...obj };
+		copies.add(copy);
+		return copy;
+	};
+	/** @type {Record<string | number, any>} */
+	let root = { value };
+	for (let op of ops) {
+		let path = ["value", ...op.path];
+		let parent = root;
+		for (let key of path.slice(0, -1)) {
+			parent[key] = own(parent[key]);
+			parent = parent[key];
+		}
+		let key = path[path.length - 1];
+		switch (op.op) {
+			case "remove":
+				delete parent[key];
+				break;
+			case "extend":
+				parent[key] = own(parent[key]);
+				for (let item of op.value) parent[key].push(item);
+				break;
+			case "truncate":
+				parent[key] = own(parent[key]);
+				parent[key].length = op.value;
+				break;
+			case "concat":
+				parent[key] = (parent[key] ?? "") + op.value;
+				break;
+			default:
+				parent[key] = op.value;
+		}
+	}
+	return root.value;
+}
+
+/** Typed array constructors for the dtypes of `anywidget-ndarray` markers. */
+let TYPED_ARRAYS = {
+	bool: Uint8Array,
+	int8: Int8Array,
+	uint8: Uint8Array,
+	int16: Int16Array,
+	uint16: Uint16Array,
+	int32: Int32Array,
+	uint32: Uint32Array,
+	int64: BigInt64Array,
+	uint64: BigUint64Array,
+	// @ts-expect-error - Float16Array is not available everywhere (yet)
+	float16: globalThis.Float16Array,
+	float32: Float32Array,
+	float64: Float64Array,
+};
+
+/**
+ * @typedef NDArray
+ * @property {string} dtype
+ * @property {Array<number>} shape
+ * @property {ArrayBufferView} data
+ */
+
+/**
+ * @typedef Transfer
+ * @property {Array<DataView | ArrayBuffer>} chunks
+ * @property {number} received
+ * @property {number} total
+ * @property {Promise<Array<DataView | ArrayBuffer>>} done
+ * @property {(chunks: Array<DataView | ArrayBuffer>) => void} resolve
+ */
+
+/**
+ * Reassembles the buffers of an update sent with chunked buffers.
+ *
+ * @param {Array<DataView | ArrayBuffer>} inline - The buffers sent with the update.
+ * @param {Array<number | null>} counts - The number of chunks of each buffer (`null` if sent inline).
+ * @param {Array<DataView | ArrayBuffer>} chunks - The chunks of all chunked buffers, in order.
+ * @returns {Array<DataView | ArrayBuffer>}
+ */
+export function join_chunks(inline, counts, chunks) {
+	let next_inline = 0;
+	let next_chunk = 0;
+	return counts.map((count) => {
+		if (count === null) {
+			return inline[next_inline++];
+		}
+		let parts = chunks.slice(next_chunk, (next_chunk += count));
+		let size = parts.reduce((n, part) => n + part.byteLength, 0);
+		let joined = new Uint8Array(size);
+		let offset = 0;
+		for (let part of parts) {
+			joined.set(
+				ArrayBuffer.isView(part)
+					? new Uint8Array(part.buffer, part.byteOffset, part.byteLength)
+					: new Uint8Array(part),
+				offset,
+			);
+			offset += part.byteLength;
+		}
+		return new DataView(joined.buffer);
+	});
+}
+
+/**
+ * @typedef AssetMarker
+ * @property {"anywidget-asset"} kind
+ * @property {string} hash
+ * @property {string} [source]
+ */
+
+/**
+ * Sources of the `_esm` and `_css` assets sent by the kernel, by content hash.
+ *
+ * @type {Map<string, string>}
+ */
+let ASSETS = new Map();
+
+/**
+ * @param {unknown} value
+ * @returns {value is AssetMarker}
+ */
+function is_asset_marker(value) {
+	return (
+		typeof value === "object" &&
+		value !== null &&
+		"kind" in value &&
+		value.kind === "anywidget-asset"
+	);
+}
+
+/**
+ * Replace the asset markers sent by the kernel (see `anywidget/_assets.py`) in a
+ * state with their sources, in place.
+ *
+ * Markers carrying their `source` are cached by hash, and markers with only a
+ * hash are resolved from the cache. Markers that can't be resolved are left as
+ * is (see `AnyModel.initialize`, which requests their sources).
+ *
+ * @param {Record<string, unknown>} state
+ * @returns {Record<string, unknown>}
+ */
+export function resolve_assets(state) {
+	for (let [key, value] of Object.entries(state)) {
+		if (!is_asset_marker(value)) continue;
+		if (value.source !== undefined) {
+			ASSETS.set(value.hash, value.source);
+			state[key] = value.source;
+		} else if (ASSETS.has(value.hash)) {
+			state[key] = ASSETS.get(value.hash);
+		}
+	}
+	return state;
+}
+
+/**
+ * @param {unknown} value
+ * @returns {value is Record<string, any>}
+ */
+function is_plain_object(value) {
+	if (typeof value !== "object" || value === null) return false;
+	let proto = Object.getPrototypeOf(value);
+	return proto === Object.prototype || proto === null;
+}
+
+/**
+ * Replace the binary markers sent by the kernel in a state, in place.
+ *
+ * - `{ kind: "anywidget-compressed", codec, buffer }` is replaced by the
+ *   decompressed `buffer` (as a `DataView`).
+ * - `{ kind: "anywidget-ndarray", dtype, shape, buffer }`, sent for NumPy arrays
+ *   (and other buffer-protocol objects), is replaced by a `{ dtype, shape, data }`
+ *   object, where `data` is a typed array viewing the buffer (without copying,
+ *   unless the buffer is misaligned).
+ *
+ * The binary `buffer`s are filled in by ipywidgets before this is called.
+ *
+ * @param {Record<string, unknown>} state
+ * @returns {Promise<Record<string, unknown>>}
+ */
+export async function unpack_buffers(state) {
+	/** @type {Array<[any, string | number]>} */
+	let compressed = [];
+	/** @type {Array<[any, string | number]>} */
+	let ndarrays = [];
+	/**
+	 * @param {any} parent
+	 * @param {string | number} key
+	 */
+	let visit = (parent, key) => {
+		let value = parent[key];
+		if (Array.isArray(value)) {
+			for (let i = 0; i < value.length; i++) visit(value, i);
+			return;
+		}
+		// Only walk plain (JSON) objects. Deserialized values may be class
+		// instances, like the (large, cyclic) models `unpack_models` returns.
+		if (!is_plain_object(value)) {
+			return;
+		}
+		if (value.kind === "anywidget-compressed") {
+			compressed.push([parent, key]);
+		} else if (value.kind === "anywidget-ndarray") {
+			ndarrays.push([parent, key]);
+			visit(value, "buffer");
+		} else {
+			for (let k of Object.keys(value)) visit(value, k);
+		}
+	};
+	for (let key of Object.keys(state)) visit(state, key);
+	await Promise.all(
+		compressed.map(async ([parent, key]) => {
+			let { codec, buffer } = parent[key];
+			parent[key] = await decompress(buffer, codec);
+		}),
+	);
+	// (after decompressing, since an ndarray's buffer may have been compressed)
+	for (let [parent, key] of ndarrays) {
+		parent[key] = to_ndarray(parent[key]) ?? parent[key];
+	}
+	return state;
+}
+
+/**
+ * @param {ArrayBuffer | ArrayBufferView} buffer
+ * @param {CompressionFormat} codec
+ * @returns {Promise<DataView>}
+ */
+async function decompress(buffer, codec) {
+	let stream = new Blob([buffer]).stream().pipeThrough(
+		new DecompressionStream(codec),
+	);
+	return new DataView(await new Response(stream).arrayBuffer());
+}
+
+/**
+ * @param {Record<string, unknown>} marker
+ * @returns {NDArray | undefined}
+ */
+function to_ndarray({ dtype, shape, buffer }) {
+	/** @type {any} */
+	let TypedArray = TYPED_ARRAYS[/** @type {keyof TYPED_ARRAYS} */ (dtype)];
+	let view = buffer instanceof ArrayBuffer ? new DataView(buffer) : buffer;
+	if (!TypedArray || !ArrayBuffer.isView(view)) {
+		return undefined;
+	}
+	let { byteOffset, byteLength } = view;
+	let data =
+		byteOffset % TypedArray.BYTES_PER_ELEMENT === 0
+			? new TypedArray(
+					view.buffer,
+					byteOffset,
+					byteLength / TypedArray.BYTES_PER_ELEMENT,
+				)
+			: new TypedArray(view.buffer.slice(byteOffset, byteOffset + byteLength));
+	return {
+		dtype: /** @type {string} */ (dtype),
+		shape: /** @type {Array<number>} */ (shape),
+		data,
+	};
+}
+
 /**
  * @typedef State
  * @property {string} _esm
@@ -398,14 +766,26 @@ class Runtime {
 					{ defer: true },
 				),
 			);
+			/** @type {(() => void) | undefined} */
+			let release_prev_css;
 			solid.createEffect(() => {
-				load_css(css(), id);
+				let { loaded, release } = load_css(css());
+				// Swap out the previous styles once the new ones have loaded, which
+				// avoids a flash of unstyled content on (hot) updates.
+				let release_prev = release_prev_css;
+				loaded.then(() => release_prev?.());
+				release_prev_css = release;
 			});
+			this.#signal.addEventListener("abort", () => release_prev_css?.());
 			solid.createEffect(() => {
 				let controller = new AbortController();
 				solid.onCleanup(() => controller.abort());
 				model.off(null, null, INITIALIZE_MARKER);
-				load_widget(esm(), id)
+				let source = esm();
+				// wait for the source of an asset not in the cache (see `resolve_assets`)
+				if (typeof source !== "string") return;
+				solid.onCleanup(() => release_esm(source));
+				load_widget(source, id)
 					.then(async (widget) => {
 						if (controller.signal.aborted) {
 							return;
@@ -507,6 +887,13 @@ export default function ({ DOMWidgetModel, DOMWidgetView }) {
 		/** @param {Parameters<InstanceType<DOMWidgetModel>["initialize"]>} args */
 		initialize(...args) {
 			super.initialize(...args);
+			let missing = ["_esm", "_css"].filter((key) =>
+				is_asset_marker(this.get(key)),
+			);
+			if (missing.length > 0) {
+				// The kernel only sent the hash of assets we don't have.
+				this.send({ kind: "anywidget-asset-request", keys: missing });
+			}
 			let controller = new AbortController();
 			this.once("destroy", () => {
 				controller.abort("[anywidget] Runtime destroyed.");
@@ -515,11 +902,99 @@ export default function ({ DOMWidgetModel, DOMWidgetView }) {
 			RUNTIMES.set(this, new Runtime(this, { signal: controller.signal }));
 		}
 
+		/**
+		 * Buffers sent in chunks by the kernel, by transfer id.
+		 *
+		 * @type {Map<string, Transfer>}
+		 */
+		#transfers = new Map();
+
+		/** @param {string} id */
+		#transfer(id) {
+			let transfer = this.#transfers.get(id);
+			if (!transfer) {
+				/** @type {(chunks: Array<DataView | ArrayBuffer>) => void} */
+				let resolve = () => {};
+				/** @type {Promise<Array<DataView | ArrayBuffer>>} */
+				let done = new Promise((r) => (resolve = r));
+				transfer = { chunks: [], received: 0, total: Infinity, done, resolve };
+				this.#transfers.set(id, transfer);
+			}
+			return transfer;
+		}
+
+		/** @param {string} id */
+		#maybe_complete(id) {
+			let transfer = this.#transfer(id);
+			if (transfer.received === transfer.total) {
+				this.#transfers.delete(id);
+				transfer.resolve(transfer.chunks);
+			}
+		}
+
 		/** @param {Parameters<InstanceType<DOMWidgetModel>["_handle_comm_msg"]>} msg */
 		async _handle_comm_msg(...msg) {
 			let runtime = RUNTIMES.get(this);
 			await runtime?.ready;
-			return super._handle_comm_msg(...msg);
+			/** @type {{ method: string, state?: Record<string, unknown>, patches?: Record<string, Array<PatchOp>>, transfer?: { id: string, chunks: Array<number | null> }, ack?: number, content?: { kind?: string, id: string, seq: number } }} */
+			// @ts-expect-error - The message data is untyped
+			let data = msg[0].content.data;
+			if (data.method === "custom" && data.content?.kind === "anywidget-chunk") {
+				// A chunk of a large buffer; acknowledge it so the kernel sends more.
+				let { id, seq } = data.content;
+				this.send({ kind: "anywidget-chunk-ack", id, seq });
+				if (!this.#transfers.has(id)) {
+					// The update was sent before this front end connected.
+					return;
+				}
+				let transfer = this.#transfer(id);
+				transfer.chunks[seq] = /** @type {DataView} */ (msg[0].buffers?.[0]);
+				transfer.received += 1;
+				this.#maybe_complete(id);
+				return;
+			}
+			if (data.method === "update" && data.transfer) {
+				let { id, chunks: counts } = data.transfer;
+				let transfer = this.#transfer(id);
+				transfer.total = counts.reduce((n, count) => n + (count ?? 0), 0);
+				this.#maybe_complete(id);
+				let inline = msg[0].buffers ?? [];
+				// Wait for the chunks in the queue ipywidgets applies updates in,
+				// before it reads the message buffers.
+				this.state_change = this.state_change.then(async () => {
+					msg[0].buffers = join_chunks(inline, counts, await transfer.done);
+				});
+			}
+			if (data.method === "update" && data.patches) {
+				let patches = data.patches;
+				// Patches are relative to the previous value, so apply them in the
+				// same queue ipywidgets uses to apply state updates in order.
+				this.state_change = this.state_change.then(() => {
+					let state = (data.state ??= {});
+					for (let [key, ops] of Object.entries(patches)) {
+						state[key] = apply_patch(this.get(key), ops);
+					}
+				});
+			}
+			let applied = super._handle_comm_msg(...msg);
+			if (data.method === "update" && data.ack !== undefined) {
+				// The kernel holds back further changes until we've applied this one.
+				let seq = data.ack;
+				applied.then(() => this.send({ kind: "anywidget-ack", seq }));
+			}
+			return applied;
+		}
+
+		/**
+		 * Resolves `_esm` and `_css` assets sent by hash (see `resolve_assets`),
+		 * then decompresses buffers and rebuilds typed arrays from the binary
+		 * markers in the state (see `unpack_buffers`).
+		 *
+		 * @param {Parameters<typeof DOMWidgetModel._deserialize_state>} args
+		 */
+		static async _deserialize_state(...args) {
+			let state = await super._deserialize_state(...args);
+			return unpack_buffers(resolve_assets(state));
 		}
 
 		/**
@@ -6,6 +6,7 @@ import asyncio
 
 import anywidget
 import traitlets
+from anywidget.experimental import AppendListTrait
 
 
 class ChatWidget(anywidget.AnyWidget):
@@ -206,7 +207,7 @@ class ChatWidget(anywidget.AnyWidget):
     export default { render };
     """
 
-    messages = traitlets.List([]).tag(sync=True)
+    messages = AppendListTrait().tag(sync=True)
     system_model = traitlets.Unicode(None, allow_none=True).tag(sync=True)
     system_tools = traitlets.List([]).tag(sync=True)
     system_mcp_servers = traitlets.List([]).tag(sync=True)
@@ -230,12 +231,12 @@ class ChatWidget(anywidget.AnyWidget):
 
             user_content = content.get("content", "")
             # Add user message in Claude Code format
-            self.messages = self.messages + [
+            self.messages.append(
                 {
                     "type": "user",
                     "content": [{"type": "text", "text": user_content}],
                 }
-            ]
+            )
             # Schedule async response handling
             asyncio.create_task(self._handle_response(user_content))
 
@@ -261,7 +262,7 @@ class ChatWidget(anywidget.AnyWidget):
                     if "mcp_servers" in data:
                         self.system_mcp_servers = data["mcp_servers"]
 
-                self.messages = self.messages + [parsed_msg]
+                self.messages.append(parsed_msg)
                 await asyncio.sleep(0.1)  # Visual streaming delay
         finally:
             self._is_processing = False
@@ -0,0 +1,98 @@
+import copy
+import pickle
+
+import pytest
+from anywidget.experimental import AppendList
+
+
+class Sink:
+    def __init__(self) -> None:
+        self.value: AppendList | None = None
+        self.sent: list = []
+
+    def _send_patch(self, key: str, ops: list, source: object = None) -> bool:
+        if source is not self.value:
+            return False
+        self.sent.append((key, ops))
+        return True
+
+
+@pytest.fixture
+def sink() -> Sink:
+    sink = Sink()
+    sink.value = AppendList([1, 2, 3])
+    sink.value._subscribe(sink, "items")
+    return sink
+
+
+def _extend(items: list) -> list:
+    return [{"op": "extend", "path": [], "value": items}]
+
+
+def _truncate(n: int) -> list:
+    return [{"op": "truncate", "path": [], "value": n}]
+
+
+def test_append_list_sends_appended_items(sink: Sink) -> None:
+    items = sink.value
+    assert items is not None
+    items.append(4)
+    items.extend([5, 6])
+    items += [7]
+    items.extend([])
+    assert items == [1, 2, 3, 4, 5, 6, 7]
+    assert sink.sent == [
+        ("items", _extend([4])),
+        ("items", _extend([5, 6])),
+        ("items", _extend([7])),
+    ]
+
+
+def test_append_list_truncates(sink: Sink) -> None:
+    items = sink.value
+    assert items is not None
+    assert items.pop() == 3  # noqa: PLR2004
+    del items[1:]
+    items.append(2)
+    del items[-1]
+    items.clear()
+    assert sink.sent == [
+        ("items", _truncate(2)),
+        ("items", _truncate(1)),
+        ("items", _extend([2])),
+        ("items", _truncate(1)),
+        ("items", _truncate(0)),
+    ]
+
+
+def test_append_list_replaces_on_other_mutations(sink: Sink) -> None:
+    items = sink.value
+    assert items is not None
+    items.insert(0, 0)
+    items[0] = -1
+    items.sort()
+    assert items.pop(0) == -1
+    assert [ops[0]["op"] for _, ops in sink.sent] == ["replace"] * 4
+    assert sink.sent[-1] == ("items", [{"op": "replace", "path": [], "value": items}])
+
+
+def test_append_list_drops_stale_subscribers(sink: Sink) -> None:
+    items = sink.value
+    assert items is not None
+    sink.value = AppendList()
+    items.append(4)
+    assert sink.sent == []
+    assert items._subscribers == []
+
+
+def test_append_list_copies_without_subscribers(sink: Sink) -> None:
+    items = sink.value
+    assert items is not None
+    for clone in (
+        copy.copy(items),
+        copy.deepcopy(items),
+        pickle.loads(pickle.dumps(items)),  # noqa: S301,
+    ):
+        assert isinstance(clone, AppendList)
+        assert clone == items
+        assert clone._subscribers == []
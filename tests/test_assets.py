@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Generator
+from unittest.mock import MagicMock, patch
+
+import anywidget
+import anywidget._assets
+import anywidget._descriptor
+import comm
+import pytest
+from anywidget._assets import asset_markers, reference_assets
+from anywidget._descriptor import MimeBundleDescriptor
+
+_ESM = "export default { render() {} };\n" + "// padding\n" * 200
+
+
+@pytest.fixture
+def in_kernel() -> Generator[None, None, None]:
+    with patch.object(anywidget._assets, "_in_kernel", return_value=True), patch.object(
+        anywidget._assets, "_SENT_ASSETS", set()
+    ):
+        yield
+
+
+@pytest.mark.usefixtures("in_kernel")
+def test_reference_assets() -> None:
+    first = {"_esm": _ESM, "_css": ".small {}", "value": 1}
+    reference_assets(first)
+    assert first["_esm"]["kind"] == "anywidget-asset"
+    assert first["_esm"]["source"] == _ESM
+    # small assets aren't worth referencing
+    assert first["_css"] == ".small {}"
+    assert first["value"] == 1
+
+    second = {"_esm": _ESM}
+    reference_assets(second)
+    assert second["_esm"] == {"kind": "anywidget-asset", "hash": first["_esm"]["hash"]}
+
+
+def test_reference_assets_outside_kernel() -> None:
+    state = {"_esm": _ESM}
+    reference_assets(state)
+    assert state == {"_esm": _ESM}
+
+
+@pytest.mark.usefixtures("in_kernel")
+def test_asset_markers() -> None:
+    state = asset_markers({"_esm": _ESM, "value": 1})
+    assert list(state) == ["_esm"]
+    assert state["_esm"]["source"] == _ESM
+
+
+@pytest.mark.usefixtures("in_kernel")
+def test_widget_assets_sent_once() -> None:
+    class Widget(anywidget.AnyWidget):
+        _esm = _ESM
+
+    with patch.object(comm, "create_comm", side_effect=lambda **_: MagicMock()) as cc:
+        first, second = Widget(), Widget()
+
+    states = [call.kwargs["data"]["state"] for call in cc.call_args_list]
+    states = [state for state in states if "_esm" in state]  # (not the layouts)
+    assert states[0]["_esm"]["source"] == _ESM
+    assert "source" not in states[1]["_esm"]
+    # the python value is unchanged
+    assert second._esm == _ESM
+
+    # a front end without the asset asks for it
+    with patch.object(second, "_send") as mock_send:
+        second._handle_custom_msg(
+            {"kind": "anywidget-asset-request", "keys": ["_esm"]}, []
+        )
+    (msg,) = mock_send.call_args.args
+    assert msg["state"]["_esm"]["source"] == _ESM
+    first.close()
+    second.close()
+
+
+@pytest.mark.usefixtures("in_kernel")
+def test_descriptor_assets_sent_once() -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        value: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(_esm=_ESM)
+
+    with patch.object(
+        anywidget._descriptor, "open_comm", side_effect=lambda **_: MagicMock()
+    ) as open_comm:
+        foos = [Foo(), Foo()]
+        for foo in foos:
+            foo._repr_mimebundle_  # create the comm
+
+    first, second = (call.kwargs["initial_state"] for call in open_comm.call_args_list)
+    assert first["_esm"]["source"] == _ESM
+    assert "source" not in second["_esm"]
+
+
+@pytest.mark.usefixtures("in_kernel")
+def test_descriptor_assets_not_resent_after_open() -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        value: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(_esm=_ESM)
+
+    mock_comm = MagicMock()
+    with patch.object(
+        anywidget._descriptor, "open_comm", return_value=mock_comm
+    ) as open_comm:
+        Foo()._repr_mimebundle_  # create the comm, and sync it with the view
+
+    state = open_comm.call_args.kwargs["initial_state"]
+    assert state["_esm"]["source"] == _ESM
+    # the update sent right after opening the comm doesn't repeat the asset
+    update = mock_comm.send.call_args_list[0].kwargs["data"]
+    assert update["method"] == "update"
+    assert "_esm" not in update["state"]
+    assert update["state"]["value"] == 0
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from anywidget._backpressure import LatestValueQueue, make_latest_value_queue
+
+
+def test_holds_keys_until_acknowledged() -> None:
+    queue = LatestValueQueue(frozenset({"value"}))
+    msg: dict = {}
+    queue.track(msg, ["value"])
+    assert msg == {"ack": 1}
+
+    # other keys are sent, changes of `value` wait for the front end
+    assert queue.hold({"value": 1, "label": "a"}) == {"label": "a"}
+    assert queue.hold({"value": 2}) == {}
+    assert queue.ack({"seq": 0}) == set()
+    assert queue.ack({"seq": 1}) == {"value"}
+    assert queue.hold({"value": 3}) == {"value": 3}
+
+
+def test_untracked_keys_are_not_acknowledged() -> None:
+    queue = LatestValueQueue(frozenset({"value"}))
+    msg: dict = {}
+    queue.track(msg, ["label"])
+    assert msg == {}
+    assert queue.hold({"value": 1}) == {"value": 1}
+
+
+def test_full_state_resets() -> None:
+    queue = LatestValueQueue()
+    queue.track({}, ["value"])
+    assert queue.hold({"value": 1}) == {}
+    assert queue.hold({"value": 2}, full=True) == {"value": 2}
+    assert queue.ack({"seq": 1}) == set()
+
+
+def test_make_latest_value_queue() -> None:
+    assert make_latest_value_queue(False) is None
+    assert isinstance(make_latest_value_queue(True), LatestValueQueue)
+    assert isinstance(make_latest_value_queue(["value"]), LatestValueQueue)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+from anywidget._chunking import DEFAULT_ACK_TIMEOUT, ChunkedSender
+
+
+def _sender(chunk_size: int = 4, window: int = 2) -> tuple[ChunkedSender, list]:
+    sent: list = []
+    sender = ChunkedSender(
+        lambda msg, buffers: sent.append((msg, buffers)),
+        chunk_size=chunk_size,
+        window=window,
+    )
+    return sender, sent
+
+
+def test_small_buffers_sent_as_is() -> None:
+    sender, sent = _sender()
+    msg = {"method": "update", "state": {}, "buffer_paths": [["a"]]}
+    sender.send(msg, [b"abcd"])
+    assert sent == [(msg, [b"abcd"])]
+
+
+def test_other_messages_sent_as_is() -> None:
+    sender, sent = _sender()
+    msg = {"method": "custom", "content": {}}
+    sender.send(msg, [b"abcdefghij"])
+    assert sent == [(msg, [b"abcdefghij"])]
+
+
+def test_large_buffers_sent_in_chunks() -> None:
+    sender, sent = _sender()
+    msg = {"method": "update", "state": {}, "buffer_paths": [["a"], ["b"]]}
+    sender.send(msg, [b"abcdefghij", b"xy"])
+
+    update, buffers = sent[0]
+    transfer = update.pop("transfer")
+    assert update == msg
+    assert transfer["chunks"] == [len(range(0, 10, 4)), None]
+    assert buffers == [b"xy"]
+
+    # only `window` chunks are in flight
+    assert [msg["method"] for msg, _ in sent] == ["update", "custom", "custom"]
+    sender.ack()
+    sender.ack()
+    assert [msg["method"] for msg, _ in sent] == [
+        "update",
+        "custom",
+        "custom",
+        "custom",
+    ]
+
+    chunks = sent[1:]
+    assert [msg["content"] for msg, _ in chunks] == [
+        {"kind": "anywidget-chunk", "id": transfer["id"], "seq": seq}
+        for seq in range(3)
+    ]
+    assert b"".join(bytes(b) for _, (b,) in chunks) == b"abcdefghij"
+
+
+def test_reset_gives_back_window() -> None:
+    sender, sent = _sender()
+    msg = {"method": "update", "state": {}, "buffer_paths": [["a"]]}
+    sender.send(msg, [b"abcdefghij"])
+    assert len(sent) == 1 + 2  # the window is full, and never acknowledged
+
+    # e.g. the page was reloaded, and requested the full state
+    sent.clear()
+    sender.reset()
+    # the transfer in progress carries on, as other front ends wait for it
+    assert [msg["content"]["seq"] for msg, _ in sent] == [2]
+    sent.clear()
+    sender.send(msg, [b"abcdefghij"])
+    assert [msg["content"]["seq"] for msg, _ in sent[1:]] == [0]
+
+
+def test_unacknowledged_chunks_expire() -> None:
+    sender, sent = _sender()
+    msg = {"method": "update", "state": {}, "buffer_paths": [["a"]]}
+    sender.send(msg, [b"abcdefghij"])
+    sent.clear()
+
+    later = time.monotonic() + DEFAULT_ACK_TIMEOUT + 1
+    with patch.object(time, "monotonic", return_value=later):
+        sender.send(msg, [b"abcdefghij"])
+    # the lost chunks are given up on, so the queue moves again
+    assert [msg["content"]["seq"] for msg, _ in sent[1:]] == [2, 0]
@@ -0,0 +1,56 @@
+import array
+import os
+import zlib
+
+from anywidget._compression import (
+    DEFAULT_COMPRESS_THRESHOLD,
+    BufferCompressor,
+    make_compressor,
+)
+from anywidget._util import remove_buffers
+
+
+def test_compresses_large_buffers() -> None:
+    big = bytes(1000)
+    state, buffer_paths, buffers = remove_buffers(
+        {"a": big, "b": [big], "small": b"\x00"},
+    )
+    BufferCompressor(100).compress(state, buffer_paths, buffers)
+
+    compressed = {"kind": "anywidget-compressed", "codec": "deflate"}
+    assert state == {"a": compressed, "b": [compressed]}
+    assert buffer_paths == [["a", "buffer"], ["b", 0, "buffer"], ["small"]]
+    assert zlib.decompress(buffers[0]) == big
+    assert zlib.decompress(buffers[1]) == big
+    assert buffers[2] == b"\x00"
+
+
+def test_compresses_ndarray_buffers() -> None:
+    values = array.array("d", [0.0] * 1000)
+    state, buffer_paths, buffers = remove_buffers({"values": values})
+    BufferCompressor(100).compress(state, buffer_paths, buffers)
+
+    assert state["values"]["buffer"] == {
+        "kind": "anywidget-compressed",
+        "codec": "deflate",
+    }
+    assert buffer_paths == [["values", "buffer", "buffer"]]
+    assert zlib.decompress(buffers[0]) == values.tobytes()
+
+
+def test_skips_incompressible_buffers_and_other_keys() -> None:
+    noise = os.urandom(1000)
+    state, buffer_paths, buffers = remove_buffers({"a": noise, "b": bytes(1000)})
+    BufferCompressor({"a": 100}).compress(state, buffer_paths, buffers)
+    assert state == {}
+    assert buffers == [noise, bytes(1000)]
+
+
+def test_make_compressor() -> None:
+    assert make_compressor(False) is None
+    assert make_compressor(True)._threshold("x") == DEFAULT_COMPRESS_THRESHOLD  # type: ignore[union-attr]
+    assert make_compressor(10)._threshold("x") == 10  # type: ignore[union-attr]  # noqa: PLR2004
+    compressor = make_compressor(["a"])
+    assert compressor is not None
+    assert compressor._threshold("a") == DEFAULT_COMPRESS_THRESHOLD
+    assert compressor._threshold("b") is None
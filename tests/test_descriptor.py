@@ -1,21 +1,38 @@
+import asyncio
+import datetime as dt
+import gc
 import pathlib
 import time
 import weakref
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Callable, ClassVar, Generator, Set, Union
+import zlib
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ClassVar,
+    Generator,
+    Iterator,
+    Set,
+    Union,
+    cast,
+)
 from unittest.mock import MagicMock, patch
 
+import anywidget
 import anywidget._descriptor
+import anywidget._file_contents
 import pytest
 import watchfiles
+from anywidget._chunking import DEFAULT_CHUNK_SIZE, DEFAULT_WINDOW
 from anywidget._descriptor import (
     _COMMS,
     MimeBundleDescriptor,
     ReprMimeBundle,
 )
-from anywidget._file_contents import FileContents
+from anywidget._file_contents import FileContents, _FileWatcher
 from anywidget._protocols import AnywidgetProtocol
 from anywidget._util import _WIDGET_MIME_TYPE
+from anywidget.experimental import AppendList
 from ipykernel.comm import Comm
 from watchfiles import Change
 
@@ -320,7 +337,9 @@ def test_descriptor_with_traitlets(mock_comm: MagicMock) -> None:
     assert not repr_obj._disconnectors
 
 
-def test_infer_file_contents(mock_comm: MagicMock, tmp_path: pathlib.Path) -> None:
+def test_infer_file_contents(
+    mock_comm: MagicMock, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
     """Test that the file contents are inferred from the file path."""
 
     site_packages = tmp_path / "site-packages"
@@ -345,25 +364,35 @@ def test_infer_file_contents(mock_comm: MagicMock, tmp_path: pathlib.Path) -> No
     foo = Foo()
     assert foo._repr_mimebundle_._extra_state["_esm"] == esm.read_text()
 
+    # a watcher of our own, whose thread can't already be running
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
+    real_watch = watchfiles.watch
+
     def mock_file_events() -> Generator[set, None, None]:
-        esm.write_text("blah")
         # write to file
-        changes = set()
-        changes.add((Change.modified, str(esm)))
-        yield changes
-        # delete the file
-        changes = set()
-        changes.add((Change.deleted, str(esm)))
-        yield changes
-
-    with patch.object(watchfiles, "watch") as mock_watch:
-        mock_watch.return_value = mock_file_events()
+        esm.write_text("blah")
+        yield {(Change.modified, str(esm))}
+        # delete the file (which stops the watcher)
+        esm.unlink()
+        yield {(Change.deleted, str(esm))}
+
+    def mock_watch(
+        *args: object, stop_event: object, **kwargs: object
+    ) -> Iterator[set]:
+        if stop_event is not watcher._rewatch:
+            # (the shared watcher's thread may be watching other files)
+            return real_watch(*args, stop_event=stop_event, **kwargs)
+        return mock_file_events()
+
+    with patch.object(watchfiles, "watch", side_effect=mock_watch):
         file_contents.watch_in_thread()
 
-    while (
-        file_contents._background_thread and file_contents._background_thread.is_alive()
-    ):
-        time.sleep(0.01)
+        while (
+            file_contents._background_thread
+            and file_contents._background_thread.is_alive()
+        ):
+            time.sleep(0.01)
 
     mock_comm.send.assert_called_with(
         data={"method": "update", "state": {"_esm": "blah"}, "buffer_paths": []},
@@ -394,6 +423,50 @@ def test_explicit_file_contents(tmp_path: pathlib.Path) -> None:
     assert foo._repr_mimebundle_._extra_state["bar"] == path.read_text()
 
 
+def test_hot_reload_broadcast(mock_comm: MagicMock, tmp_path: pathlib.Path) -> None:
+    """Test one connection per file updates every live object, and none deleted."""
+    from anywidget._hot_reload import _SUBSCRIBERS
+
+    path = tmp_path / "foo.js"
+    path.write_text("export default {}")
+    esm = FileContents(path, start_thread=False)
+
+    class Foo:
+        _repr_mimebundle_ = MimeBundleDescriptor(_esm=esm, autodetect_observer=False)
+
+        def _get_anywidget_state(self, include: Union[Set[str], None]):  # noqa: ANN202, ARG002
+            return {}
+
+    foos = [Foo() for _ in range(3)]
+    for foo in foos:
+        foo._repr_mimebundle_
+    del foo
+    assert len(esm.changed) == 1
+    bundles = {foo._repr_mimebundle_ for foo in foos}
+    assert set(_SUBSCRIBERS[esm]["_esm"]) == bundles
+
+    del foos[1], bundles
+    gc.collect()
+    assert set(_SUBSCRIBERS[esm]["_esm"]) == {foo._repr_mimebundle_ for foo in foos}
+
+    mock_comm.send.reset_mock()
+    path.write_text("blah")
+    esm._reload()
+    assert all(foo._repr_mimebundle_._extra_state["_esm"] == "blah" for foo in foos)
+    first, second = mock_comm.send.call_args_list
+    # the same message is sent for every object
+    assert first.kwargs["data"] is second.kwargs["data"]
+    assert first.kwargs["data"] == {
+        "method": "update",
+        "state": {"_esm": "blah"},
+        "buffer_paths": [],
+    }
+
+    foos.clear()
+    gc.collect()
+    assert not _SUBSCRIBERS[esm]["_esm"]
+
+
 def test_no_view() -> None:
     """Test that the descriptor works without a view."""
 
@@ -415,3 +488,614 @@ def test_no_view() -> None:
 
     foo = Foo()
     assert foo._repr_mimebundle_() is None
+
+
+def test_descriptor_coalesces_changes(mock_comm: MagicMock) -> None:
+    """Test that many field changes in one loop iteration become one update."""
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        a: int = 0
+        b: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(coalesce=True)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    async def update_fields() -> None:
+        foo.a = 1
+        foo.b = 2
+        foo.a = 3
+        mock_comm.send.assert_not_called()
+        await asyncio.sleep(0)
+
+    asyncio.run(update_fields())
+    mock_comm.send.assert_called_once_with(
+        data={"method": "update", "state": {"a": 3, "b": 2}, "buffer_paths": []},
+        buffers=[],
+    )
+
+
+def test_descriptor_coalesce_window(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        a: int = 0
+        b: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(coalesce=60)
+
+    foo = Foo()
+    repr_obj = foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    async def changes() -> None:
+        foo.a = 1
+        foo.b = 2
+        mock_comm.send.assert_not_called()
+        # (rather than waiting for the long window to end)
+        repr_obj.flush()
+
+    asyncio.run(changes())
+    mock_comm.send.assert_called_once_with(
+        data={"method": "update", "state": {"a": 1, "b": 2}, "buffer_paths": []},
+        buffers=[],
+    )
+    assert repr_obj._cancel_flush is None
+
+
+def test_descriptor_coalesce_window_sync_loop(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        a: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(coalesce=0.05)
+
+    now = 100.0
+    # (as in a kernel, whose event loop is running, but blocked by the cell)
+    with patch.object(anywidget._descriptor, "_get_running_loop"), patch.object(
+        anywidget._descriptor, "call_later"
+    ) as mock_call_later, patch(
+        "anywidget._descriptor.time.monotonic", side_effect=lambda: now
+    ):
+        foo = Foo()
+        foo._repr_mimebundle_  # create the comm
+        mock_comm.send.reset_mock()
+        # a loop that never yields to the event loop still sends, once per window
+        for i in range(1, 5):
+            now += 0.02
+            foo.a = i
+
+        assert [
+            call.kwargs["data"]["state"] for call in mock_comm.send.call_args_list
+        ] == [{"a": 3}]
+        # the timer only sends the trailing change
+        _, flush = mock_call_later.call_args.args
+        flush()
+    assert mock_comm.send.call_args.kwargs["data"]["state"] == {"a": 4}
+
+
+def test_descriptor_coalesce_without_loop_sends_immediately(
+    mock_comm: MagicMock,
+) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        a: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(coalesce=60)
+
+    foo = Foo()
+    repr_obj = foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    # (rather than from a timer thread, once the window ends)
+    foo.a = 1
+    mock_comm.send.assert_called_once_with(
+        data={"method": "update", "state": {"a": 1}, "buffer_paths": []},
+        buffers=[],
+    )
+    assert repr_obj._cancel_flush is None
+
+
+def test_descriptor_coalesce_zero_disables(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        a: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor(coalesce=0)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    async def changes() -> None:
+        foo.a = 1
+        mock_comm.send.assert_called_once()
+
+    asyncio.run(changes())
+
+
+def test_descriptor_compress(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        image: bytes = bytes(100)
+        _repr_mimebundle_ = MimeBundleDescriptor(compress=50)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    # the initial state is compressed too
+    open_comm = cast("MagicMock", anywidget._descriptor.open_comm)
+    assert open_comm.call_args.kwargs["compressor"] is not None
+    mock_comm.send.reset_mock()
+
+    foo.image = bytes(200)
+    mock_comm.send.assert_called_once()
+    data = mock_comm.send.call_args.kwargs["data"]
+    assert data["state"] == {
+        "image": {"kind": "anywidget-compressed", "codec": "deflate"},
+    }
+    assert data["buffer_paths"] == [["image", "buffer"]]
+    (buffer,) = mock_comm.send.call_args.kwargs["buffers"]
+    assert zlib.decompress(buffer) == bytes(200)
+
+
+def test_descriptor_chunked_transfer(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        image: bytes = b""
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    image = bytes(DEFAULT_CHUNK_SIZE * (DEFAULT_WINDOW + 1))
+    foo.image = image
+    # the update, then as many chunks as fit in the window
+    assert mock_comm.send.call_count == 1 + DEFAULT_WINDOW
+    data = mock_comm.send.call_args_list[0].kwargs["data"]
+    assert data["transfer"]["chunks"] == [DEFAULT_WINDOW + 1]
+
+    mock_comm.handle_msg(
+        {
+            "content": {
+                "data": {
+                    "method": "custom",
+                    "content": {"kind": "anywidget-chunk-ack", "id": "", "seq": 0},
+                }
+            },
+            "buffers": [],
+        }
+    )
+    assert mock_comm.send.call_count == 2 + DEFAULT_WINDOW
+    chunks = [call.kwargs["buffers"][0] for call in mock_comm.send.call_args_list[1:]]
+    assert b"".join(chunks) == image
+
+
+def test_descriptor_backpressure(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        value: int = 0
+        label: str = ""
+        _repr_mimebundle_ = MimeBundleDescriptor(backpressure=["value"])
+
+    def _ack(seq: int) -> None:
+        mock_comm.send.reset_mock()
+        mock_comm.handle_msg(
+            {
+                "content": {
+                    "data": {
+                        "method": "custom",
+                        "content": {"kind": "anywidget-ack", "seq": seq},
+                    }
+                },
+                "buffers": [],
+            }
+        )
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    _ack(mock_comm.send.call_args.kwargs["data"]["ack"])  # applied the full state
+    mock_comm.send.assert_not_called()
+
+    for i in range(1, 10):
+        foo.value = i
+    foo.label = "done"
+    first, second = mock_comm.send.call_args_list
+    assert first.kwargs["data"]["state"] == {"value": 1}
+    assert "ack" in first.kwargs["data"]
+    assert second.kwargs["data"] == {
+        "method": "update",
+        "state": {"label": "done"},
+        "buffer_paths": [],
+    }
+
+    # once the front end has applied the update, only the latest value is sent
+    _ack(first.kwargs["data"]["ack"])
+    mock_comm.send.assert_called_once()
+    assert mock_comm.send.call_args.kwargs["data"]["state"] == {"value": 9}
+
+
+def test_descriptor_debounced_fields(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        value: int = field(default=0, metadata={"debounce_ms": 10})
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    async def changes() -> None:
+        for i in range(1, 10):
+            foo.value = i
+        mock_comm.send.assert_not_called()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(changes())
+    mock_comm.send.assert_called_once()
+    assert mock_comm.send.call_args.kwargs["data"]["state"] == {"value": 9}
+
+
+def test_descriptor_throttled_traits(mock_comm: MagicMock) -> None:
+    import traitlets
+
+    class Foo(traitlets.HasTraits):
+        value = traitlets.Int(0).tag(sync=True, throttle_ms=20)
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    async def changes() -> None:
+        for i in range(1, 10):
+            foo.value = i
+        await asyncio.sleep(0.05)
+
+    asyncio.run(changes())
+    first, last = mock_comm.send.call_args_list
+    assert first.kwargs["data"]["state"] == {"value": 1}
+    assert last.kwargs["data"]["state"] == {"value": 9}
+
+
+def test_descriptor_no_echo(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        value: int = 0
+        label: str = ""
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+        def __post_init__(self) -> None:
+            # a value derived from another one in python
+            self.events.value.connect(self._on_value)
+
+        def _on_value(self, value: int) -> None:
+            self.label = str(value)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    # changes from the front end aren't sent back to it, but derived changes are
+    value = _send_value(mock_comm, 5)
+    assert foo.value == value
+    mock_comm.send.assert_called_once()
+    assert mock_comm.send.call_args.kwargs["data"]["state"] == {"label": "5"}
+
+    # changes in python are sent as usual
+    mock_comm.send.reset_mock()
+    foo.value = 6
+    sent = [call.kwargs["data"]["state"] for call in mock_comm.send.call_args_list]
+    assert sorted(sent, key=str) == [{"label": "6"}, {"value": 6}]
+
+
+def test_descriptor_atomic_updates(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        x: int = 0
+        y: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    seen = []
+
+    def _on_change(_: object) -> None:
+        seen.append((foo.x, foo.y))
+
+    foo.events.connect(_on_change)
+
+    mock_comm.handle_msg(
+        {"content": {"data": {"method": "update", "state": {"x": 1, "y": 2}}}},
+    )
+    # observers are notified once per key, on the fully updated object
+    assert seen == [(1, 2), (1, 2)]
+    foo.events.disconnect(_on_change)
+
+
+def test_descriptor_atomic_updates_traitlets(mock_comm: MagicMock) -> None:
+    import traitlets
+
+    class Foo(traitlets.HasTraits):
+        x = traitlets.Int(0).tag(sync=True)
+        y = traitlets.Int(0).tag(sync=True)
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    seen = []
+
+    def _on_change(_: object) -> None:
+        seen.append((foo.x, foo.y))
+
+    foo.observe(_on_change, names=["x", "y"])
+
+    mock_comm.handle_msg(
+        {"content": {"data": {"method": "update", "state": {"x": 1, "y": 2}}}},
+    )
+    assert seen == [(1, 2), (1, 2)]
+    foo.unobserve(_on_change, names=["x", "y"])
+
+
+def test_descriptor_batch(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        x: int = 0
+        y: int = 0
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    with anywidget.batch(foo):
+        foo.x = 1
+        foo.y = 2
+        foo.x = 3
+        mock_comm.send.assert_not_called()
+
+    mock_comm.send.assert_called_once()
+    assert mock_comm.send.call_args.kwargs["data"]["state"] == {"x": 3, "y": 2}
+
+
+def test_descriptor_batch_patches(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        x: int = 0
+        items: AppendList = field(default_factory=AppendList)
+        _repr_mimebundle_ = MimeBundleDescriptor()
+
+    foo = Foo()
+    with anywidget.batch(foo):
+        # not displayed, so batching doesn't open a comm
+        foo.x = 1
+    assert "_repr_mimebundle_" not in vars(foo)
+
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    with anywidget.batch(foo):
+        foo.x = 2
+        foo.items.append(1)
+        mock_comm.send.assert_not_called()
+
+    mock_comm.send.assert_called_once()
+    data = mock_comm.send.call_args.kwargs["data"]
+    assert data["state"] == {"x": 2}
+    assert data["patches"] == {"items": [{"op": "extend", "path": [], "value": [1]}]}
+
+
+def test_descriptor_delta_updates(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        rows: list = field(default_factory=lambda: list(range(100)))
+        _repr_mimebundle_ = MimeBundleDescriptor(delta=True)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    foo.rows = [*foo.rows, 100]
+    mock_comm.send.assert_called_once_with(
+        data={
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {"rows": [{"op": "extend", "path": [], "value": [100]}]},
+        },
+        buffers=[],
+    )
+
+    # values from the front end become the new baseline, so they aren't echoed
+    mock_comm.send.reset_mock()
+    mock_comm.handle_msg(
+        {
+            "content": {
+                "data": {"method": "update", "state": {"rows": [*foo.rows, 101]}},
+            },
+        },
+    )
+    assert foo.rows[-1] == 101  # noqa: PLR2004
+    mock_comm.send.assert_not_called()
+
+
+def test_descriptor_append_list(mock_comm: MagicMock) -> None:
+    psygnal = pytest.importorskip("psygnal")
+
+    @psygnal.evented
+    @dataclass
+    class Foo:
+        messages: AppendList = field(default_factory=AppendList)
+        _repr_mimebundle_ = MimeBundleDescriptor(delta=True)
+
+    foo = Foo()
+    foo._repr_mimebundle_  # create the comm
+    mock_comm.send.reset_mock()
+
+    foo.messages.append("hi")
+    mock_comm.send.assert_called_once_with(
+        data={
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {"messages": [{"op": "extend", "path": [], "value": ["hi"]}]},
+        },
+        buffers=[],
+    )
+
+    # a re-assigned list is picked up, and the old one is no longer synced
+    old = foo.messages
+    foo.messages = AppendList(["new"])
+    mock_comm.send.reset_mock()
+    old.append("stale")
+    foo.messages.append("there")
+    mock_comm.send.assert_called_once_with(
+        data={
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {"messages": [{"op": "extend", "path": [], "value": ["there"]}]},
+        },
+        buffers=[],
+    )
+
+
+def test_dataclass_state_getter() -> None:
+    @dataclass
+    class Point:
+        x: int
+        y: int
+
+    @dataclass
+    class Foo:
+        rows: list = field(default_factory=lambda: list(range(10)))
+        points: list = field(default_factory=lambda: [Point(0, 1)])
+        origin: Point = field(default_factory=lambda: Point(0, 0))
+
+    foo = Foo()
+    get_state = anywidget._descriptor.determine_state_getter(foo)
+
+    state = get_state(foo, include=None)
+    assert state == {
+        "rows": list(range(10)),
+        "points": [{"x": 0, "y": 1}],
+        "origin": {"x": 0, "y": 0},
+    }
+    # field values are not copied (unless they hold dataclasses)
+    assert state["rows"] is foo.rows
+
+    # only the requested fields are read
+    with patch.object(anywidget._descriptor, "asdict") as mock_asdict:
+        assert get_state(foo, include={"rows"}) == {"rows": foo.rows}
+    mock_asdict.assert_not_called()
+
+
+def test_traitlets_state_getter() -> None:
+    import traitlets
+
+    class Foo(traitlets.HasTraits):
+        a = traitlets.Int(1).tag(sync=True)
+        b = traitlets.Int(2).tag(sync=True)
+        hidden = traitlets.Int(3)
+
+    foo = Foo()
+    get_state = anywidget._descriptor.determine_state_getter(foo)
+    assert get_state(foo, include=None) == {"a": 1, "b": 2}
+    assert get_state(foo, include={"b", "hidden"}) == {"b": 2}
+
+    # the synced trait names are computed once per class
+    with patch.object(Foo, "trait_names") as mock_trait_names:
+        get_state(Foo(), include={"a"})
+    mock_trait_names.assert_not_called()
+
+    # traits added to an instance are picked up
+    foo.add_traits(c=traitlets.Int(4).tag(sync=True))
+    assert get_state(foo, include=None) == {"a": 1, "b": 2, "c": 4}
+
+
+def test_msgspec_state_getter() -> None:
+    msgspec = pytest.importorskip("msgspec")
+
+    class Foo(msgspec.Struct, rename="camel"):
+        data_field: bytes = b"\x00\x01"
+        items: list = msgspec.field(default_factory=lambda: [1, {"a": {2, 3}}])
+
+    foo = Foo()
+    get_state = anywidget._descriptor.determine_state_getter(foo)
+    # fields are keyed by their encoded names, and bytes stay binary
+    assert get_state(foo, include=None) == {
+        "dataField": b"\x00\x01",
+        "items": [1, {"a": [2, 3]}],
+    }
+    assert get_state(foo, include={"items"}) == {"items": [1, {"a": [2, 3]}]}
+    assert get_state(foo, include={"data_field"}) == {"dataField": b"\x00\x01"}
+
+    class Bar(msgspec.Struct, omit_defaults=True):
+        value: int = 1
+        items: list = msgspec.field(default_factory=list)
+
+    bar = Bar(items=[1])
+    # same as `msgspec.to_builtins`
+    assert get_state(bar, include=None) == msgspec.to_builtins(bar) == {"items": [1]}
+
+
+def test_pydantic_v1_state_getter() -> None:
+    pydantic_v1 = pytest.importorskip("pydantic.v1")
+
+    class Foo(pydantic_v1.BaseModel):
+        when: dt.date = dt.date(2024, 1, 2)
+        tags: set = {"a"}  # noqa: RUF012
+        items: list = [(1, 2)]  # noqa: RUF012
+        value: int = 1
+
+        class Config:
+            json_encoders = {dt.date: lambda d: d.strftime("%d/%m/%Y")}  # noqa: RUF012
+
+    foo = Foo()
+    get_state = anywidget._descriptor.determine_state_getter(foo)
+    # same as a round-trip through `foo.json()`, honouring custom encoders
+    assert get_state(foo, include=None) == {
+        "when": "02/01/2024",
+        "tags": ["a"],
+        "items": [[1, 2]],
+        "value": 1,
+    }
+    assert get_state(foo, include={"value"}) == {"value": 1}
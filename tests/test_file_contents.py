@@ -1,15 +1,41 @@
+import asyncio
 import pathlib
+import threading
 import time
+import weakref
 from collections import deque
-from typing import Generator
+from typing import ContextManager, Generator
 from unittest.mock import MagicMock, Mock, patch
 
+import anywidget._file_contents
 import pytest
 import watchfiles
-from anywidget._file_contents import FileContents, VirtualFileContents
+from anywidget._file_contents import (
+    _FILE_WATCHER,
+    FileContents,
+    VirtualFileContents,
+    _FileWatcher,
+)
 from watchfiles import Change
 
 
+def _patch_watch(watcher: _FileWatcher, **kwargs: object) -> ContextManager[Mock]:
+    """Mock `watchfiles.watch` for `watcher` only.
+
+    The thread of the shared watcher may be watching files of other tests, and
+    mustn't pick up the mock.
+    """
+    real_watch = watchfiles.watch
+    mock = Mock(**kwargs)
+
+    def watch(*args: object, stop_event: threading.Event, **kw: object) -> object:
+        if stop_event is watcher._rewatch:
+            return mock(*args, stop_event=stop_event, **kw)
+        return real_watch(*args, stop_event=stop_event, **kw)
+
+    return patch.object(watchfiles, "watch", side_effect=watch)
+
+
 def test_file_contents_no_watch(tmp_path: pathlib.Path) -> None:
     """Test __str__ reads file contents and does not start a thread"""
     str_contents = "hello, world"
@@ -97,8 +123,78 @@ def test_file_contents_thread(tmp_path: pathlib.Path) -> None:
     contents.stop_thread()
 
 
-def test_background_file_contents(tmp_path: pathlib.Path) -> None:
+def test_file_contents_stop_thread_stops_watch(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "foo.txt"
+    path.touch()
+
+    contents = FileContents(path, start_thread=False)
+    watching = threading.Thread(target=lambda: list(contents.watch()), daemon=True)
+    watching.start()
+    contents.stop_thread()
+    watching.join(timeout=5)
+    assert not watching.is_alive()
+
+
+def test_file_contents_shared_thread(tmp_path: pathlib.Path) -> None:
+    """Test all files are watched from one thread, which exits with the last one"""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    paths = [tmp_path / "a" / "index.js", tmp_path / "a" / "styles.css"]
+    paths.append(tmp_path / "b" / "index.js")
+    for path in paths:
+        path.touch()
+
+    files = [FileContents(path) for path in paths]
+    thread = files[0]._background_thread
+    assert thread is not None
+    assert all(contents._background_thread is thread for contents in files)
+    assert {tmp_path / "a", tmp_path / "b"} <= set(_FILE_WATCHER._directories())
+
+    files[0].stop_thread()
+    assert files[0]._background_thread is None
+    assert files[1]._background_thread is thread
+
+    for contents in files:
+        contents.stop_thread()
+    assert all(contents._background_thread is None for contents in files)
+
+
+def test_file_watcher_dispatch(tmp_path: pathlib.Path) -> None:
+    """Test changes are dispatched to the contents of the changed file only"""
+    paths = [tmp_path / "index.js", tmp_path / "styles.css"]
+    for path in paths:
+        path.write_text("old")
+    files = [FileContents(path, start_thread=False) for path in paths]
+    mocks = [MagicMock() for _ in files]
+    for contents, mock in zip(files, mocks):
+        contents.changed.connect(mock)
+        _FILE_WATCHER._files.setdefault(contents._path, weakref.WeakSet()).add(contents)
+
+    paths[0].write_text("new")
+    _FILE_WATCHER._dispatch(
+        {(Change.modified, str(paths[0])), (Change.added, str(paths[0]))},
+    )
+    mocks[0].assert_called_once_with("new")
+    mocks[1].assert_not_called()
+
+    deleted = MagicMock()
+    files[1].deleted.connect(deleted)
+    paths[1].unlink()
+    _FILE_WATCHER._dispatch({(Change.deleted, str(paths[1]))})
+    assert deleted.called
+    assert not _FILE_WATCHER.watches(files[1])
+
+    files[0].stop_thread()
+    assert not any(_FILE_WATCHER.watches(contents) for contents in files)
+
+
+def test_background_file_contents(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
     """Test background thread watcher sends signals and updates contents"""
+    # a watcher of our own, whose thread can't already be running
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
     str_contents = "hello, world"
     path = tmp_path / "foo.txt"
     path.write_text(str_contents)
@@ -123,17 +219,117 @@ def test_background_file_contents(tmp_path: pathlib.Path) -> None:
         path.write_text(new_contents)
         yield {(Change.modified, str(path))}
 
-    with patch.object(watchfiles, "watch") as mock_watch:
-        mock_watch.return_value = mock_file_events()
+    with _patch_watch(watcher, return_value=mock_file_events()):
         contents.watch_in_thread()
 
-    while contents._background_thread and contents._background_thread.is_alive():
-        time.sleep(0.01)
+        while contents._background_thread and contents._background_thread.is_alive():
+            time.sleep(0.01)
 
     mock_changed.assert_called_once_with(new_contents)
     assert str(contents) == new_contents
 
 
+def test_file_watcher_restarts(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test files are watched again after the watcher thread died"""
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
+    path = tmp_path / "foo.txt"
+    path.write_text("hello, world")
+    contents = FileContents(path, start_thread=False)
+
+    with _patch_watch(
+        watcher, side_effect=OSError("too many open files")
+    ), patch.object(threading, "excepthook") as mock_excepthook:
+        contents.watch_in_thread()
+        thread = watcher.thread
+        assert thread is not None
+        thread.join(timeout=5)
+
+    mock_excepthook.assert_called_once()
+    assert watcher.thread is None
+    assert not watcher._is_running()
+
+    def watch_until_stopped(
+        *_: object, stop_event: threading.Event, **__: object
+    ) -> Generator[set, None, None]:
+        stop_event.wait()
+        yield from ()
+
+    with _patch_watch(watcher, side_effect=watch_until_stopped):
+        contents.watch_in_thread()
+        thread = watcher.thread
+        assert thread is not None
+        assert thread.is_alive()
+        watcher.close()
+        assert not thread.is_alive()
+
+
+def test_file_contents_debounced(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test changes in quick succession are reloaded (and emitted) once"""
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
+    path = tmp_path / "foo.txt"
+    path.write_text("hello, world")
+    contents = FileContents(path)
+    changed = threading.Event()
+    calls = []
+
+    def on_changed(new_contents: str) -> None:
+        calls.append((new_contents, threading.current_thread()))
+        changed.set()
+
+    contents.changed.connect(on_changed)
+    time.sleep(0.1)  # let the watcher start
+    for text in ["", "bl", "blah"]:
+        path.write_text(text)
+        time.sleep(0.01)
+
+    assert changed.wait(timeout=5)
+    time.sleep(0.2)
+    thread = watcher.thread
+    watcher.close()
+    # (emitted from the watcher thread itself, rather than from a timer thread)
+    assert calls == [("blah", thread)]
+
+
+def test_file_contents_unchanged(tmp_path: pathlib.Path) -> None:
+    """Test rewriting a file with the same contents doesn't emit changed"""
+    path = tmp_path / "foo.txt"
+    path.write_text("hello, world")
+    contents = FileContents(path, start_thread=False)
+    assert str(contents) == "hello, world"
+    mock = MagicMock()
+    contents.changed.connect(mock)
+
+    path.write_text("hello, world")
+    contents._reload()
+    mock.assert_not_called()
+
+    path.write_text("blah")
+    contents._reload()
+    path.write_text("blah")
+    contents._reload()
+    mock.assert_called_once_with("blah")
+
+
+def test_file_contents_newlines(tmp_path: pathlib.Path) -> None:
+    """Test newlines are translated, as by `read_text`"""
+    path = tmp_path / "foo.txt"
+    path.write_bytes(b"hello\r\nworld\r")
+    contents = FileContents(path, start_thread=False)
+    assert str(contents) == "hello\nworld\n"
+
+    mock = MagicMock()
+    contents.changed.connect(mock)
+    path.write_bytes(b"blah\r\n")
+    contents._reload()
+    mock.assert_called_once_with("blah\n")
+
+
 def test_missing_file_fails() -> None:
     """Test missing file fails to construct"""
     with pytest.raises(ValueError, match="does not exist"):
@@ -152,3 +348,38 @@ def test_virtual_file_contents() -> None:
     contents.contents = "blah"
     mock_changed.assert_called_once_with("blah")
     assert str(contents) == "blah"
+
+
+def test_file_contents_event_loop(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test files are watched from the running event loop, if there is one"""
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
+    path = tmp_path / "foo.txt"
+    path.write_text("hello, world")
+
+    async def watch() -> list:
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        calls = []
+
+        def on_changed(contents: str) -> None:
+            calls.append((contents, threading.current_thread()))
+            changed.set()
+
+        contents = FileContents(path)
+        contents.changed.connect(on_changed)
+        assert contents._background_thread is None
+        assert watcher.watches(contents)
+        assert watcher._task is not None
+        assert watcher._task.get_loop() is loop
+
+        await asyncio.sleep(0.1)  # let the watcher start
+        path.write_text("blah")
+        await asyncio.wait_for(changed.wait(), timeout=5)
+        contents.stop_thread()
+        return calls
+
+    calls = asyncio.run(watch())
+    assert calls[0] == ("blah", threading.main_thread())
@@ -0,0 +1,109 @@
+import copy
+from unittest.mock import patch
+
+from anywidget._patch import DeltaEncoder, diff
+
+
+def test_diff_equal_values() -> None:
+    assert diff([1, {"a": "b"}], [1, {"a": "b"}]) == []
+
+
+def test_diff_nested() -> None:
+    old = {"rows": [1, 2, 3], "meta": {"name": "a", "stale": True}}
+    new = {"rows": [1, 5, 3, 4], "meta": {"name": "a", "count": 1}}
+    assert diff(old, new) == [
+        {"op": "replace", "path": ["rows", 1], "value": 5},
+        {"op": "extend", "path": ["rows"], "value": [4]},
+        {"op": "remove", "path": ["meta", "stale"]},
+        {"op": "add", "path": ["meta", "count"], "value": 1},
+    ]
+
+
+def test_diff_concat_strings() -> None:
+    assert diff({"log": "line 1\n"}, {"log": "line 1\nline 2\n"}) == [
+        {"op": "concat", "path": ["log"], "value": "line 2\n"},
+    ]
+    assert diff(["abc"], ["xbc"]) == [{"op": "replace", "path": [0], "value": "xbc"}]
+
+
+def test_diff_truncate_and_types() -> None:
+    assert diff([1, 2, 3], (1, 2)) == [{"op": "truncate", "path": [], "value": 2}]
+    # 1 == 1.0 == True in Python, but not on the wire
+    assert diff([1, 1], [1.0, True]) == [
+        {"op": "replace", "path": [0], "value": 1.0},
+        {"op": "replace", "path": [1], "value": True},
+    ]
+
+
+def test_diff_gives_up_past_max_ops() -> None:
+    assert diff(list(range(10)), list(range(1, 11)), max_ops=5) is None
+
+
+def test_delta_encoder() -> None:
+    encoder = DeltaEncoder()
+    rows = list(range(1000))
+
+    state, patches = encoder.encode({"rows": rows, "value": 1})
+    assert state == {"rows": rows, "value": 1}
+    assert patches == {}
+
+    rows.append(1000)  # mutated in place
+    state, patches = encoder.encode({"rows": rows, "value": 2})
+    assert state == {"value": 2}
+    assert patches == {"rows": [{"op": "extend", "path": [], "value": [1000]}]}
+
+    # unchanged values are dropped
+    state, patches = encoder.encode({"rows": rows})
+    assert state == {}
+    assert patches == {}
+
+    # a full send always sends the value, but updates the snapshot
+    rows.append(1001)
+    state, patches = encoder.encode({"rows": rows}, full=True)
+    assert state == {"rows": rows}
+    assert patches == {}
+    state, patches = encoder.encode({"rows": rows})
+    assert state == {}
+
+
+def test_delta_encoder_falls_back_to_full_value() -> None:
+    encoder = DeltaEncoder(keys={"rows"})
+    encoder.encode({"rows": [1, 2, 3], "other": [1, 2, 3]})
+
+    # the patch would be bigger than the value itself
+    state, patches = encoder.encode({"rows": [4, 5, 6], "other": [1, 2]})
+    assert state == {"rows": [4, 5, 6], "other": [1, 2]}
+    assert patches == {}
+
+    # binary data can't be patched
+    state, patches = encoder.encode({"rows": [4, 5, 6, b"bytes"]})
+    assert state == {"rows": [4, 5, 6, b"bytes"]}
+    assert patches == {}
+
+
+def test_delta_encoder_records_front_end_values() -> None:
+    encoder = DeltaEncoder()
+    encoder.encode({"rows": list(range(100))})
+    encoder.record({"rows": [*range(100), 100]})
+    state, patches = encoder.encode({"rows": [*range(100), 100, 101]})
+    assert state == {}
+    assert patches == {"rows": [{"op": "extend", "path": [], "value": [101]}]}
+
+
+def test_delta_encoder_appends() -> None:
+    encoder = DeltaEncoder()
+    rows = [{"id": i} for i in range(1000)]
+    encoder.encode({"rows": rows})
+
+    rows.append({"id": 1000})
+    with patch("anywidget._patch.copy.deepcopy", wraps=copy.deepcopy) as mock_copy:
+        state, patches = encoder.encode({"rows": rows})
+    assert state == {}
+    assert patches == {"rows": [{"op": "extend", "path": [], "value": [{"id": 1000}]}]}
+    # only the new items are copied into the snapshot
+    mock_copy.assert_called_once_with([{"id": 1000}])
+
+    # which stays independent of the value
+    rows[0]["id"] = -1
+    state, patches = encoder.encode({"rows": rows})
+    assert patches == {"rows": [{"op": "replace", "path": [0, "id"], "value": -1}]}
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+from anywidget._rate_limit import make_rate_limiter
+
+
+def test_no_limits() -> None:
+    assert make_rate_limiter(print, {"value": {"sync": True}}) is None
+
+
+def test_throttle() -> None:
+    sent: list[set[str]] = []
+    limiter = make_rate_limiter(sent.append, {"value": {"throttle_ms": 20}})
+    assert limiter is not None
+
+    async def changes() -> None:
+        for _ in range(5):
+            limiter({"value", "label"})
+        assert sent == [{"value", "label"}, {"label"}, {"label"}, {"label"}, {"label"}]
+        await asyncio.sleep(0.05)
+
+    asyncio.run(changes())
+    # leading and trailing edges
+    assert sent[5:] == [{"value"}]
+
+
+def test_throttle_sync_loop() -> None:
+    sent: list[set[str]] = []
+    limiter = make_rate_limiter(sent.append, {"value": {"throttle_ms": 20}})
+    assert limiter is not None
+    now = 0.0
+
+    with patch("anywidget._rate_limit.call_later") as mock_call_later, patch(
+        "anywidget._rate_limit.time.monotonic", side_effect=lambda: now
+    ):
+        # the trailing send never runs, since the loop doesn't yield
+        for _ in range(3):
+            limiter({"value"})
+            now += 0.015
+
+    # the change after the interval is sent inline, replacing the trailing send
+    assert sent == [{"value"}, {"value"}]
+    mock_call_later.assert_called_once()
+    mock_call_later.return_value.assert_called_once_with()
+
+
+def test_debounce_without_loop() -> None:
+    sent: list[set[str]] = []
+    limiter = make_rate_limiter(sent.append, {"value": {"debounce_ms": 0}})
+    assert limiter is not None
+
+    # there's nothing to defer the send to, so it isn't dropped but sent now
+    limiter({"value"})
+    assert sent == [{"value"}]
+
+
+def test_debounce() -> None:
+    sent: list[set[str]] = []
+    limiter = make_rate_limiter(sent.append, {"value": {"debounce_ms": 100}})
+    assert limiter is not None
+
+    async def changes() -> None:
+        for _ in range(5):
+            limiter({"value"})
+            await asyncio.sleep(0.001)
+        assert sent == []
+        await asyncio.sleep(0.2)
+
+    asyncio.run(changes())
+    assert sent == [{"value"}]
+
+
+def test_cancel() -> None:
+    sent: list[set[str]] = []
+    limiter = make_rate_limiter(sent.append, {"value": {"debounce_ms": 10}})
+    assert limiter is not None
+
+    async def changes() -> None:
+        limiter({"value"})
+        limiter.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(changes())
+    assert sent == []
@@ -1,3 +1,4 @@
+import array
 import pathlib
 import sys
 from unittest.mock import MagicMock, patch
@@ -76,6 +77,97 @@ def test_remove_and_put_buffers() -> None:
     assert state_before == state
 
 
+def test_remove_buffers_deeply_nested() -> None:
+    depth = sys.getrecursionlimit() * 2
+    state: dict = {"leaf": b"data"}
+    for _ in range(depth):
+        state = {"child": [state, 1]}
+
+    _, buffer_paths, buffers = remove_buffers({"root": state})
+    assert buffer_paths == [["root", *(["child", 0] * depth), "leaf"]]
+    assert buffers == [b"data"]
+    # the original is left untouched
+    leaf = state
+    for _ in range(depth):
+        leaf = leaf["child"][0]
+    assert leaf == {"leaf": b"data"}
+
+
+def test_remove_buffers_without_binary_returns_state() -> None:
+    state = {"rows": [{"x": i, "y": [i, str(i)]} for i in range(100)]}
+    new_state, buffer_paths, buffers = remove_buffers(state)
+    assert new_state is state
+    assert buffer_paths == []
+    assert buffers == []
+
+
+def test_remove_buffers_packs_buffer_protocol_objects() -> None:
+    data = array.array("d", [1.0, 2.0, 3.0])
+    state = {"x": data, "nested": [1, {"y": array.array("b", [1, -1])}]}
+    state, buffer_paths, buffers = remove_buffers(state)
+
+    assert state == {
+        "x": {"kind": "anywidget-ndarray", "dtype": "float64", "shape": [3]},
+        "nested": [
+            1,
+            {"y": {"kind": "anywidget-ndarray", "dtype": "int8", "shape": [2]}},
+        ],
+    }
+    assert buffer_paths == [["x", "buffer"], ["nested", 1, "y", "buffer"]]
+    # zero-copy views of the data
+    assert buffers[0].obj is data
+    assert bytes(buffers[0]) == data.tobytes()
+    assert bytes(buffers[1]) == b"\x01\xff"
+
+
+def test_remove_buffers_numpy() -> None:
+    np = pytest.importorskip("numpy")
+
+    arr = np.arange(6, dtype="float32").reshape(2, 3)
+    state, buffer_paths, buffers = remove_buffers({"a": arr, "t": arr.T})
+    assert state == {
+        "a": {"kind": "anywidget-ndarray", "dtype": "float32", "shape": [2, 3]},
+        "t": {"kind": "anywidget-ndarray", "dtype": "float32", "shape": [3, 2]},
+    }
+    assert buffer_paths == [["a", "buffer"], ["t", "buffer"]]
+    assert bytes(buffers[0]) == arr.tobytes()
+    # non-contiguous data is copied into C order
+    assert bytes(buffers[1]) == arr.T.tobytes()
+
+    # element types without a typed array are sent as raw bytes
+    big_endian = np.arange(3, dtype=">i4")
+    state, buffer_paths, buffers = remove_buffers({"b": big_endian})
+    assert state == {}
+    assert buffer_paths == [["b"]]
+    assert bytes(buffers[0]) == big_endian.tobytes()
+
+
+def test_remove_buffers_numpy_scalars() -> None:
+    np = pytest.importorskip("numpy")
+
+    state = {"n": np.int64(5), "x": np.float32(0.5), "b": np.bool_(True)}
+    state["zero_d"] = np.array(1.5)
+    new_state, buffer_paths, buffers = remove_buffers(state)
+    # scalars are sent as JSON (numbers), not binary
+    assert new_state is state
+    assert buffer_paths == []
+    assert buffers == []
+
+
+def test_remove_buffers_numpy_unexportable() -> None:
+    np = pytest.importorskip("numpy")
+
+    state = {
+        "dates": np.array(["2020-01-01"], dtype="datetime64[D]"),
+        "objects": np.array([{}], dtype=object),
+    }
+    new_state, buffer_paths, buffers = remove_buffers(state)
+    # element types the buffer protocol can't export are left to the JSON path
+    assert new_state is state
+    assert buffer_paths == []
+    assert buffers == []
+
+
 def test_enables_widget_manager_in_colab(monkeypatch: pytest.MonkeyPatch) -> None:
     mock = MagicMock()
     monkeypatch.setitem(sys.modules, "google.colab.output", mock)
@@ -129,6 +221,34 @@ def test_try_file_contents_development_enable_hmr(tmp_path: pathlib.Path) -> Non
     file_contents.stop_thread()  # stop the background thread for CI
 
 
+def test_try_file_contents_shared(tmp_path: pathlib.Path) -> None:
+    foo = tmp_path / "foo.txt"
+    foo.write_text("foo")
+
+    file_contents = try_file_contents(foo)
+    assert isinstance(file_contents, FileContents)
+    assert try_file_contents(str(foo)) is file_contents
+    assert try_file_contents(tmp_path / "bar" / ".." / "foo.txt") is file_contents
+
+    # starts watching the shared contents
+    with enable_hmr():
+        assert try_file_contents(foo) is file_contents
+    assert file_contents._background_thread is not None
+    file_contents.stop_thread()  # stop the background thread for CI
+
+
+def test_try_file_contents_invalidated(tmp_path: pathlib.Path) -> None:
+    foo = tmp_path / "foo.txt"
+    foo.write_text("foo")
+
+    file_contents = try_file_contents(foo)
+    assert str(file_contents) == "foo"
+
+    # not watched, so re-read when the file's size (or mtime) changes
+    foo.write_text("foo, bar")
+    assert str(file_contents) == "foo, bar"
+
+
 def test_try_file_contents_production(tmp_path: pathlib.Path) -> None:
     site_packages = tmp_path / "site-packages"
     site_packages.mkdir()
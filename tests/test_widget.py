@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import array
+import asyncio
 import json
 import pathlib
 import sys
 import time
-from typing import Generator, NoReturn
+import zlib
+from typing import Generator, Iterator, NoReturn
 from unittest.mock import MagicMock, patch
 
 import anywidget
+import anywidget._file_contents
+import ipywidgets
 import pytest
 import traitlets.traitlets as t
 import watchfiles
-from anywidget._file_contents import FileContents
+from anywidget._chunking import DEFAULT_CHUNK_SIZE, DEFAULT_WINDOW
+from anywidget._file_contents import FileContents, _FileWatcher
 from anywidget._util import _DEFAULT_ESM, _WIDGET_MIME_TYPE
-from anywidget.experimental import command
+from anywidget.experimental import AppendList, AppendListTrait, command
 from traitlets import traitlets
 from watchfiles import Change
 
@@ -152,7 +158,9 @@ def test_patched_repr_ipywidget_v8_colab(monkeypatch: pytest.MonkeyPatch) -> Non
     }
 
 
-def test_infer_file_contents(tmp_path: pathlib.Path) -> None:
+def test_infer_file_contents(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
     esm = tmp_path / "foo.js"
     esm.write_text(
         "export default { render({ model, el }) { el.innerText = 'Hello, world'; } }",
@@ -163,6 +171,11 @@ def test_infer_file_contents(tmp_path: pathlib.Path) -> None:
     css = site_packages / "styles.css"
     css.write_text(".foo { background-color: black; }")
 
+    # a watcher of our own, which can be closed without affecting other tests
+    # (the `FileContents` of a file is shared by every widget using it)
+    esm_watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", esm_watcher)
+
     with enable_hmr():
 
         class Widget(anywidget.AnyWidget):
@@ -183,28 +196,72 @@ def test_infer_file_contents(tmp_path: pathlib.Path) -> None:
     assert w.has_trait("_css")
     assert w._css == css.read_text()
 
-    def mock_file_events() -> Generator[set]:
-        css.write_text("blah")
+    # another one, whose thread can't already be running
+    watcher = _FileWatcher()
+    monkeypatch.setattr(anywidget._file_contents, "_FILE_WATCHER", watcher)
+    real_watch = watchfiles.watch
+
+    def mock_file_events() -> Generator[set, None, None]:
         # write to file
-        changes = set()
-        changes.add((Change.modified, str(css)))
-        yield changes
-        # delete the file
-        changes = set()
-        changes.add((Change.deleted, str(css)))
-        yield changes
-
-    with patch.object(watchfiles, "watch") as mock_watch:
-        mock_watch.return_value = mock_file_events()
+        css.write_text("blah")
+        yield {(Change.modified, str(css))}
+        # delete the file (which stops the watcher)
+        css.unlink()
+        yield {(Change.deleted, str(css))}
+
+    def mock_watch(
+        *args: object, stop_event: object, **kwargs: object
+    ) -> Iterator[set]:
+        if stop_event is not watcher._rewatch:
+            # (the other watcher's thread is watching `_esm`)
+            return real_watch(*args, stop_event=stop_event, **kwargs)
+        return mock_file_events()
+
+    with patch.object(watchfiles, "watch", side_effect=mock_watch):
         Widget._css.watch_in_thread()
 
-    while Widget._css._background_thread and Widget._css._background_thread.is_alive():
-        time.sleep(0.01)
+        while (
+            Widget._css._background_thread and Widget._css._background_thread.is_alive()
+        ):
+            time.sleep(0.01)
 
-    assert w._css == css.read_text()
+    assert w._css == "blah"
 
     # need to teardown the thread for CI
-    Widget._esm.stop_thread()
+    esm_watcher.close()
+
+
+def test_hot_reload_broadcast(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    esm = tmp_path / "foo.js"
+    esm.write_text("export default {}")
+
+    class Widget(anywidget.AnyWidget):
+        _esm = esm
+
+    widgets = [Widget() for _ in range(3)]
+    assert isinstance(Widget._esm, FileContents)
+    # one connection for all the widgets
+    assert len(Widget._esm.changed) == 1
+
+    widgets[1].close()
+    sent = []
+    monkeypatch.setattr(
+        Widget, "_send", lambda self, msg, **_: sent.append((self, msg))
+    )
+    esm.write_text("blah")
+    Widget._esm._reload()
+
+    assert [w._esm for w in widgets] == ["blah", "export default {}", "blah"]
+    # only live widgets are sent the (shared) update, and only once
+    assert sorted(id(w) for w, _ in sent) == sorted([id(widgets[0]), id(widgets[2])])
+    assert sent[0][1] is sent[1][1]
+    assert sent[0][1] == {
+        "method": "update",
+        "state": {"_esm": "blah"},
+        "buffer_paths": [],
+    }
 
 
 def test_missing_pathlib_path_raises(tmp_path: pathlib.Path) -> None:
@@ -385,3 +442,355 @@ def test_repr_mimebundle_uses_repr() -> None:
     bundle = w._repr_mimebundle_()
     assert bundle is not None
     assert bundle[0]["text/plain"] == "MyCustomRepr"
+
+
+def test_delta_traits() -> None:
+    class Widget(anywidget.AnyWidget):
+        rows = t.List(list(range(100))).tag(sync=True, delta=True)
+        other = t.List([1, 2, 3]).tag(sync=True)
+
+    w = Widget()
+    with patch.object(w, "_send") as mock_send:
+        w.rows = [*w.rows, 100]
+        w.other = [1, 2, 3, 4]
+
+    assert mock_send.call_count == 2  # noqa: PLR2004
+    # the state the comm was opened with is the baseline, so even the first send
+    # of a key is a patch
+    assert mock_send.call_args_list[0].args[0] == {
+        "method": "update",
+        "state": {},
+        "buffer_paths": [],
+        "patches": {"rows": [{"op": "extend", "path": [], "value": [100]}]},
+    }
+    assert mock_send.call_args_list[1].args[0]["state"] == {"other": [1, 2, 3, 4]}
+
+    with patch.object(w, "_send") as mock_send:
+        w.rows = [*w.rows, 101]
+
+    mock_send.assert_called_once_with(
+        {
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {"rows": [{"op": "extend", "path": [], "value": [101]}]},
+        },
+        buffers=[],
+    )
+
+    # values set from the front end aren't sent back as an update
+    with patch.object(w, "_send") as mock_send:
+        w.set_state({"rows": [*w.rows, 102]})
+    assert w.rows[-1] == 102  # noqa: PLR2004
+    methods = [call.args[0]["method"] for call in mock_send.call_args_list]
+    assert "update" not in methods
+
+
+def test_append_list_trait() -> None:
+    class Widget(anywidget.AnyWidget):
+        messages = AppendListTrait().tag(sync=True)
+
+    w = Widget(messages=["hi"])
+    assert isinstance(w.messages, AppendList)
+
+    with patch.object(w, "_send") as mock_send:
+        w.messages.append("there")
+
+    mock_send.assert_called_once_with(
+        {
+            "method": "update",
+            "state": {},
+            "buffer_paths": [],
+            "patches": {
+                "messages": [{"op": "extend", "path": [], "value": ["there"]}],
+            },
+        },
+        buffers=[],
+    )
+
+    # re-assigning sends the whole value, and the old list is no longer synced
+    old = w.messages
+    with patch.object(w, "_send") as mock_send:
+        w.messages = ["new"]
+        old.append("stale")
+    assert isinstance(w.messages, AppendList)
+    mock_send.assert_called_once()
+    assert mock_send.call_args.args[0]["state"] == {"messages": ["new"]}
+
+
+def test_stream_text() -> None:
+    class Widget(anywidget.AnyWidget):
+        text = t.Unicode("Hello").tag(sync=True)
+
+    w = Widget()
+    changes = []
+    w.observe(lambda change: changes.append(change["new"]), names="text")
+
+    async def stream() -> None:
+        for token in [",", " world", "!"]:
+            w.stream_text("text", token)
+        await asyncio.sleep(0.05)
+
+    with patch.object(w, "_send") as mock_send:
+        asyncio.run(stream())
+
+    # the value updates immediately, but the first chunk is sent right away and
+    # the rest are batched into one message
+    assert w.text == "Hello, world!"
+    assert changes == ["Hello,", "Hello, world", "Hello, world!"]
+    assert [call.args[0]["patches"] for call in mock_send.call_args_list] == [
+        {"text": [{"op": "concat", "path": [], "value": ","}]},
+        {"text": [{"op": "concat", "path": [], "value": " world!"}]},
+    ]
+
+
+def test_stream_text_sync_loop() -> None:
+    class Widget(anywidget.AnyWidget):
+        text = t.Unicode("").tag(sync=True)
+
+    w = Widget()
+    now = 100.0
+
+    with patch.object(w, "_send") as mock_send, patch(
+        "anywidget.widget.call_later"
+    ) as mock_call_later, patch(
+        "anywidget.widget.time.monotonic", side_effect=lambda: now
+    ):
+        # a loop that never yields to the event loop still streams, once per frame
+        for token in ["a", "b", "c"]:
+            w.stream_text("text", token)
+            now += 0.01
+
+    values = [
+        call.args[0]["patches"]["text"][0]["value"] for call in mock_send.call_args_list
+    ]
+    assert values == ["a", "bc"]
+    # the timer only sends the trailing chunk
+    mock_call_later.assert_called_once()
+
+
+def test_stream_text_dropped_by_full_send() -> None:
+    class Widget(anywidget.AnyWidget):
+        text = t.Unicode("").tag(sync=True)
+        count = t.Int(0)
+
+    w = Widget()
+
+    async def stream() -> None:
+        w.stream_text("text", "sent")
+        w.stream_text("text", "stale")
+        w.text = "reset"
+        w.stream_text("text", "!")
+        await asyncio.sleep(0.05)
+
+    with patch.object(w, "_send") as mock_send:
+        asyncio.run(stream())
+
+    assert w.text == "reset!"
+    msgs = [call.args[0] for call in mock_send.call_args_list]
+    assert [msg["state"] for msg in msgs] == [{}, {"text": "reset"}, {}]
+    assert [msg["patches"] for msg in msgs if "patches" in msg] == [
+        {"text": [{"op": "concat", "path": [], "value": "sent"}]},
+        {"text": [{"op": "concat", "path": [], "value": "!"}]},
+    ]
+
+    with pytest.raises(TypeError):
+        w.stream_text("count", "1")
+
+
+def test_buffer_protocol_traits() -> None:
+    class Widget(anywidget.AnyWidget):
+        values = t.Any().tag(sync=True)
+
+    data = array.array("f", [1.0, 2.0])
+    w = Widget()
+    with patch.object(w, "_send") as mock_send:
+        w.values = data
+
+    msg = mock_send.call_args.args[0]
+    assert msg["state"] == {
+        "values": {"kind": "anywidget-ndarray", "dtype": "float32", "shape": [2]},
+    }
+    assert msg["buffer_paths"] == [["values", "buffer"]]
+    (buffer,) = mock_send.call_args.kwargs["buffers"]
+    assert bytes(buffer) == data.tobytes()
+
+
+def test_nested_buffer_protocol_traits() -> None:
+    np = pytest.importorskip("numpy")
+
+    class Widget(anywidget.AnyWidget):
+        data = t.Dict().tag(sync=True)
+
+    w = Widget()
+    with patch.object(w, "_send") as mock_send:
+        w.data = {"x": np.arange(3.0), "label": "x"}
+
+    msg = mock_send.call_args.args[0]
+    assert msg["state"] == {
+        "data": {
+            "x": {"kind": "anywidget-ndarray", "dtype": "float64", "shape": [3]},
+            "label": "x",
+        },
+    }
+    assert msg["buffer_paths"] == [["data", "x", "buffer"]]
+    (buffer,) = mock_send.call_args.kwargs["buffers"]
+    assert bytes(buffer) == np.arange(3.0).tobytes()
+
+
+def test_compress_traits() -> None:
+    class Widget(anywidget.AnyWidget):
+        image = t.Bytes(b"").tag(sync=True, compress=100)
+        raw = t.Bytes(b"").tag(sync=True)
+
+    w = Widget()
+    with patch.object(w, "_send") as mock_send:
+        w.image = bytes(1000)
+        w.raw = bytes(1000)
+
+    first, second = mock_send.call_args_list
+    assert first.args[0]["state"] == {
+        "image": {"kind": "anywidget-compressed", "codec": "deflate"},
+    }
+    assert first.args[0]["buffer_paths"] == [["image", "buffer"]]
+    assert zlib.decompress(first.kwargs["buffers"][0]) == bytes(1000)
+    assert second.args[0]["buffer_paths"] == [["raw"]]
+    assert second.kwargs["buffers"] == [bytes(1000)]
+
+
+def test_chunked_transfer() -> None:
+    class Widget(anywidget.AnyWidget):
+        image = t.Bytes(b"").tag(sync=True)
+
+    w = Widget()
+    w.comm = MagicMock()  # a comm with a kernel
+    callback = MagicMock()
+    w.on_msg(callback)
+    image = bytes(DEFAULT_CHUNK_SIZE * (DEFAULT_WINDOW + 1))
+    with patch.object(ipywidgets.Widget, "_send") as mock_send:
+        w.image = image
+        assert mock_send.call_count == 1 + DEFAULT_WINDOW
+        assert mock_send.call_args_list[0].args[0]["transfer"]["chunks"] == [
+            DEFAULT_WINDOW + 1
+        ]
+        w._handle_custom_msg({"kind": "anywidget-chunk-ack", "id": "", "seq": 0}, [])
+        assert mock_send.call_count == 2 + DEFAULT_WINDOW
+
+    # acks aren't passed on to user callbacks
+    callback.assert_not_called()
+    chunks = [call.kwargs["buffers"][0] for call in mock_send.call_args_list[1:]]
+    assert b"".join(chunks) == image
+
+
+def test_full_state_during_chunked_transfer() -> None:
+    class Widget(anywidget.AnyWidget):
+        image = t.Bytes(b"").tag(sync=True)
+
+    w = Widget()
+    w.comm = MagicMock()  # a comm with a kernel
+    image = bytes(DEFAULT_CHUNK_SIZE * (DEFAULT_WINDOW + 1))
+    with patch.object(ipywidgets.Widget, "_send") as mock_send:
+        w.image = image
+        # e.g. another front end requested the full state
+        w.send_state()
+        w._handle_custom_msg({"kind": "anywidget-chunk-ack", "id": "", "seq": 0}, [])
+
+    # the first transfer still completes, as its update was already sent
+    msgs = [call.args[0] for call in mock_send.call_args_list]
+    first = msgs[0]["transfer"]["id"]
+    seqs = [
+        msg["content"]["seq"]
+        for msg in msgs
+        if msg["method"] == "custom" and msg["content"]["id"] == first
+    ]
+    assert seqs == list(range(DEFAULT_WINDOW + 1))
+
+
+def test_backpressure_traits() -> None:
+    class Widget(anywidget.AnyWidget):
+        value = t.Int(0).tag(sync=True, backpressure=True)
+
+    w = Widget()
+    w.comm = MagicMock()  # a comm with a kernel
+    callback = MagicMock()
+    w.on_msg(callback)
+    with patch.object(ipywidgets.Widget, "_send") as mock_send:
+        for i in range(1, 10):
+            w.value = i
+        mock_send.assert_called_once()
+        assert mock_send.call_args.args[0]["state"] == {"value": 1}
+        seq = mock_send.call_args.args[0]["ack"]
+        mock_send.reset_mock()
+
+        w._handle_custom_msg({"kind": "anywidget-ack", "seq": seq}, [])
+        mock_send.assert_called_once()
+        assert mock_send.call_args.args[0]["state"] == {"value": 9}
+
+    callback.assert_not_called()
+
+
+def test_throttled_traits() -> None:
+    class Widget(anywidget.AnyWidget):
+        value = t.Int(0).tag(sync=True, throttle_ms=20)
+
+    w = Widget()
+
+    async def changes() -> None:
+        for i in range(1, 10):
+            w.value = i
+        await asyncio.sleep(0.05)
+
+    with patch.object(w, "_send") as mock_send:
+        asyncio.run(changes())
+
+    # the first change is sent immediately, and the last one once the interval ends
+    first, last = mock_send.call_args_list
+    assert first.args[0]["state"] == {"value": 1}
+    assert last.args[0]["state"] == {"value": 9}
+
+
+def test_batch() -> None:
+    class Widget(anywidget.AnyWidget):
+        x = t.Int(0).tag(sync=True)
+        y = t.Int(0).tag(sync=True)
+
+    w = Widget()
+    with patch.object(w, "_send") as mock_send, anywidget.batch(w):
+        w.x = 1
+        with anywidget.batch(w):
+            w.y = 2
+        w.x = 3
+        mock_send.assert_not_called()
+
+    mock_send.assert_called_once()
+    assert mock_send.call_args.args[0]["state"] == {"x": 3, "y": 2}
+
+
+def test_batch_patches() -> None:
+    class Widget(anywidget.AnyWidget):
+        x = t.Int(0).tag(sync=True)
+        messages = AppendListTrait().tag(sync=True)
+        log = AppendListTrait().tag(sync=True)
+
+    w = Widget(messages=["hi"], log=["start"])
+    with patch.object(w, "_send") as mock_send, anywidget.batch(w):
+        w.x = 1
+        w.messages.append("there")
+        w.log.append("stale")
+        w.log = ["reset"]
+        w.log.append("done")
+        mock_send.assert_not_called()
+
+    # patches are merged into the single update, unless the key's whole value is
+    # sent anyway
+    mock_send.assert_called_once()
+    msg = mock_send.call_args.args[0]
+    assert msg["state"] == {"x": 1, "log": ["reset", "done"]}
+    assert msg["patches"] == {
+        "messages": [{"op": "extend", "path": [], "value": ["there"]}],
+    }
+
+
+def test_batch_requires_widget() -> None:
+    with pytest.raises(TypeError, match="Cannot batch"), anywidget.batch(object()):
+        pass